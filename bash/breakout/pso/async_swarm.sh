@@ -0,0 +1,22 @@
+#!/usr/bin/env bash
+#
+#SBATCH --partition=1080ti-long
+#SBATCH --gres=gpu:1
+#SBATCH --time=7-00:00:00
+#SBATCH --mem=32000
+#SBATCH --account=rkozma
+#SBATCH --output=swarm_%j.out
+#SBATCH --cpus-per-task=8
+
+workers=${1:-4}
+n_iterations=${2:-20}
+time=${3:-250}
+n_snn_episodes=${4:-1}
+
+# Particle swarm optimization of large_dqn_lif.py's parameter1..parameter5. Particles are evaluated on a local process
+# pool and move as soon as their own evaluations finish; the swarm is checkpointed to (and resumed from) one file.
+cd ../../../
+python -m experiments.pso experiments.conversion.large_dqn_lif --workers $workers --n_iterations $n_iterations \
+                          --fixed time=$time n_snn_episodes=$n_snn_episodes --seeds 0 1 2 3 4 \
+                          --checkpoint bash/breakout/pso/pso_state.npz
+exit
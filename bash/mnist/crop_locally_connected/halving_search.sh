@@ -0,0 +1,16 @@
+#!/usr/bin/env bash
+#
+# Same sweep as local_grid_search.sh, with successive halving: configurations whose accuracy curve ranks outside the
+# best third at 2000, 6000, 18000 and 54000 training examples are stopped there.
+
+threads=${1:-2}
+
+cd ../../../
+source activate py36
+
+python -m experiments.sweep experiments.mnist.crop_locally_connected --threads $threads \
+    --halving --min_examples 2000 --eta 3 \
+    --grid seed=0 kernel_size=12,14,16 stride=1 n_filters=25,50,75,100,125,150 crop=4 lr=1e-2,1e-3 lr_decay=1,0.99 \
+    --fixed n_train=60000 n_test=10000 inhib=250 time=250 theta_plus=0.05 theta_decay=1e-7 intensity=0.5 norm=0.2 \
+    cache_inputs=True
+exit
@@ -0,0 +1,16 @@
+#!/usr/bin/env bash
+#
+# Same sweep as grid_search.sh, run on a local process pool (one node) instead of one sbatch job per configuration.
+# Configurations with results already in results/mnist/crop_locally_connected/{train,test}.csv are skipped.
+# Input spike trains are encoded once per input configuration (encoded/mnist/...) and streamed by all jobs.
+
+threads=${1:-2}
+
+cd ../../../
+source activate py36
+
+python -m experiments.sweep experiments.mnist.crop_locally_connected --threads $threads \
+    --grid seed=0 kernel_size=12,14,16 stride=1 n_filters=25,50,75,100,125,150 crop=4 lr=1e-2,1e-3 lr_decay=1,0.99 \
+    --fixed n_train=60000 n_test=10000 inhib=250 time=250 theta_plus=0.05 theta_decay=1e-7 intensity=0.5 norm=0.2 \
+    cache_inputs=True
+exit
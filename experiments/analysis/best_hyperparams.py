@@ -3,9 +3,50 @@ import argparse
 import numpy as np
 import pandas as pd
 
-from itertools import product
+from typing import Tuple
 
 from experiments import ROOT_DIR
+from experiments.results import ResultsStore
+
+
+# Loaded results, keyed by (data, model, train), with the on-disk signature of the store they were loaded from.
+_cache = {}
+
+
+def _signature(path: str, table: str) -> Tuple:
+    # Modification times and sizes of the results store files; appends in WAL mode only touch the -wal file.
+    files = [os.path.join(path, f) for f in ('results.db', 'results.db-wal', table + '.csv')]
+    return tuple((os.path.getmtime(f), os.path.getsize(f)) if os.path.isfile(f) else None for f in files)
+
+
+def load(data: str, model: str, train: bool = True) -> pd.DataFrame:
+    # language=rst
+    """
+    Loads the typed train or test results of a data / model combo's experiments. Loads are cached and only repeated
+    when the results store has changed on disk.
+    """
+    path = os.path.join(ROOT_DIR, 'results', data, model)
+    table = 'train' if train else 'test'
+
+    key = (data, model, train)
+    if key not in _cache or _cache[key][0] != _signature(path, table):
+        with ResultsStore(path) as store:
+            df = store.dataframe(table)
+
+        _cache[key] = (_signature(path, table), df)
+
+    return _cache[key][1]
+
+
+def _equals(column: pd.Series, value) -> pd.Series:
+    # Compares a typed column with a (possibly string) value, e.g., as given on the command line.
+    if pd.api.types.is_numeric_dtype(column) and isinstance(value, str):
+        value = float(value)
+
+    if pd.api.types.is_numeric_dtype(column):
+        return np.isclose(column.astype(float), float(value))
+
+    return column.astype(str) == str(value)
 
 
 def main(model='diehl_and_cook_2015', data='mnist', train=True, fix={}, vary=[], metric='mean_all_activity', top=None):
@@ -15,61 +56,38 @@ def main(model='diehl_and_cook_2015', data='mnist', train=True, fix={}, vary=[],
     experiments, fix certain parameters to values, and return the results sorted
     in descending order of some metric.
     """
-    f = 'train.csv' if train else 'test.csv'
-    path = os.path.join(ROOT_DIR, 'results', data, model, f)
-
-    df = pd.read_csv(path)
-
-    for v in df.columns:
-        df[v] = df[v].apply(str)
+    df = load(data, model, train)
 
+    mask = np.ones(len(df), dtype=bool)
     for v in fix:
-        df = df[df[v] == fix[v]]
+        mask &= np.asarray(_equals(df[v], fix[v]))
 
-    unique = {}
-    for v in vary:
-        unique[v] = df[v].unique()
+    df = df[mask]
 
-    df.drop(
-        labels=[c for c in df.columns if 'max' in c], axis='columns', inplace=True
-    )
+    average_columns = [c for c in df.columns if 'mean' in c]
+    groupby_columns = [
+        c for c in df.columns if 'max' not in c and c != 'random_seed' and c not in average_columns
+    ]
 
-    groupby_columns = list(set(df.columns) - {'random_seed'} - \
-                           set([c for c in df.columns if 'mean' in c]))
+    # Average over random seeds for all hyper-parameter settings at once, best settings first.
+    averaged = df.groupby(by=groupby_columns, dropna=False, sort=False)[average_columns].agg(['mean', 'std'])
+    averaged.columns = averaged.columns.swaplevel(0, 1)
+    averaged = averaged.reindex(columns=['mean', 'std'], level=0)
+    averaged = averaged.sort_values(by=('mean', metric), ascending=False)
 
-    average_columns = [c for c in df.columns if 'mean' in c]
-    for c in average_columns:
-        df[c] = df[c].astype(float)
-
-    dfs = {}
-    for p in product(*unique.values()):
-        temp = df.copy()
-        for i, v in enumerate(vary):
-            temp = temp[temp[v] == p[i]]
-        dfs[p] = temp
-
-    averaged = {}
-    for key, df in dfs.items():
-        df = df.groupby(by=groupby_columns)[average_columns].agg({'mean': np.mean, 'std': np.std})
-        df = df.sort_values(by=('mean', metric), ascending=False)
-
-        if df.size != 0:
-            df.index = df.index.ravel()
-            temp = np.copy(df.index)
-            for i in range(len(temp)):
-                temp[i] = '_'.join(df.index[i])
-
-            df.index = temp
-
-            if top is None:
-                averaged[key] = df
-            else:
-                averaged[key] = df.head(top)
+    index = averaged.index.to_frame(index=False)
+    averaged.index = ['_'.join(str(x) for x in row) for row in index.itertuples(index=False)]
 
     if len(vary) == 0:
-        return averaged[key]
+        return averaged if top is None else averaged.head(top)
+
+    # Split the (sorted) aggregate by the values of the varied parameters.
+    results = {}
+    for key, group in averaged.groupby(by=[index[v].values for v in vary], sort=True, dropna=False):
+        key = key if isinstance(key, tuple) else (key,)
+        results[key] = group if top is None else group.head(top)
 
-    return averaged
+    return results
 
 
 if __name__ == '__main__':
@@ -1,10 +1,26 @@
 import os
 import torch
 import argparse
-import numpy as np
 
 from tqdm import tqdm
-from experiments import ROOT_DIR
+from experiments.spike_archive import SpikeArchiveWriter
+
+
+def convert(path, n_files):
+    # Convert a directory of per-window {i}.pt spike files into a single archive next to it.
+    writer = None
+    for i in tqdm(range(1, n_files)):
+        f = os.path.join(path, f'{i}.pt')
+        spikes, labels = torch.load(f, map_location=torch.device('cpu'))
+        if writer is None:
+            writer = SpikeArchiveWriter(
+                path + '.spk', time=spikes.size(1), n_neurons=spikes.size(2), chunk_size=spikes.size(0),
+                params={'run': os.path.basename(path)}
+            )
+
+        writer.write(spikes, labels)
+
+    writer.close()
 
 
 def main(seed=0, n_filters=100):
@@ -12,48 +28,13 @@ def main(seed=0, n_filters=100):
         '/', 'media', 'bigdrive2', 'djsaunde', 'crop_locally_connected',
         f'train_{seed}_12_4_{n_filters}_4_0.01_0.99_60000_250.0_250_1.0_0.05_1e-07_0.5_0.2_10_250'
     )
-
-    all_spikes = []
-    all_labels = []
-    for i in tqdm(range(1, 240)):
-        f = os.path.join(path, f'{i}.pt')
-        spikes, labels = torch.load(f, map_location=torch.device('cpu'))
-        summed = spikes.sum(1)
-        all_spikes.append(summed)
-        all_labels.append(labels)
-
-    spikes = torch.cat(all_spikes, dim=0)
-    labels = torch.cat(all_labels)
-    torch.save(
-        (spikes, labels),
-        os.path.join(
-            path, 'train_concat.pt'
-        )
-    )
+    convert(path, 240)
 
     path = os.path.join(
         '/', 'media', 'bigdrive2', 'djsaunde', 'crop_locally_connected',
         f'test_{seed}_12_4_{n_filters}_4_0.01_0.99_60000_10000_250.0_250_1.0_0.05_1e-07_0.5_0.2_10_250'
     )
-
-    all_spikes = []
-    all_labels = []
-    for i in tqdm(range(1, 40)):
-        f = os.path.join(path, f'{i}.pt')
-        spikes, labels = torch.load(f, map_location=torch.device('cpu'))
-        summed = spikes.sum(1)
-        all_spikes.append(summed)
-        all_labels.append(labels)
-
-    spikes = torch.cat(all_spikes, dim=0)
-    labels = torch.cat(all_labels)
-
-    torch.save(
-        (spikes, labels),
-        os.path.join(
-            path, 'test_concat.pt'
-        )
-    )
+    convert(path, 40)
 
 
 if __name__ == '__main__':
@@ -63,4 +44,3 @@ if __name__ == '__main__':
     args = parser.parse_args()
     args = vars(args)
     main(**args)
-
@@ -5,6 +5,8 @@ import numpy as np
 
 from tqdm import tqdm
 from experiments import ROOT_DIR
+from experiments.spike_archive import SpikeDataset
+from experiments.results import write_results
 # from sklearn.linear_model import LogisticRegression
 from sklearn.linear_model import SGDClassifier
 
@@ -19,10 +21,8 @@ def main(seed=0, n_filters=100):
     # all_spikes = []
     all_labels = []
     predictions = []
-    for i in tqdm(range(1, 240)):
-        f = os.path.join(path, f'{i}.pt')
-        spikes, labels = torch.load(f, map_location=torch.device('cpu'))
-        summed = spikes.sum(1)
+    loader = SpikeDataset(path + '.spk', summed=True).loader(batch_size=250, shuffle=True, num_workers=2)
+    for summed, labels in tqdm(loader):
         model.partial_fit(summed, labels, classes=np.arange(10))
         predictions.append(model.predict(summed))
 
@@ -48,10 +48,9 @@ def main(seed=0, n_filters=100):
     # all_spikes = []
     all_labels = []
     predictions = []
-    for i in tqdm(range(1, 40)):
-        f = os.path.join(path, f'{i}.pt')
-        spikes, labels = torch.load(f, map_location=torch.device('cpu'))
-        predictions.append(model.predict(spikes.sum(1)))
+    loader = SpikeDataset(path + '.spk', summed=True).loader(batch_size=250, shuffle=False)
+    for summed, labels in tqdm(loader):
+        predictions.append(model.predict(summed))
         all_labels.append(labels)
 
     # spikes = torch.cat(all_spikes, dim=0)
@@ -65,15 +64,9 @@ def main(seed=0, n_filters=100):
     results_path = os.path.join(
         ROOT_DIR, 'results', 'lcsnn_logreg'
     )
-    if not os.path.isdir(results_path):
-        os.makedirs(results_path)
-
-    if not os.path.isfile(os.path.join(results_path, 'results.csv')):
-        with open(os.path.join(results_path, 'results.csv'), 'w') as f:
-            f.write('seed,n_filters,train_accuracy,test_accuracy\n')
 
-    with open(os.path.join(results_path, 'results.csv'), 'a') as f:
-        f.write(f'{seed},{n_filters},{train_accuracy},{test_accuracy}\n')
+    header = 'seed,n_filters,train_accuracy,test_accuracy\n'
+    write_results(results_path, 'results.csv', header, [seed, n_filters, train_accuracy, test_accuracy])
 
 
 if __name__ == '__main__':
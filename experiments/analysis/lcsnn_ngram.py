@@ -3,9 +3,8 @@ import torch
 
 from tqdm import tqdm
 from experiments import ROOT_DIR
-from bindsnet.evaluation import ngram, update_ngram_scores
-
-location = 'gpu' if torch.cuda.is_available() else 'cpu'
+from experiments.evaluation import NgramTable
+from experiments.spike_archive import SpikeArchive
 
 
 def main():
@@ -14,22 +13,15 @@ def main():
         'train_2_12_4_100_4_0.01_0.99_60000_250.0_250_1.0_0.05_1e-07_0.5_0.2_10_250'
     )
 
-    ngram_scores = {}
-    for i in tqdm(range(200, 240)):
-        f = os.path.join(path, f'{i}.pt')
-        spikes, labels = torch.load(f, map_location=location)
-        ngram_scores = update_ngram_scores(
-            spikes=spikes, labels=labels, n_labels=10, n=1, ngram_scores=ngram_scores
-        )
+    archive = SpikeArchive(path + '.spk')
+    ngram_scores = NgramTable(n_neurons=archive.n_neurons, n_labels=10, n=1)
+    for spikes, labels in tqdm(archive.chunks(199 * 250, 239 * 250)):
+        ngram_scores.update(spikes=spikes, labels=labels)
 
     all_labels = torch.LongTensor()
     all_predictions = torch.LongTensor()
-    for i in tqdm(range(200, 240)):
-        f = os.path.join(path, f'{i}.pt')
-        spikes, labels = torch.load(f, map_location=location)
-        predictions = ngram(
-            spikes=spikes, ngram_scores=ngram_scores, n_labels=10, n=1
-        )
+    for spikes, labels in tqdm(archive.chunks(199 * 250, 239 * 250)):
+        predictions = ngram_scores.predict(spikes=spikes)
         all_labels = torch.cat([all_labels, labels.long()])
         all_predictions = torch.cat([all_predictions, predictions.long()])
 
@@ -43,12 +35,9 @@ def main():
 
     all_labels = torch.LongTensor()
     all_predictions = torch.LongTensor()
-    for i in tqdm(range(1, 40)):
-        f = os.path.join(path, f'{i}.pt')
-        spikes, labels = torch.load(f, map_location=location)
-        predictions = ngram(
-            spikes=spikes, ngram_scores=ngram_scores, n_labels=10, n=1
-        )
+    archive = SpikeArchive(path + '.spk')
+    for spikes, labels in tqdm(archive.chunks()):
+        predictions = ngram_scores.predict(spikes=spikes)
         all_labels = torch.cat([all_labels, labels.long()])
         all_predictions = torch.cat([all_predictions, predictions.long()])
 
@@ -1,13 +1,10 @@
 import os
 import torch
-import numpy as np
 import torch.nn as nn
 import torch.optim as optim
 
-from tqdm import tqdm
 from experiments import ROOT_DIR
-
-location = 'gpu' if torch.cuda.is_available() else 'cpu'
+from experiments.spike_archive import SpikeDataset
 
 
 class RNN(nn.Module):
@@ -39,16 +36,8 @@ def main():
         'train_2_12_4_100_4_0.01_0.99_60000_250.0_250_1.0_0.05_1e-07_0.5_0.2_10_250'
     )
 
-    all_spikes = []
-    all_labels = []
-    for i in tqdm(range(220, 240)):
-        f = os.path.join(path, f'{i}.pt')
-        spikes, labels = torch.load(f, map_location=location)
-        all_spikes.append(spikes)
-        all_labels.append(labels)
-
-    spikes = torch.cat(all_spikes, dim=0)
-    labels = torch.cat(all_labels).long()
+    # Spike trains are read from memory-mapped files in shuffled minibatches, prefetched by worker processes.
+    dataset = SpikeDataset(path + '.spk', start=219 * 250, stop=239 * 250)
 
     n_input = 100 * 9
     n_hidden = 64
@@ -59,6 +48,7 @@ def main():
     model = RNN(batch_size, n_input, n_hidden, n_categories)
     criterion = nn.CrossEntropyLoss()
     optimizer = optim.Adam(model.parameters(), lr=0.001)
+    loader = dataset.loader(batch_size=batch_size, shuffle=True, num_workers=2, drop_last=True)
 
     def get_accuracy(logit, target, batch_size):
         corrects = (torch.max(logit, 1)[1].view(target.size()).data == target.data).sum()
@@ -70,12 +60,9 @@ def main():
         train_acc = 0.0
         model.train()
 
-        for j in range(spikes.size(0) // batch_size):
+        for j, (batch_spikes, batch_labels) in enumerate(loader):
             optimizer.zero_grad()
 
-            batch_indices = np.random.choice(np.arange(spikes.size(0)), size=batch_size, replace=False)
-            batch_spikes, batch_labels = spikes[batch_indices], labels[batch_indices]
-
             outputs = model(batch_spikes)
 
             loss = criterion(outputs, batch_labels)
@@ -2,23 +2,11 @@ import os
 import torch
 
 from tqdm import tqdm
+from experiments.evaluation import assign_patch_scores, patch_votes
 
 location = 'gpu' if torch.cuda.is_available() else 'cpu'
 
 
-def get_votes(spikes, scores):
-    votes = torch.zeros(10)
-    for j in range(9):
-        patch = spikes[j * 100:(j + 1) * 100]
-        max_spikes = torch.max(patch)
-        # print((patch == max_spikes).nonzero())
-        if max_spikes != 0:
-            selected_neuron_scores = scores[:, j*100 + (patch == max_spikes).nonzero()]
-            max_class = torch.max(selected_neuron_scores)
-            for index in (selected_neuron_scores == max_class).nonzero():
-                votes[index[0]] += 1
-    return votes
-
 def main():
     path = os.path.join('/media/bigdrive2/Devdhar/train')
 
@@ -28,24 +16,15 @@ def main():
     for i in tqdm(range(225, 240)):
         f = os.path.join(path, f'{i}.pt')
         spikes, labels = torch.load(f, map_location=location)
-        summed_spikes = torch.sum(spikes, dim=1)
-        for k, example in enumerate(summed_spikes):
-            for j in range(9):
-                patch = example[j*100:(j+1)*100]
-                max_spikes = torch.max(patch)
-                if max_spikes != 0:
-                    neuron_scores_per_class[int(labels[k]), j*100 + (patch == max_spikes).nonzero()] += 1
+        assign_patch_scores(spikes, labels, n_labels=10, n_patches=9, scores=neuron_scores_per_class)
 
     all_labels = torch.LongTensor()
     all_predictions = torch.LongTensor()
     for i in tqdm(range(225, 240)):
         f = os.path.join(path, f'{i}.pt')
         spikes, labels = torch.load(f, map_location=location)
-        summed_spikes = torch.sum(spikes, dim=1)
-        predictions = torch.zeros(summed_spikes.shape[0])
-        for k, example in enumerate(summed_spikes):
-            votes = get_votes(example, neuron_scores_per_class)
-            predictions[k] = torch.argmax(votes)
+        votes = patch_votes(spikes, neuron_scores_per_class, n_patches=9, n=1)
+        predictions = torch.argmax(votes, dim=1)
         all_labels = torch.cat([all_labels, labels.long()])
         all_predictions = torch.cat([all_predictions, predictions.long()])
 
@@ -60,11 +39,8 @@ def main():
     for i in tqdm(range(1, 40)):
         f = os.path.join(path, f'{i}.pt')
         spikes, labels = torch.load(f, map_location=location)
-        summed_spikes = torch.sum(spikes, dim=1)
-        predictions = torch.zeros(summed_spikes.shape[0])
-        for k, example in enumerate(summed_spikes):
-            votes = get_votes(example, neuron_scores_per_class)
-            predictions[k] = torch.argmax(votes)
+        votes = patch_votes(spikes, neuron_scores_per_class, n_patches=9, n=1)
+        predictions = torch.argmax(votes, dim=1)
         all_labels = torch.cat([all_labels, labels.long()])
         all_predictions = torch.cat([all_predictions, predictions.long()])
 
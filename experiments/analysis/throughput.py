@@ -0,0 +1,38 @@
+import os
+import argparse
+import pandas as pd
+
+from experiments import ROOT_DIR
+from experiments.utils import summarize_telemetry
+
+
+def main(data='mnist', model='crop_locally_connected', paths=None, output=None):
+    paths = paths if paths else [os.path.join(ROOT_DIR, 'telemetry', data, model)]
+
+    df = pd.DataFrame(summarize_telemetry(paths))
+    if df.empty:
+        print('No telemetry found in', ', '.join(paths))
+        return df
+
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 200):
+        print(df.drop(columns=['run']).set_index(df['run'].str.slice(0, 60)))
+
+        # Throughput per node, across all runs.
+        print()
+        print(df.groupby('host')[['examples_per_sec', 'steps_per_sec', 'max_rss_mb']].agg(['mean', 'min', 'max']))
+
+    if output is not None:
+        df.to_csv(output, index=False)
+
+    return df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data', type=str, default='mnist')
+    parser.add_argument('--model', type=str, default='crop_locally_connected')
+    parser.add_argument('--paths', type=str, nargs='*', default=None, help='telemetry files or directories')
+    parser.add_argument('--output', type=str, default=None, help='.csv file of the per-run summaries')
+    args = parser.parse_args()
+
+    main(data=args.data, model=args.model, paths=args.paths, output=args.output)
@@ -0,0 +1,258 @@
+import os
+import sys
+import json
+import socket
+import argparse
+import platform
+import importlib
+import numpy as np
+
+from datetime import datetime
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from experiments import ROOT_DIR
+
+history_path = os.path.join(ROOT_DIR, 'benchmark', 'history.jsonl')
+
+# Fingerprint fields that must agree for two runs' timings to be comparable.
+MACHINE_FIELDS = ('cpu', 'cores', 'threads', 'gpu')
+
+# Fields identifying a benchmark measurement within a run.
+KEY_FIELDS = ('case', 'n_neurons', 'density', 'time')
+
+
+def _cpu_model() -> str:
+    # Processor model name, from /proc/cpuinfo where available.
+    if os.path.isfile('/proc/cpuinfo'):
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+
+    return platform.processor() or platform.machine()
+
+
+def _version(module: str) -> Optional[str]:
+    try:
+        return getattr(importlib.import_module(module), '__version__', 'unknown')
+    except ImportError:
+        return None
+
+
+def fingerprint(gpu: bool = False) -> Dict:
+    # language=rst
+    """
+    Describes the machine and software a benchmark runs on.
+
+    :param gpu: Whether the benchmark runs on the GPU.
+    :return: Dictionary of CPU model, usable cores, torch threads, thread environment variables, GPU, host and the
+        Python, torch, numpy and bindsnet versions.
+    """
+    import torch
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    return {
+        'cpu': _cpu_model(),
+        'cores': cores,
+        'threads': torch.get_num_threads(),
+        'env': {var: os.environ.get(var) for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS') if var in os.environ},
+        'gpu': torch.cuda.get_device_name(0) if gpu and torch.cuda.is_available() else None,
+        'host': socket.gethostname(),
+        'python': platform.python_version(),
+        'torch': torch.__version__,
+        'numpy': np.__version__,
+        'bindsnet': _version('bindsnet'),
+    }
+
+
+def load_runs(path: str = history_path) -> List[Dict]:
+    # language=rst
+    """
+    Reads all benchmark runs recorded in a history file, oldest first.
+
+    :param path: History file (one JSON run per line).
+    :return: List of runs; each has ``id``, ``label``, ``date``, ``fingerprint`` and ``records``.
+    """
+    if not os.path.isfile(path):
+        return []
+
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_run(records: Sequence[Dict], label: Optional[str] = None, gpu: bool = False,
+               path: str = history_path) -> Dict:
+    # language=rst
+    """
+    Appends a benchmark run to the history, with the fingerprint of this machine.
+
+    :param records: Timing records, as returned by ``experiments.benchmark.micro.run_suite``.
+    :param label: Name of the run; e.g., a bindsnet version or commit.
+    :param gpu: Whether the benchmark ran on the GPU.
+    :param path: History file.
+    :return: The recorded run.
+    """
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+
+    runs = load_runs(path)
+    run = {
+        'id': runs[-1]['id'] + 1 if runs else 0, 'label': label, 'date': datetime.now().isoformat(timespec='seconds'),
+        'fingerprint': fingerprint(gpu), 'records': list(records)
+    }
+
+    # A single write of one line, so concurrent runs append whole lines.
+    with open(path, 'a') as f:
+        f.write(json.dumps(run) + '\n')
+
+    return run
+
+
+def find_run(runs: Sequence[Dict], ref: str) -> Dict:
+    # language=rst
+    """
+    Finds a run by id, by label (the latest run with that label), or as ``latest`` / ``previous``.
+
+    :param runs: Recorded runs, oldest first.
+    :param ref: Reference to a run.
+    :return: The run.
+    """
+    if not runs:
+        raise ValueError('No benchmark runs recorded.')
+
+    if ref == 'latest':
+        return runs[-1]
+    elif ref == 'previous':
+        if len(runs) < 2:
+            raise ValueError('Only one benchmark run recorded.')
+
+        return runs[-2]
+
+    for run in reversed(runs):
+        if run['label'] == ref or str(run['id']) == ref:
+            return run
+
+    raise ValueError(f'No benchmark run with id or label "{ref}".')
+
+
+def permutation_test(a: Sequence[float], b: Sequence[float], n_permutations: int = 10000,
+                     seed: int = 0) -> float:
+    # language=rst
+    """
+    One-sided permutation test of whether the times ``b`` are slower than the times ``a``, on the difference of mean
+    log-times (so the test is of a ratio of run times, and robust to their skew). Exact for small samples.
+
+    :param a: Baseline times.
+    :param b: New times.
+    :param n_permutations: Number of random permutations, if exact enumeration would need more.
+    :param seed: Seed of the random permutations.
+    :return: p-value.
+    """
+    x = np.log(np.concatenate([a, b]))
+    n = len(a)
+    observed = x[n:].mean() - x[:n].mean()
+
+    if len(x) <= 16:
+        indices = np.array(list(combinations(range(len(x)), len(b))))
+    else:
+        rng = np.random.RandomState(seed)
+        indices = np.array([rng.permutation(len(x))[:len(b)] for _ in range(n_permutations)])
+
+    # Mean of the "new" group for every relabeling, and of the rest.
+    new = x[indices].mean(1)
+    old = (x.sum() - new * len(b)) / n
+
+    return float(np.mean(new - old >= observed - 1e-12))
+
+
+def compare(old: Dict, new: Dict, alpha: float = 0.05, min_change: float = 0.05) -> List[Dict]:
+    # language=rst
+    """
+    Compares the measurements two runs have in common. A measurement regressed if it is significantly slower (one-sided
+    permutation test at level ``alpha``) by more than ``min_change`` of its median time.
+
+    :param old: Baseline run.
+    :param new: New run.
+    :param alpha: Significance level.
+    :param min_change: Smallest relative slowdown (or speed-up) to report.
+    :return: One row per common measurement, with the median times, their ratio, p-values and a ``status`` of
+        ``'slower'``, ``'faster'`` or ``''``.
+    """
+    baseline = {tuple(r[k] for k in KEY_FIELDS): r for r in old['records']}
+
+    rows = []
+    for r in new['records']:
+        key = tuple(r[k] for k in KEY_FIELDS)
+        if key not in baseline:
+            continue
+
+        a, b = baseline[key]['times'], r['times']
+        ratio = float(np.median(b) / np.median(a))
+        p_slower = permutation_test(a, b)
+        p_faster = permutation_test(b, a)
+
+        status = ''
+        if p_slower < alpha and ratio > 1 + min_change:
+            status = 'slower'
+        elif p_faster < alpha and ratio < 1 - min_change:
+            status = 'faster'
+
+        rows.append(dict(zip(KEY_FIELDS, key), old=float(np.median(a)), new=float(np.median(b)), ratio=ratio,
+                         p_slower=p_slower, p_faster=p_faster, status=status))
+
+    return rows
+
+
+def _describe(run: Dict) -> str:
+    f = run['fingerprint']
+    return f'run {run["id"]} ({run["label"] or "unlabeled"}, {run["date"]}): bindsnet {f["bindsnet"]}, ' \
+           f'torch {f["torch"]}, {f["cpu"]}, {f["cores"]} cores, {f["threads"]} threads'
+
+
+def main(old='previous', new='latest', alpha=0.05, min_change=0.05, path=history_path) -> Tuple[List[Dict], int]:
+    runs = load_runs(path)
+    old, new = find_run(runs, old), find_run(runs, new)
+
+    print('Baseline:', _describe(old))
+    print('New:     ', _describe(new))
+
+    differing = [k for k in MACHINE_FIELDS if old['fingerprint'][k] != new['fingerprint'][k]]
+    if differing:
+        print(f'Warning: the runs differ in {", ".join(differing)}; timings may not be comparable.')
+
+    rows = compare(old, new, alpha=alpha, min_change=min_change)
+
+    print()
+    print(f'{"case":24s} {"n":>7s} {"density":>7s} {"time":>6s} {"old (ms)":>10s} {"new (ms)":>10s} {"ratio":>6s} '
+          f'{"p":>7s}')
+    for row in rows:
+        p = row['p_faster'] if row['status'] == 'faster' else row['p_slower']
+        print(
+            f'{row["case"]:24s} {row["n_neurons"]:>7d} {row["density"]:>7g} {row["time"]:>6d} '
+            f'{row["old"] * 1e3:>10.2f} {row["new"] * 1e3:>10.2f} {row["ratio"]:>6.2f} {p:>7.4f} {row["status"]}'
+        )
+
+    regressions = sum(row['status'] == 'slower' for row in rows)
+    print()
+    print(f'{len(rows)} measurements compared; {regressions} significantly slower.')
+
+    return rows, regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('command', type=str, choices=['list', 'compare'])
+    parser.add_argument('--old', type=str, default='previous', help='baseline run: id, label, latest or previous')
+    parser.add_argument('--new', type=str, default='latest', help='new run: id, label, latest or previous')
+    parser.add_argument('--alpha', type=float, default=0.05, help='significance level')
+    parser.add_argument('--min_change', type=float, default=0.05, help='smallest relative change to flag')
+    parser.add_argument('--path', type=str, default=history_path, help='history file')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for run in load_runs(args.path):
+            print(_describe(run), f'[{len(run["records"])} measurements]')
+    else:
+        _, regressions = main(old=args.old, new=args.new, alpha=args.alpha, min_change=args.min_change, path=args.path)
+        sys.exit(1 if regressions else 0)
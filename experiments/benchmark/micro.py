@@ -0,0 +1,413 @@
+import json
+import torch
+import argparse
+import importlib.util
+import numpy as np
+
+from itertools import product
+from time import perf_counter
+from typing import Callable, Dict, List, Sequence
+
+from bindsnet.encoding import poisson, bernoulli
+from bindsnet.evaluation import assign_labels, all_activity, proportion_weighting
+from bindsnet.learning import PostPre
+from bindsnet.network import Network
+from bindsnet.network.monitors import Monitor
+from bindsnet.network.nodes import Input, LIFNodes, DiehlAndCookNodes
+from bindsnet.network.topology import Connection, Conv2dConnection, LocallyConnectedConnection
+
+from experiments.benchmark.history import record_run, history_path
+
+# Shape of the convolutional / locally-connected cases; their input is the largest square with at most n_neurons.
+KERNEL_SIZE = 8
+STRIDE = 4
+N_FILTERS = 25
+
+# Number of examples and labels of the evaluation readout cases.
+N_EXAMPLES = 250
+N_LABELS = 10
+
+
+def _weights(n_source: int, n_target: int, density: float) -> torch.Tensor:
+    # Uniform random weights with a fraction ``1 - density`` of them zeroed.
+    w = 0.3 * torch.rand(n_source, n_target)
+    if density < 1:
+        w *= (torch.rand(n_source, n_target) < density).float()
+
+    return w
+
+
+def _spikes(*shape: int, p: float = 0.05) -> torch.Tensor:
+    return (torch.rand(*shape) < p).float()
+
+
+def _side(n_neurons: int) -> int:
+    return max(int(np.sqrt(n_neurons)), KERNEL_SIZE)
+
+
+def _network(n_neurons: int, density: float, time: int, nodes: type, learning: bool) -> Callable:
+    network = Network(dt=1.0)
+    network.add_layer(Input(n=n_neurons, traces=learning), name='X')
+    network.add_layer(nodes(n=n_neurons, traces=learning), name='Y')
+    network.add_connection(
+        Connection(
+            source=network.layers['X'], target=network.layers['Y'], w=_weights(n_neurons, n_neurons, density),
+            update_rule=PostPre if learning else None, nu=[1e-4, 1e-2], wmin=0, wmax=1
+        ), source='X', target='Y'
+    )
+
+    inpts = {'X': poisson(datum=64 * torch.rand(n_neurons), time=time)}
+
+    def run():
+        network.run(inpts=inpts, time=time)
+        network.reset_()
+
+    return run
+
+
+def network_lif(n_neurons: int, density: float, time: int) -> Callable:
+    # ``Network.run`` of an input layer densely or sparsely connected to LIF neurons.
+    return _network(n_neurons, density, time, LIFNodes, learning=False)
+
+
+def network_diehl_and_cook(n_neurons: int, density: float, time: int) -> Callable:
+    # ``Network.run`` with adaptive-threshold neurons, as in the MNIST models.
+    return _network(n_neurons, density, time, DiehlAndCookNodes, learning=False)
+
+
+def network_postpre(n_neurons: int, density: float, time: int) -> Callable:
+    # ``Network.run`` with adaptive-threshold neurons and ``PostPre`` learning on the connection.
+    return _network(n_neurons, density, time, DiehlAndCookNodes, learning=True)
+
+
+def connection(n_neurons: int, density: float, time: int) -> Callable:
+    # ``time`` steps of ``Connection.compute``.
+    source, target = Input(n=n_neurons), LIFNodes(n=n_neurons)
+    conn = Connection(source=source, target=target, w=_weights(n_neurons, n_neurons, density))
+    s = _spikes(time, n_neurons)
+
+    def run():
+        for t in range(time):
+            conn.compute(s[t])
+
+    return run
+
+
+def conv2d_connection(n_neurons: int, density: float, time: int) -> Callable:
+    # ``time`` steps of ``Conv2dConnection.compute`` on the largest square image with at most ``n_neurons`` pixels.
+    side = _side(n_neurons)
+    conv = (side - KERNEL_SIZE) // STRIDE + 1
+    source = Input(n=side ** 2, shape=(1, 1, side, side))
+    target = LIFNodes(n=N_FILTERS * conv ** 2, shape=(1, N_FILTERS, conv, conv))
+    conn = Conv2dConnection(source, target, kernel_size=KERNEL_SIZE, stride=STRIDE)
+    s = _spikes(time, 1, 1, side, side)
+
+    def run():
+        for t in range(time):
+            conn.compute(s[t])
+
+    return run
+
+
+def local_connection(n_neurons: int, density: float, time: int) -> Callable:
+    # ``time`` steps of ``LocallyConnectedConnection.compute``, with the geometry of ``conv2d_connection``.
+    side = _side(n_neurons)
+    conv = (side - KERNEL_SIZE) // STRIDE + 1
+    source = Input(n=side ** 2)
+    target = LIFNodes(n=N_FILTERS * conv ** 2)
+    conn = LocallyConnectedConnection(
+        source, target, kernel_size=KERNEL_SIZE, stride=STRIDE, n_filters=N_FILTERS, input_shape=(side, side),
+        wmin=0.0, wmax=1.0
+    )
+    s = _spikes(time, side ** 2)
+
+    def run():
+        for t in range(time):
+            conn.compute(s[t])
+
+    return run
+
+
+def postpre(n_neurons: int, density: float, time: int) -> Callable:
+    # ``time`` ``PostPre`` weight updates of a connection with random spikes and traces.
+    source, target = Input(n=n_neurons, traces=True), LIFNodes(n=n_neurons, traces=True)
+    conn = Connection(
+        source=source, target=target, w=_weights(n_neurons, n_neurons, density), update_rule=PostPre,
+        nu=[1e-4, 1e-2], wmin=0, wmax=1
+    )
+    source.s, target.s = _spikes(n_neurons).byte(), _spikes(n_neurons).byte()
+    source.x, target.x = torch.rand(n_neurons), torch.rand(n_neurons)
+
+    def run():
+        for t in range(time):
+            conn.update(learning=True)
+
+    return run
+
+
+def poisson_encoding(n_neurons: int, density: float, time: int) -> Callable:
+    # Poisson encoding of an image with ``n_neurons`` pixels, as the MNIST scripts feed ``Network.run``.
+    datum = 64 * torch.rand(n_neurons)
+    return lambda: poisson(datum=datum, time=time)
+
+
+def bernoulli_encoding(n_neurons: int, density: float, time: int) -> Callable:
+    # Bernoulli encoding of an image with ``n_neurons`` pixels.
+    datum = torch.rand(n_neurons)
+    return lambda: bernoulli(datum=datum, time=time, dt=1.0)
+
+
+def monitor(n_neurons: int, density: float, time: int) -> Callable:
+    # ``time`` steps of ``Monitor.record`` of spikes and voltages.
+    layer = LIFNodes(n=n_neurons)
+    m = Monitor(layer, state_vars=['s', 'v'], time=time)
+
+    def run():
+        for t in range(time):
+            m.record()
+
+        m.reset_()
+
+    return run
+
+
+def evaluation(n_neurons: int, density: float, time: int) -> Callable:
+    # ``assign_labels``, ``all_activity`` and ``proportion_weighting`` on an update interval of spike counts.
+    spikes = torch.poisson(torch.rand(N_EXAMPLES, 1, n_neurons) * time / 100)
+    labels = torch.randint(N_LABELS, (N_EXAMPLES,))
+
+    def run():
+        assignments, proportions, rates = assign_labels(spikes, labels, N_LABELS)
+        all_activity(spikes, assignments, N_LABELS)
+        proportion_weighting(spikes, assignments, proportions, N_LABELS)
+
+    return run
+
+
+def brian2(n_neurons: int, density: float, time: int) -> Callable:
+    # Poisson input to conductance-based LIF neurons in BRIAN2's runtime mode.
+    import brian2 as b2
+
+    b2.set_device('runtime')
+    b2.defaultclock.dt = 1.0 * b2.ms
+
+    def run():
+        b2.start_scope()
+        eqs = '''
+            dv/dt = (ge * (-60 * mV) + (-74 * mV) - v) / (10 * ms) : volt
+            dge/dt = -ge / (5 * ms) : 1
+        '''
+        source = b2.PoissonGroup(n_neurons, rates=15 * b2.Hz)
+        target = b2.NeuronGroup(n_neurons, eqs, threshold='v > (-54 * mV)', reset='v = -60 * mV', method='exact')
+        synapses = b2.Synapses(source, target, 'w : 1')
+        synapses.connect(p=density)
+        synapses.w = 'rand() * 0.01'
+        b2.run(time * b2.ms)
+
+    return run
+
+
+def nest(n_neurons: int, density: float, time: int) -> Callable:
+    # Poisson generators driving integrate-and-fire neurons in NEST.
+    import nest as nt
+
+    def run():
+        nt.ResetKernel()
+        nt.SetKernelStatus({'local_num_threads': torch.get_num_threads(), 'resolution': 1.0})
+        neurons = nt.Create('iaf_psc_alpha', n_neurons)
+        noise = nt.Create('poisson_generator', n_neurons)
+        nt.SetStatus(noise, [{'rate': 60.0}])
+        nt.Connect(noise, neurons, {'rule': 'pairwise_bernoulli', 'p': density})
+        nt.Simulate(float(time))
+
+    return run
+
+
+def nengo(n_neurons: int, density: float, time: int) -> Callable:
+    # Two LIF ensembles with a random transform, in the reference Nengo simulator.
+    import nengo as ng
+
+    def run():
+        model = ng.Network()
+        with model:
+            x = ng.Ensemble(n_neurons, dimensions=1, neuron_type=ng.LIF())
+            y = ng.Ensemble(n_neurons, dimensions=1, neuron_type=ng.LIF())
+            ng.Connection(x.neurons, y.neurons, transform=_weights(n_neurons, n_neurons, density).numpy())
+
+        with ng.Simulator(model, progress_bar=False) as sim:
+            sim.run(time / 1000)
+
+    return run
+
+
+# Benchmark cases, and the grid axes each depends on; it is run once per value of the other axes.
+CASES = {
+    'network_lif': (network_lif, ('n_neurons', 'density', 'time')),
+    'network_diehl_and_cook': (network_diehl_and_cook, ('n_neurons', 'density', 'time')),
+    'network_postpre': (network_postpre, ('n_neurons', 'density', 'time')),
+    'connection': (connection, ('n_neurons', 'density', 'time')),
+    'conv2d_connection': (conv2d_connection, ('n_neurons', 'time')),
+    'local_connection': (local_connection, ('n_neurons', 'time')),
+    'postpre': (postpre, ('n_neurons', 'density', 'time')),
+    'poisson': (poisson_encoding, ('n_neurons', 'time')),
+    'bernoulli': (bernoulli_encoding, ('n_neurons', 'time')),
+    'monitor': (monitor, ('n_neurons', 'time')),
+    'evaluation': (evaluation, ('n_neurons',)),
+}
+
+# Other simulators, benchmarked only if installed.
+COMPETITORS = {
+    'brian2': (brian2, ('n_neurons', 'density', 'time')),
+    'nest': (nest, ('n_neurons', 'density', 'time')),
+    'nengo': (nengo, ('n_neurons', 'density', 'time')),
+}
+
+
+def installed_competitors() -> List[str]:
+    # language=rst
+    """
+    Names of the competitor simulators that can be imported.
+    """
+    return [name for name in COMPETITORS if importlib.util.find_spec(name) is not None]
+
+
+def measure(fn: Callable, warmup: int = 1, repeats: int = 5, gpu: bool = False) -> List[float]:
+    # language=rst
+    """
+    Times repeated calls of a function, after some untimed warm-up calls.
+
+    :param fn: Function to time.
+    :param warmup: Number of untimed calls (allocator, caches, lazy initialization).
+    :param repeats: Number of timed calls.
+    :param gpu: Whether to synchronize CUDA before reading the clock.
+    :return: Wall times of the timed calls, in seconds.
+    """
+    for _ in range(warmup):
+        fn()
+
+    times = []
+    for _ in range(repeats):
+        if gpu:
+            torch.cuda.synchronize()
+
+        start = perf_counter()
+        fn()
+        if gpu:
+            torch.cuda.synchronize()
+
+        times.append(perf_counter() - start)
+
+    return times
+
+
+def run_suite(cases: Sequence[str], n_neurons: Sequence[int] = (100, 1000, 5000),
+              densities: Sequence[float] = (0.1, 1.0), times: Sequence[int] = (100, 500), warmup: int = 1,
+              repeats: int = 5, gpu: bool = False) -> List[Dict]:
+    # language=rst
+    """
+    Runs benchmark cases over a grid of neuron counts, connection densities and simulation lengths.
+
+    :param cases: Names of cases in ``CASES`` or ``COMPETITORS``.
+    :param n_neurons: Layer sizes.
+    :param densities: Fractions of non-zero connection weights.
+    :param times: Simulation lengths, in time steps.
+    :param warmup: Number of untimed runs per grid point.
+    :param repeats: Number of timed runs per grid point.
+    :param gpu: Whether BindsNET cases run on the GPU.
+    :return: One record per case and grid point with the timing statistics (seconds). Errors of cases in ``CASES``
+        are raised; failing ``COMPETITORS`` grid points are reported and skipped.
+    """
+    defaults = {'n_neurons': n_neurons[0], 'density': densities[-1], 'time': times[0]}
+    records = []
+    for name in cases:
+        builder, axes = CASES[name] if name in CASES else COMPETITORS[name]
+        points = []
+        for point in product(n_neurons, densities, times):
+            point = {
+                axis: value if axis in axes else defaults[axis]
+                for axis, value in zip(('n_neurons', 'density', 'time'), point)
+            }
+            if point not in points:
+                points.append(point)
+
+        for point in points:
+            try:
+                fn = builder(**point)
+                elapsed = np.array(measure(fn, warmup=warmup, repeats=repeats, gpu=gpu and name in CASES))
+            except Exception as e:
+                # A broken BindsNET case is a bug in the suite; other simulators may fail for reasons of their own.
+                if name in CASES:
+                    raise
+
+                print(f'{name} {point}: failed ({type(e).__name__}: {e})')
+                continue
+
+            record = dict(
+                case=name, **point, repeats=repeats, mean=float(elapsed.mean()),
+                std=float(elapsed.std(ddof=1)) if repeats > 1 else 0.0, min=float(elapsed.min()),
+                median=float(np.median(elapsed)), times=elapsed.tolist()
+            )
+            records.append(record)
+            print(
+                f'{name:24s} n={point["n_neurons"]:<7d} density={point["density"]:<5g} time={point["time"]:<6d} '
+                f'{record["mean"] * 1e3:10.2f} ms ± {record["std"] * 1e3:.2f} (min {record["min"] * 1e3:.2f})'
+            )
+
+    return records
+
+
+def main(cases=None, n_neurons=(100, 1000, 5000), densities=(0.1, 1.0), times=(100, 500), warmup=1, repeats=5,
+         competitors=False, gpu=False, threads=None, output=None, record=False, label=None):
+    if threads is not None:
+        torch.set_num_threads(threads)
+
+    if gpu:
+        if torch.cuda.is_available():
+            torch.set_default_tensor_type('torch.cuda.FloatTensor')
+        else:
+            print('CUDA is not available; benchmarking on the CPU.')
+            gpu = False
+
+    cases = list(cases) if cases else list(CASES)
+    if competitors:
+        available = installed_competitors()
+        print(f'Competitor simulators installed: {", ".join(available) if available else "none"}.')
+        cases += [c for c in available if c not in cases]
+
+    records = run_suite(
+        cases, n_neurons=n_neurons, densities=densities, times=times, warmup=warmup, repeats=repeats, gpu=gpu
+    )
+
+    if output is not None:
+        with open(output, 'w') as f:
+            json.dump(records, f, indent=2)
+
+    if record:
+        run = record_run(records, label=label, gpu=gpu)
+        print(f'Recorded as benchmark run {run["id"]} in {history_path}.')
+
+    return records
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cases', type=str, nargs='+', default=None, choices=list(CASES) + list(COMPETITORS))
+    parser.add_argument('--n_neurons', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.1, 1.0])
+    parser.add_argument('--times', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--output', type=str, default=None, help='JSON file of the timing records')
+    parser.add_argument('--label', type=str, default=None, help='name of the run in the benchmark history')
+    parser.add_argument('--record', dest='record', action='store_true', help='append the run to the history')
+    parser.add_argument('--competitors', dest='competitors', action='store_true')
+    parser.add_argument('--gpu', dest='gpu', action='store_true')
+    parser.set_defaults(competitors=False, gpu=False, record=False)
+    args = parser.parse_args()
+
+    main(
+        cases=args.cases, n_neurons=args.n_neurons, densities=args.densities, times=args.times, warmup=args.warmup,
+        repeats=args.repeats, competitors=args.competitors, gpu=args.gpu, threads=args.threads, output=args.output,
+        record=args.record, label=args.label
+    )
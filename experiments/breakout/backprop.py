@@ -13,6 +13,8 @@ from bindsnet.network.topology import Connection
 from bindsnet.network.nodes import RealInput, IFNodes
 from bindsnet.analysis.plotting import plot_spikes, plot_weights
 
+from experiments.results import write_results
+
 
 # Parameters.
 parser = argparse.ArgumentParser()
@@ -282,19 +284,16 @@ to_write = params + results if train else test_params + results
 to_write = [str(x) for x in to_write]
 name = 'train.csv' if train else 'test.csv'
 
-if not os.path.isfile(os.path.join(results_path, name)):
-    with open(os.path.join(results_path, name), 'w') as f:
-        if train:
-            f.write(
-                'seed,n_train,time,lr,lr_decay,update_interval,wmin,wmax,norm,mean_accuracy,max_accuracy\n'
-            )
-        else:
-            f.write(
-                'seed,n_train,n_test,time,lr,lr_decay,update_interval,wmin,wmax,norm,mean_accuracy,max_accuracy\n'
-            )
-
-with open(os.path.join(results_path, name), 'a') as f:
-    f.write(','.join(to_write) + '\n')
+if train:
+    header = (
+        'seed,n_train,time,lr,lr_decay,update_interval,wmin,wmax,norm,mean_accuracy,max_accuracy\n'
+    )
+else:
+    header = (
+        'seed,n_train,n_test,time,lr,lr_decay,update_interval,wmin,wmax,norm,mean_accuracy,max_accuracy\n'
+    )
+
+write_results(results_path, name, header, to_write)
 
 # Compute confusion matrices and save them to disk.
 confusion = confusion_matrix(ground_truth, predictions)
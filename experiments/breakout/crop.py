@@ -17,6 +17,9 @@ from bindsnet.evaluation import update_ngram_scores, assign_labels
 from bindsnet.utils import get_square_weights, get_square_assignments
 from bindsnet.analysis.plotting import plot_spikes, plot_performance, plot_assignments, plot_weights, plot_input
 
+from experiments.results import write_results
+from experiments.utils import IntensityController
+
 sys.path.append('..')
 
 from utils import *
@@ -178,6 +181,9 @@ weights_im = None
 assigns_im = None
 perf_ax = None
 
+# Escalates input intensity during simulation of examples with too little output activity.
+controller = IntensityController(network, spikes['Ae'], time=time, dt=dt, encoder=bernoulli)
+
 start = t()
 for i in range(n_examples):
     if i % progress_interval == 0:
@@ -227,19 +233,9 @@ for i in range(n_examples):
 
     # Get next input sample.
     image = images[i % len(images)]
-    sample = bernoulli(datum=image, time=time, dt=dt)
-    inpts = {'X': sample}
-
-    # Run the network on the input.
-    network.run(inpts=inpts, time=time)
 
-    retries = 0
-    while spikes['Ae'].get('s').sum() < 5 and retries < 3:
-        retries += 1
-        image *= 2
-        sample = bernoulli(datum=image, time=time, dt=dt)
-        inpts = {'X': sample}
-        network.run(inpts=inpts, time=time)
+    # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+    controller.run(image)
 
     # Add to spikes recording.
     spike_record[i % update_interval] = spikes['Ae'].get('s').t()
@@ -247,7 +243,7 @@ for i in range(n_examples):
     # Optionally plot various simulation information.
     if plot:
         inpt = images[i % len(images)].view(50, 72)
-        reconstruction = inpts['X'].view(time, 50*72).sum(0).view(50, 72)
+        reconstruction = controller.sample.view(time, 50*72).sum(0).view(50, 72)
         _spikes = {layer: spikes[layer].get('s') for layer in spikes}
         input_exc_weights = network.connections[('X', 'Ae')].w
         square_weights = get_square_weights(input_exc_weights.view(50*72, n_neurons), n_sqrt, side=(50, 72))
@@ -317,23 +313,20 @@ to_write = [str(x) for x in to_write]
 
 name = 'train.csv' if train else 'test.csv'
 
-if not os.path.isfile(os.path.join(results_path, name)):
-    with open(os.path.join(results_path, name), 'w') as f:
-        if train:
-            f.write(
-                'random_seed,n_neurons,n_train,inhib,time,timestep,theta_plus,theta_decay,intensity,progress_interval,'
-                'update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,max_all_activity,'
-                'max_proportion_weighting,max_ngram\n'
-            )
-        else:
-            f.write(
-                'random_seed,n_neurons,n_train,n_test,inhib,time,timestep,theta_plus,theta_decay,intensity,'
-                'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,'
-                'max_all_activity,max_proportion_weighting,max_ngram\n'
-            )
-
-with open(os.path.join(results_path, name), 'a') as f:
-    f.write(','.join(to_write) + '\n')
+if train:
+    header = (
+        'random_seed,n_neurons,n_train,inhib,time,timestep,theta_plus,theta_decay,intensity,progress_interval,'
+        'update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,max_all_activity,'
+        'max_proportion_weighting,max_ngram\n'
+    )
+else:
+    header = (
+        'random_seed,n_neurons,n_train,n_test,inhib,time,timestep,theta_plus,theta_decay,intensity,'
+        'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,'
+        'max_all_activity,max_proportion_weighting,max_ngram\n'
+    )
+
+write_results(results_path, name, header, to_write)
 
 while labels.numel() < n_examples:
     if 2 * labels.numel() > n_examples:
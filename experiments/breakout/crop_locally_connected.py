@@ -16,6 +16,10 @@ from bindsnet.models import LocallyConnectedNetwork
 from bindsnet.evaluation import update_ngram_scores, assign_labels
 from bindsnet.analysis.plotting import plot_spikes, plot_performance, plot_input, plot_locally_connected_weights
 
+from experiments.results import write_results
+from experiments.prepared_data import load
+from experiments.utils import IntensityController
+
 sys.path.append('..')
 
 from utils import *
@@ -77,7 +81,6 @@ model = 'crop_locally_connected'
 data = 'breakout'
 
 top_level = os.path.join('..', '..')
-data_path = os.path.join(top_level, 'data', 'Breakout')
 params_path = os.path.join(top_level, 'params', data, model)
 curves_path = os.path.join(top_level, 'curves', data, model)
 results_path = os.path.join(top_level, 'results', data, model)
@@ -135,27 +138,18 @@ conv_size = network.connections[('X', 'Y')].conv_size
 locations = network.connections[('X', 'Y')].locations
 n_neurons = n_filters * np.prod(conv_size)
 
-# Load Breakout data.
-images = torch.load(os.path.join(data_path, 'frames.pt'), map_location=torch.device(device))
-labels = torch.load(os.path.join(data_path, 'labels.pt'), map_location=torch.device(device))
-images = images[:, 30:, 4:-4].contiguous().view(-1, 50*72)  # Crop out the borders of the frames.
+# Load Breakout data, cropping out the borders of the frames lazily as examples are read.
+images, labels = load(data, 'train', crop=(30, 0, 4, 4), device=device)
 
 # Randomly sample n_examples examples, with n_examples / 4 per class.
-_images = torch.Tensor().float()
-_labels = torch.Tensor().long()
-for i in range(4):
-    indices = np.where(labels == i)[0]
-    indices = np.random.choice(indices, size=per_class, replace=True)
-    _images = torch.cat([_images, images[indices]])
-    _labels = torch.cat([_labels, labels[indices]])
-
-images = _images
-labels = _labels
+indices = np.concatenate([
+    np.random.choice(np.where(labels.cpu() == i)[0], size=per_class, replace=True) for i in range(4)
+])
 
 # Randomly permute the data.
-permutation = torch.randperm(images.size(0))
-images = images[permutation]
-labels = labels[permutation]
+indices = indices[torch.randperm(len(indices)).cpu().numpy()]
+images = images.take(indices)
+labels = labels[torch.from_numpy(indices).to(device)]
 
 # Record spikes during the simulation.
 spike_record = torch.zeros(update_interval, time, n_neurons)
@@ -196,6 +190,9 @@ weights_im = None
 assigns_im = None
 perf_ax = None
 
+# Escalates input intensity during simulation of examples with too little output activity.
+controller = IntensityController(network, spikes['Y'], time=time, dt=dt, encoder=bernoulli)
+
 start = t()
 for i in range(n_examples):
     if i % progress_interval == 0:
@@ -244,20 +241,10 @@ for i in range(n_examples):
         print()
 
     # Get next input sample.
-    image = images[i % len(images)]
-    sample = bernoulli(datum=image, time=time, dt=dt)
-    inpts = {'X': sample}
+    image = images[i % len(images)].view(-1)
 
-    # Run the network on the input.
-    network.run(inpts=inpts, time=time)
-
-    retries = 0
-    while spikes['Y'].get('s').sum() < 5 and retries < 3:
-        retries += 1
-        image *= 2
-        sample = bernoulli(datum=image, time=time, dt=dt)
-        inpts = {'X': sample}
-        network.run(inpts=inpts, time=time)
+    # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+    controller.run(image)
 
     # Add to spikes recording.
     spike_record[i % update_interval] = spikes['Y'].get('s').t()
@@ -265,7 +252,7 @@ for i in range(n_examples):
     # Optionally plot various simulation information.
     if plot:
         inpt = images[i % len(images)].view(50, 72)
-        reconstruction = inpts['X'].view(time, 50 * 72).sum(0).view(50, 72)
+        reconstruction = controller.sample.view(time, 50 * 72).sum(0).view(50, 72)
         _spikes = {layer: spikes[layer].get('s') for layer in spikes}
         input_exc_weights = network.connections[('X', 'Y')].w
 
@@ -333,25 +320,22 @@ to_write = params + results if train else test_params + results
 to_write = [str(x) for x in to_write]
 name = 'train.csv' if train else 'test.csv'
 
-if not os.path.isfile(os.path.join(results_path, name)):
-    with open(os.path.join(results_path, name), 'w') as f:
-        if train:
-            f.write(
-                'random_seed,vertical_kernel_size,horizontal_kernel_size,vertical_stride,horizontal_stride,n_filters,'
-                'n_train,inhib,time,timestep,theta_plus,theta_decay,norm,intensity,'
-                'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,'
-                'max_all_activity,max_proportion_weighting,max_ngram\n'
-            )
-        else:
-            f.write(
-                'random_seed,vertical_kernel_size,horizontal_kernel_size,vertical_stride,horizontal_stride,n_filters,'
-                'n_train,n_test,inhib,time,timestep,theta_plus,theta_decay,norm,intensity,'
-                'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,'
-                'max_all_activity,max_proportion_weighting,max_ngram\n'
-            )
-
-with open(os.path.join(results_path, name), 'a') as f:
-    f.write(','.join(to_write) + '\n')
+if train:
+    header = (
+        'random_seed,vertical_kernel_size,horizontal_kernel_size,vertical_stride,horizontal_stride,n_filters,'
+        'n_train,inhib,time,timestep,theta_plus,theta_decay,norm,intensity,'
+        'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,'
+        'max_all_activity,max_proportion_weighting,max_ngram\n'
+    )
+else:
+    header = (
+        'random_seed,vertical_kernel_size,horizontal_kernel_size,vertical_stride,horizontal_stride,n_filters,'
+        'n_train,n_test,inhib,time,timestep,theta_plus,theta_decay,norm,intensity,'
+        'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,'
+        'max_all_activity,max_proportion_weighting,max_ngram\n'
+    )
+
+write_results(results_path, name, header, to_write)
 
 while labels.numel() < n_examples:
     if 2 * labels.numel() > n_examples:
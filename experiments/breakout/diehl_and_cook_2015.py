@@ -15,6 +15,9 @@ from bindsnet.evaluation import update_ngram_scores, assign_labels
 from bindsnet.utils import get_square_weights, get_square_assignments
 from bindsnet.analysis.plotting import plot_spikes, plot_performance, plot_assignments, plot_weights, plot_input
 
+from experiments.results import write_results
+from experiments.utils import IntensityController
+
 sys.path.append('..')
 
 from utils import *
@@ -163,6 +166,9 @@ weights_im = None
 assigns_im = None
 perf_ax = None
 
+# Escalates input intensity during simulation of examples with too little output activity.
+controller = IntensityController(network, spikes['Ae'], time=time, dt=dt, encoder=bernoulli)
+
 start = t()
 for i in range(n_examples):
     if i % progress_interval == 0:
@@ -212,19 +218,9 @@ for i in range(n_examples):
 
     # Get next input sample.
     image = images[i]
-    sample = bernoulli(datum=image, time=time, dt=dt)
-    inpts = {'X': sample}
-
-    # Run the network on the input.
-    network.run(inpts=inpts, time=time)
 
-    retries = 0
-    while spikes['Ae'].get('s').sum() < 5 and retries < 3:
-        retries += 1
-        image *= 2
-        sample = bernoulli(datum=image, time=time, dt=dt)
-        inpts = {'X': sample}
-        network.run(inpts=inpts, time=time)
+    # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+    controller.run(image)
 
     # Add to spikes recording.
     spike_record[i % update_interval] = spikes['Ae'].get('s').t()
@@ -232,7 +228,7 @@ for i in range(n_examples):
     # Optionally plot various simulation information.
     if plot:
         inpt = images[i].view(80, 80)
-        reconstruction = inpts['X'].view(time, 6400).sum(0).view(80, 80)
+        reconstruction = controller.sample.view(time, 6400).sum(0).view(80, 80)
         _spikes = {layer: spikes[layer].get('s') for layer in spikes}
         input_exc_weights = network.connections[('X', 'Ae')].w
         square_weights = get_square_weights(input_exc_weights.view(6400, n_neurons), n_sqrt, 80)
@@ -305,22 +301,19 @@ if train:
 else:
     name = 'test.csv'
 
-if not os.path.isfile(os.path.join(results_path, name)):
-    with open(os.path.join(results_path, name), 'w') as f:
-        if train:
-            f.write(
-                'random_seed,n_neurons,n_train,inhib,time,timestep,theta_plus,theta_decay,intensity,progress_interval,'
-                'update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,max_all_activity,'
-                'max_proportion_weighting,max_ngram\n'
-            )
-        else:
-            f.write(
-                'random_seed,n_neurons,n_train,n_test,inhib,time,timestep,theta_plus,theta_decay,intensity,'
-                'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,'
-                'max_all_activity,max_proportion_weighting,max_ngram\n'
-            )
-
-with open(os.path.join(results_path, name), 'a') as f:
-    f.write(','.join(to_write) + '\n')
+if train:
+    header = (
+        'random_seed,n_neurons,n_train,inhib,time,timestep,theta_plus,theta_decay,intensity,progress_interval,'
+        'update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,max_all_activity,'
+        'max_proportion_weighting,max_ngram\n'
+    )
+else:
+    header = (
+        'random_seed,n_neurons,n_train,n_test,inhib,time,timestep,theta_plus,theta_decay,intensity,'
+        'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,'
+        'max_all_activity,max_proportion_weighting,max_ngram\n'
+    )
+
+write_results(results_path, name, header, to_write)
 
 print()
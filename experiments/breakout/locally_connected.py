@@ -17,6 +17,9 @@ from bindsnet.evaluation import update_ngram_scores, assign_labels
 from bindsnet.analysis.plotting import plot_spikes, plot_performance, plot_assignments, plot_weights, plot_input, \
     plot_locally_connected_weights
 
+from experiments.results import write_results
+from experiments.utils import IntensityController
+
 sys.path.append('..')
 
 from utils import *
@@ -205,6 +208,9 @@ weights_im = None
 assigns_im = None
 perf_ax = None
 
+# Escalates input intensity during simulation of examples with too little output activity.
+controller = IntensityController(network, spikes['Y'], time=time, dt=dt, encoder=bernoulli)
+
 start = t()
 for i in range(n_examples):
     if i % progress_interval == 0:
@@ -254,19 +260,9 @@ for i in range(n_examples):
 
     # Get next input sample.
     image = images[i % len(images)]
-    sample = bernoulli(datum=image, time=time, dt=dt)
-    inpts = {'X': sample}
-
-    # Run the network on the input.
-    network.run(inpts=inpts, time=time)
 
-    retries = 0
-    while spikes['Y'].get('s').sum() < 5 and retries < 3:
-        retries += 1
-        image *= 2
-        sample = bernoulli(datum=image, time=time, dt=dt)
-        inpts = {'X': sample}
-        network.run(inpts=inpts, time=time)
+    # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+    controller.run(image)
 
     # Add to spikes recording.
     spike_record[i % update_interval] = spikes['Y'].get('s').t()
@@ -274,7 +270,7 @@ for i in range(n_examples):
     # Optionally plot various simulation information.
     if plot:
         inpt = images[i % len(images)].view(80, 80)
-        reconstruction = inpts['X'].view(time, 80 ** 2).sum(0).view(80, 80)
+        reconstruction = controller.sample.view(time, 80 ** 2).sum(0).view(80, 80)
         _spikes = {layer: spikes[layer].get('s') for layer in spikes}
         input_exc_weights = network.connections[('X', 'Y')].w
 
@@ -343,25 +339,22 @@ to_write = [str(x) for x in to_write]
 
 name = 'train.csv' if train else 'test.csv'
 
-if not os.path.isfile(os.path.join(results_path, name)):
-    with open(os.path.join(results_path, name), 'w') as f:
-        if train:
-            f.write(
-                'random_seed,vertical_kernel_size,horizontal_kernel_size,vertical_stride,horizontal_stride,n_filters,'
-                'n_train,inhib,time,timestep,theta_plus,theta_decay,norm,intensity,'
-                'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,'
-                'max_all_activity,max_proportion_weighting,max_ngram\n'
-            )
-        else:
-            f.write(
-                'random_seed,vertical_kernel_size,horizontal_kernel_size,vertical_stride,horizontal_stride,n_filters,'
-                'n_train,n_test,inhib,time,timestep,theta_plus,theta_decay,norm,intensity,'
-                'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,'
-                'max_all_activity,max_proportion_weighting,max_ngram\n'
-            )
-
-with open(os.path.join(results_path, name), 'a') as f:
-    f.write(','.join(to_write) + '\n')
+if train:
+    header = (
+        'random_seed,vertical_kernel_size,horizontal_kernel_size,vertical_stride,horizontal_stride,n_filters,'
+        'n_train,inhib,time,timestep,theta_plus,theta_decay,norm,intensity,'
+        'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,'
+        'max_all_activity,max_proportion_weighting,max_ngram\n'
+    )
+else:
+    header = (
+        'random_seed,vertical_kernel_size,horizontal_kernel_size,vertical_stride,horizontal_stride,n_filters,'
+        'n_train,n_test,inhib,time,timestep,theta_plus,theta_decay,norm,intensity,'
+        'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,mean_ngram,'
+        'max_all_activity,max_proportion_weighting,max_ngram\n'
+    )
+
+write_results(results_path, name, header, to_write)
 
 while labels.numel() < n_examples:
     if 2 * labels.numel() > n_examples:
@@ -11,6 +11,9 @@ sys.path.append('..')
 
 from utils import print_results, update_curves
 
+from experiments import ROOT_DIR
+from experiments.results import write_results
+
 from bindsnet.datasets import CIFAR10
 from bindsnet.network import Network
 from bindsnet.learning import Hebbian
@@ -362,9 +365,7 @@ f = '_'.join(to_write) + '.pt'
 torch.save((curves, update_interval, n_examples), open(os.path.join(path, f), 'wb'))
 
 # Save results to disk.
-path = os.path.join('..', '..', 'results', data, model)
-if not os.path.isdir(path):
-    os.makedirs(path)
+results_path = os.path.join(ROOT_DIR, 'results', data, model)
 
 results = [
     np.mean(curves['all']), np.mean(curves['proportion']), np.mean(curves['ngram']),
@@ -380,28 +381,23 @@ to_write = [str(x) for x in to_write]
 
 name = 'train.csv' if train else 'test.csv'
 
-if not os.path.isfile(os.path.join(path, name)):
-    with open(os.path.join(path, name), 'w') as f:
-        if train:
-            columns = [
-                'seed', 'n_train', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time', 'dt',
-                'intensity', 'update_interval', 'mean_all_activity', 'mean_proportion_weighting',
-                'mean_ngram', 'max_all_activity', 'max_proportion_weighting', 'max_ngram'
-            ]
-
-            header = ','.join(columns) + '\n'
-            f.write(header)
-        else:
-            columns = [
-                'seed', 'n_train', 'n_test', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time',
-                'dt', 'intensity', 'update_interval', 'mean_all_activity', 'mean_proportion_weighting',
-                'mean_ngram', 'max_all_activity', 'max_proportion_weighting', 'max_ngram'
-            ]
+if train:
+    columns = [
+        'seed', 'n_train', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time', 'dt',
+        'intensity', 'update_interval', 'mean_all_activity', 'mean_proportion_weighting',
+        'mean_ngram', 'max_all_activity', 'max_proportion_weighting', 'max_ngram'
+    ]
+
+    header = ','.join(columns) + '\n'
+else:
+    columns = [
+        'seed', 'n_train', 'n_test', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time',
+        'dt', 'intensity', 'update_interval', 'mean_all_activity', 'mean_proportion_weighting',
+        'mean_ngram', 'max_all_activity', 'max_proportion_weighting', 'max_ngram'
+    ]
 
-            header = ','.join(columns) + '\n'
-            f.write(header)
+    header = ','.join(columns) + '\n'
 
-with open(os.path.join(path, name), 'a') as f:
-    f.write(','.join(to_write) + '\n')
+write_results(results_path, name, header, to_write)
 
 print()
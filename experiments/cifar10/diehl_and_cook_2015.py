@@ -8,7 +8,6 @@ import matplotlib.pyplot as plt
 from time import time as t
 
 from bindsnet.datasets import CIFAR10
-from bindsnet.encoding import poisson
 from bindsnet.network import load_network
 from bindsnet.models import DiehlAndCook2015
 from bindsnet.network.monitors import Monitor
@@ -20,6 +19,10 @@ sys.path.append('..')
 
 from utils import *
 
+from experiments import ROOT_DIR
+from experiments.results import write_results
+from experiments.utils import IntensityController
+
 parser = argparse.ArgumentParser()
 parser.add_argument('--seed', type=int, default=0)
 parser.add_argument('--n_neurons', type=int, default=100)
@@ -161,6 +164,9 @@ if train:
 else:
     print('\nBegin test.\n')
 
+# Escalates input intensity during simulation of examples with too little output activity.
+controller = IntensityController(network, spikes['Ae'], time=time, dt=dt)
+
 start = t()
 for i in range(n_examples):
     if i % progress_interval == 0:
@@ -209,19 +215,9 @@ for i in range(n_examples):
 
     # Get next input sample.
     image = images[i]
-    sample = poisson(datum=image, time=time, dt=dt)
-    inpts = {'X' : sample}
-
-    # Run the network on the input.
-    network.run(inpts=inpts, time=time)
 
-    retries = 0
-    while spikes['Ae'].get('s').sum() < 5 and retries < 3:
-        retries += 1
-        image *= 2
-        sample = poisson(datum=image, time=time, dt=dt)
-        inpts = {'X' : sample}
-        network.run(inpts=inpts, time=time)
+    # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+    controller.run(image)
 
     # Get voltage recording.
     exc_voltages = exc_voltage_monitor.get('v')
@@ -234,7 +230,7 @@ for i in range(n_examples):
     if plot:
         image = image.view(32, 32, 3) / intensity
         image /= image.max()
-        inpt = 255 - sample.view(time, 3*32*32).sum(0).view(32, 32, 3).sum(2).float()
+        inpt = 255 - controller.sample.view(time, 3*32*32).sum(0).view(32, 32, 3).sum(2).float()
         weights = network.connections[('X', 'Ae')].w.view(32, 32, 3, n_neurons)
         weights = weights.sum(2).view(32 * 32, n_neurons)
             
@@ -316,9 +312,7 @@ f = '_'.join(to_write) + '.pt'
 torch.save((curves, update_interval, n_examples), open(os.path.join(path, f), 'wb'))
 
 # Save results to disk.
-path = os.path.join('..', '..', 'results', data, model)
-if not os.path.isdir(path):
-    os.makedirs(path)
+results_path = os.path.join(ROOT_DIR, 'results', data, model)
 
 results = [np.mean(curves['all']),
            np.mean(curves['proportion']),
@@ -339,24 +333,21 @@ if train:
 else:
     name = 'test.csv'
 
-if not os.path.isfile(os.path.join(path, name)):
-    with open(os.path.join(path, name), 'w') as f:
-        if train:
-            f.write('random_seed,n_neurons,n_train,excite,' + \
-                    'inhib,time,timestep,theta_plus,theta_decay,' + \
-                    'intensity,progress_interval,update_interval,' + \
-                    'X_Ae_decay,mean_all_activity,' + \
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,' + \
-                    'max_proportion_weighting,max_ngram\n')
-        else:
-            f.write('random_seed,n_neurons,n_train,n_test,excite,' + \
-                    'inhib,time,timestep,theta_plus,theta_decay,' + \
-                    'intensity,progress_interval,update_interval,' + \
-                    'X_Ae_decay,mean_all_activity,' + \
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,' + \
-                    'max_proportion_weighting,max_ngram\n')
-
-with open(os.path.join(path, name), 'a') as f:
-    f.write(','.join(to_write) + '\n')
+if train:
+    header = ('random_seed,n_neurons,n_train,excite,' + \
+              'inhib,time,timestep,theta_plus,theta_decay,' + \
+              'intensity,progress_interval,update_interval,' + \
+              'X_Ae_decay,mean_all_activity,' + \
+              'mean_proportion_weighting,mean_ngram,max_all_activity,' + \
+              'max_proportion_weighting,max_ngram\n')
+else:
+    header = ('random_seed,n_neurons,n_train,n_test,excite,' + \
+              'inhib,time,timestep,theta_plus,theta_decay,' + \
+              'intensity,progress_interval,update_interval,' + \
+              'X_Ae_decay,mean_all_activity,' + \
+              'mean_proportion_weighting,mean_ngram,max_all_activity,' + \
+              'max_proportion_weighting,max_ngram\n')
+
+write_results(results_path, name, header, to_write)
 
 print()
@@ -12,6 +12,10 @@ sys.path.append('..')
 
 from utils import *
 
+from experiments import ROOT_DIR
+from experiments.results import write_results
+from experiments.utils import IntensityController
+
 print()
 
 parser = argparse.ArgumentParser()
@@ -185,6 +189,9 @@ if train:
 else:
     print('\nBegin test.\n')
 
+# Escalates input intensity during simulation of examples with too little output activity.
+controller = IntensityController(network, spikes['Y'], time=time, dt=dt)
+
 start = t()
 for i in range(n_examples):
     if i % progress_interval == 0:
@@ -230,21 +237,11 @@ for i in range(n_examples):
 
     # Get next input sample.
     image = images[i].view(-1)
-    sample = poisson(datum=image, time=time, dt=dt)
-    inpts = {'X' : sample}
 
-    # Run the network on the input.
-    network.run(inpts=inpts, time=time)
-    network.connections[('X', 'Y')].w.masked_fill_(mask, 0)
+    # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+    controller.run(image)
 
-    retries = 0
-    while spikes['Y'].get('s').sum() < 5 and retries < 3:
-        retries += 1
-        image *= 2
-        sample = poisson(datum=image, time=time, dt=dt)
-        inpts = {'X' : sample}
-        network.run(inpts=inpts, time=time)
-        network.connections[('X', 'Y')].w.masked_fill_(mask, 0)
+    network.connections[('X', 'Y')].w.masked_fill_(mask, 0)
 
     # Add to spikes recording.
     spike_record[i % update_interval] = spikes['Y'].get('s').t()
@@ -252,7 +249,7 @@ for i in range(n_examples):
     if plot:
         image = image.view(32, 32, 3) / intensity
         image /= image.max()
-        inpt = 255 - sample.view(time, 3*32*32).sum(0).view(32, 32, 3).sum(2).float()
+        inpt = 255 - controller.sample.view(time, 3*32*32).sum(0).view(32, 32, 3).sum(2).float()
         weights = conv_conn.w.view(32, 32, 3, -1).mean(2).view(32 * 32, -1)
         _spikes = {'X' : spikes['X'].get('s').view(input_layer.n, time),
                    'Y' : spikes['Y'].get('s').view(n_filters * conv_size ** 2, time)}
@@ -337,9 +334,7 @@ f = '_'.join(to_write) + '.pt'
 torch.save((curves, update_interval, n_examples), open(os.path.join(path, f), 'wb'))
 
 # Save results to disk.
-path = os.path.join('..', '..', 'results', data, model)
-if not os.path.isdir(path):
-    os.makedirs(path)
+results_path = os.path.join(ROOT_DIR, 'results', data, model)
 
 results = [np.mean(curves['all']),
            np.mean(curves['proportion']),
@@ -360,24 +355,21 @@ if train:
 else:
     name = 'test.csv'
 
-if not os.path.isfile(os.path.join(path, name)):
-    with open(os.path.join(path, name), 'w') as f:
-        if train:
-            f.write('random_seed,kernel_size,stride,n_filters,' + \
-                    'n_train,inhib,time,timestep,' + \
-                    'theta_plus,theta_decay,intensity,' + \
-                    'progress_interval,update_interval,mean_all_activity,' + \
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,' + \
-                    'max_proportion_weighting,max_ngram\n')
-        else:
-            f.write('random_seed,kernel_size,stride,n_filters,' + \
-                    'n_train,n_test,inhib,time,timestep,' + \
-                    'theta_plus,theta_decay,intensity,' + \
-                    'progress_interval,update_interval,mean_all_activity,' + \
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,' + \
-                    'max_proportion_weighting,max_ngram\n')
-
-with open(os.path.join(path, name), 'a') as f:
-    f.write(','.join(to_write) + '\n')
+if train:
+    header = ('random_seed,kernel_size,stride,n_filters,' + \
+              'n_train,inhib,time,timestep,' + \
+              'theta_plus,theta_decay,intensity,' + \
+              'progress_interval,update_interval,mean_all_activity,' + \
+              'mean_proportion_weighting,mean_ngram,max_all_activity,' + \
+              'max_proportion_weighting,max_ngram\n')
+else:
+    header = ('random_seed,kernel_size,stride,n_filters,' + \
+              'n_train,n_test,inhib,time,timestep,' + \
+              'theta_plus,theta_decay,intensity,' + \
+              'progress_interval,update_interval,mean_all_activity,' + \
+              'mean_proportion_weighting,mean_ngram,max_all_activity,' + \
+              'max_proportion_weighting,max_ngram\n')
+
+write_results(results_path, name, header, to_write)
 
 print()
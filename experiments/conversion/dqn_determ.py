@@ -13,6 +13,7 @@ from bindsnet.conversion import ann_to_snn
 from bindsnet.environment import GymEnvironment
 from bindsnet.network.monitors import Monitor
 from bindsnet.analysis.plotting import plot_spikes, plot_input
+from experiments.input_sources import ConstantSource
 
 if torch.cuda.is_available():
     torch.set_default_tensor_type('torch.cuda.FloatTensor')
@@ -177,9 +178,9 @@ def main(seed=0, time=50, n_episodes=25, percentile=99.9, plot=False):
 
         encoded_state = torch.tensor([0.25, 0.5, 0.75, 1]) * state
         encoded_state = torch.sum(encoded_state, dim=2)
-        encoded_state = encoded_state.view([1, -1]).repeat(time, 1)
+        encoded_state = encoded_state.view(-1)
 
-        inpts = {'Input': encoded_state}
+        inpts = {'Input': ConstantSource(encoded_state, time)}
         SNN.run(inpts=inpts, time=time)
 
         spikes = {layer: SNN.monitors[layer].get('s') for layer in SNN.monitors}
@@ -220,7 +221,7 @@ def main(seed=0, time=50, n_episodes=25, percentile=99.9, plot=False):
 
         if plot:
             # Get voltage recording.
-            inpt = encoded_state.view(time, 6400).sum(0).view(80, 80)
+            inpt = time * encoded_state.view(80, 80)
             spike_ims, spike_axes = plot_spikes(
                 {layer: spikes[layer] for layer in spikes}, ims=spike_ims, axes=spike_axes
             )
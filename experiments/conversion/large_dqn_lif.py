@@ -3,7 +3,6 @@ import sys
 import argparse
 import itertools
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 
 from time import time as t_
@@ -24,7 +23,9 @@ from typing import Union, Sequence, Optional, Tuple, Dict
 
 
 from experiments import ROOT_DIR
+from experiments.results import write_results
 from experiments.misc.atari_wrappers import make_atari, wrap_deepmind
+from experiments.input_sources import ConstantSource
 
 
 if torch.cuda.is_available():
@@ -446,9 +447,7 @@ def main(seed=0, time=250, n_snn_episodes=1, epsilon=0.05, plot=False, parameter
 
             sys.stdout.flush()
 
-            state = state.repeat(time, 1, 1, 1, 1)
-
-            inpts = {'Input': state.float() / 255.0}
+            inpts = {'Input': ConstantSource(state.float() / 255.0, time)}
 
             SNN.run(inpts=inpts, time=time)
 
@@ -467,7 +466,7 @@ def main(seed=0, time=250, n_snn_episodes=1, epsilon=0.05, plot=False, parameter
 
             if plot:
                 # Get voltage recording.
-                inpt = state.view(time, 4, 84, 84).sum(0).sum(0).view(84, 84)
+                inpt = time * state.view(4, 84, 84).sum(0)
                 spike_ims, spike_axes = plot_spikes(
                     {layer: spikes[layer] for layer in spikes}, ims=spike_ims, axes=spike_axes
                 )
@@ -496,21 +495,13 @@ def main(seed=0, time=250, n_snn_episodes=1, epsilon=0.05, plot=False, parameter
         seed, time, n_snn_episodes, np.mean(rewards), parameter1, parameter2, parameter3, parameter4, parameter5
     ]]
 
-    path = os.path.join(results_path, 'results.csv')
-    if not os.path.isfile(path):
-        df = pd.DataFrame(data=data, index=[model_name], columns=columns)
-    else:
-        df = pd.read_csv(path, index_col=0)
-
-        if model_name not in df.index:
-            df = df.append(pd.DataFrame(data=data, index=[model_name], columns=columns))
-        else:
-            df.loc[model_name] = data[0]
-
-    df.to_csv(path, index=True)
+    # Many evaluations may finish at once under the PSO driver; the results store serializes their writes.
+    write_results(results_path, 'results.csv', ','.join(['model_name'] + columns), [model_name] + data[0])
 
     torch.save(rewards, os.path.join(results_path, f'{model_name}_episode_rewards.pt'))
 
+    return np.mean(rewards)
+
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(prefix_chars='@')
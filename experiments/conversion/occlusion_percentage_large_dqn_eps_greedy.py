@@ -18,6 +18,7 @@ from bindsnet.network.nodes import LIFNodes, IFNodes
 
 from experiments import ROOT_DIR
 from experiments.misc.atari_wrappers import make_atari, wrap_deepmind
+from experiments.input_sources import ConstantSource
 
 
 if torch.cuda.is_available():
@@ -208,8 +209,7 @@ def main(seed=0, time=50, n_episodes=25, n_snn_episodes=100, percentile=99.9, ep
             sys.stdout.flush()
             state[np.where(indices)] = 0
 
-            state = state.repeat(time, 1, 1, 1, 1)
-            inpts = {'Input': state.float() / 255.0}
+            inpts = {'Input': ConstantSource(state.float() / 255.0, time)}
             SNN.run(inpts=inpts, time=time)
 
             spikes = {layer: SNN.monitors[layer].get('s') for layer in SNN.monitors}
@@ -227,7 +227,7 @@ def main(seed=0, time=50, n_episodes=25, n_snn_episodes=100, percentile=99.9, ep
 
             if plot:
                 # Get voltage recording.
-                inpt = state.view(time, 4, 84, 84).sum(0).sum(0).view(84, 84)
+                inpt = time * state.view(4, 84, 84).sum(0)
                 spike_ims, spike_axes = plot_spikes(
                     {layer: spikes[layer] for layer in spikes}, ims=spike_ims, axes=spike_axes
                 )
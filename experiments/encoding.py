@@ -0,0 +1,198 @@
+import torch
+
+
+def rank_order_times(datum: torch.Tensor, time: int, dt: float = 1.0, batched: bool = False) -> torch.Tensor:
+    # language=rst
+    """
+    Spike times of rank order coding: inversely proportional to intensity, stretched so that the dimmest non-zero
+    input spikes at the last time step.
+
+    :param datum: Tensor of shape ``[n_1, ..., n_k]``, or ``[batch_size, n_1, ..., n_k]`` if ``batched``.
+    :param time: Length of rank order-encoded spike train per input variable.
+    :param dt: Simulation time step.
+    :param batched: Whether the first dimension of ``datum`` indexes independently encoded examples.
+    :return: ``long`` tensor of shape ``[1 or batch_size, n_1 * ... * n_k]`` of spike times in ``1, ..., time``;
+        ``0`` for inputs that never spike.
+    """
+    time = int(time / dt)
+    datum = datum.float().contiguous().view(datum.size(0) if batched else 1, -1)
+
+    # Create spike times in order of decreasing intensity, per example.
+    datum = datum / datum.max(1, keepdim=True)[0]
+    times = torch.zeros_like(datum)
+    nonzero = datum != 0
+    times[nonzero] = 1 / datum[nonzero]
+    times = times * (time / times.max(1, keepdim=True)[0])  # Extended through simulation time.
+    times = torch.ceil(times).clamp(max=time)  # Rounding can push the dimmest input just past the last step.
+    times[times != times] = 0  # All-zero examples don't spike.
+    return times.long()
+
+
+def rank_order(datum: torch.Tensor, time: int, dt: float = 1.0, batched: bool = False, **kwargs) -> torch.Tensor:
+    # language=rst
+    """
+    Encodes data via a rank order coding-like representation. One spike per neuron, temporally ordered by decreasing
+    intensity: spike times are inversely proportional to intensity and stretched so that the dimmest non-zero input
+    spikes at the last time step. Zero inputs never spike. Inputs must be non-negative, and are not modified. All
+    spikes are set with a single scatter, for one example or a whole batch.
+
+    :param datum: Tensor of shape ``[n_1, ..., n_k]``, or ``[batch_size, n_1, ..., n_k]`` if ``batched``.
+    :param time: Length of rank order-encoded spike train per input variable.
+    :param dt: Simulation time step.
+    :param batched: Whether the first dimension of ``datum`` indexes independently encoded examples.
+    :return: Tensor of shape ``[time, *datum.shape]`` of rank order-encoded spikes.
+    """
+    shape = datum.shape
+    times = rank_order_times(datum, time, dt, batched)
+
+    # Scatter one spike per input into the time step given by its spike time; time 0 collects inputs that never spike.
+    spikes = torch.zeros(int(time / dt) + 1, *times.shape, dtype=torch.uint8)
+    spikes.scatter_(0, times.unsqueeze(0), 1)
+
+    return spikes[1:].view(int(time / dt), *shape)
+
+
+# Constants of the SplitMix64 generator.
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK = 2 ** 64 - 1
+
+
+def _mix(z: int) -> int:
+    # SplitMix64 finalizer: a bijective scrambling of 64-bit integers.
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9 & _MASK
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EB & _MASK
+    return z ^ (z >> 31)
+
+
+def stream_key(seed: int, index: int, attempt: int = 0) -> int:
+    # language=rst
+    """
+    Seed of the random number stream of one encoding of one example: a hash of ``(seed, index, attempt)``, so the
+    stream doesn't depend on which other examples are encoded with it, in what order or in which process.
+
+    :param seed: Seed of the run.
+    :param index: Index of the example.
+    :param attempt: Index of the encoding of the example; e.g., the retry or simulation segment.
+    :return: Non-negative 63-bit integer.
+    """
+    key = _mix((seed * _GOLDEN + 1) & _MASK)
+    key = _mix((key ^ index) * _GOLDEN & _MASK)
+    key = _mix((key ^ attempt) * _GOLDEN & _MASK)
+    return key >> 1
+
+
+def poisson_batch(data: torch.Tensor, time: int, dt: float = 1.0, seed: int = 0, indices=None,
+                  attempts=0) -> torch.Tensor:
+    # language=rst
+    """
+    Poisson-encodes a batch of examples like ``bindsnet.encoding.poisson``: inter-spike intervals are
+    Poisson-distributed with mean ``1000 / (intensity * dt)`` time steps, zero intervals are raised to one, and the
+    ``n``-th spike falls on time step ``t_n`` (0-indexed), where ``t_n`` is the sum of the first ``n`` intervals, unless
+    ``t_n >= time``; no input spikes on time step 0.
+    Each example samples from its own stream, keyed by ``(seed, index, attempt)``, so batched, parallel and serial
+    encodings of an example are identical; everything but the sampling itself is vectorized over the batch.
+
+    :param data: Tensor of shape ``[batch_size, n_1, ..., n_k]`` of non-negative intensities.
+    :param time: Length of Poisson spike train per input variable.
+    :param dt: Simulation time step.
+    :param seed: Seed of the run.
+    :param indices: Indices of the examples; defaults to ``0, ..., batch_size - 1``.
+    :param attempts: Index of this encoding of each example (an integer for all, or one per example).
+    :return: Tensor of shape ``[time, batch_size, n_1, ..., n_k]`` of Poisson-distributed spikes.
+    """
+    shape = data.shape
+    batch_size = shape[0]
+    time = int(time / dt)
+    data = data.float().contiguous().view(batch_size, -1).cpu()
+    size = data.size(1)
+
+    indices = range(batch_size) if indices is None else [int(i) for i in indices]
+    attempts = [int(a) for a in attempts] if hasattr(attempts, '__len__') else [int(attempts)] * batch_size
+
+    # Mean inter-spike intervals as a function of data intensity, accounting for the simulation time step.
+    nonzero = data != 0
+    rate = torch.zeros_like(data)
+    rate[nonzero] = 1 / data[nonzero] * (1000 / dt)
+
+    # Sample inter-spike intervals per example from its own stream (raising zero intervals to 1, as ``poisson`` does),
+    # a chunk of rows at a time, until every input's spike times have passed the end of the simulation; for typical
+    # intensities, far fewer than ``time`` rows are needed.
+    generator = torch.Generator()
+    all_times = []
+    for b, (index, attempt) in enumerate(zip(indices, attempts)):
+        generator.manual_seed(stream_key(seed, index, attempt))
+        if not nonzero[b].any():
+            all_times.append(torch.zeros(1, size, dtype=torch.long))
+            continue
+
+        chunk = min(time, int(time / (rate[b][nonzero[b]].min().item() + 1)) + 8)
+        total = torch.zeros(size)
+        times = []
+        while total[nonzero[b]].min() < time and len(times) * chunk < time:
+            intervals = torch.poisson(rate[b].expand(chunk, size), generator=generator)
+            intervals += ((intervals == 0) & nonzero[b]).float()
+            intervals = torch.cumsum(intervals, dim=0) + total
+            total = intervals[-1]
+            times.append(intervals)
+
+        all_times.append(torch.cat(times).long())
+
+    # Spike times past the end, and of zero inputs, go to time step 0, which is cleared afterwards.
+    rows = max(t.size(0) for t in all_times)
+    times = torch.zeros(rows, batch_size, size, dtype=torch.long)
+    for b, t in enumerate(all_times):
+        times[:t.size(0), b] = t
+
+    times[times >= time] = 0
+
+    spikes = torch.zeros(time, batch_size, size, dtype=torch.uint8)
+    spikes.scatter_(0, times, 1)
+    spikes[0] = 0
+
+    return spikes.view(time, *shape)
+
+
+class KeyedPoisson:
+    # language=rst
+    """
+    Poisson encoder for ``IntensityController`` and other call sites of ``poisson``, drawing every encoding from the
+    stream of ``poisson_batch`` keyed by the current example index and the number of encodings of it so far. Call
+    ``start`` with the example index (or first index of a batch) before simulating an example.
+    """
+
+    def __init__(self, seed: int = 0) -> None:
+        # language=rst
+        """
+        Constructor for ``KeyedPoisson``.
+
+        :param seed: Seed of the run.
+        """
+        self.seed = seed
+        self.index = 0
+        self.attempt = 0
+
+    def start(self, index: int) -> None:
+        # language=rst
+        """
+        Moves on to the example (or batch of examples starting at) ``index``.
+        """
+        self.index = index
+        self.attempt = 0
+
+    def __call__(self, datum: torch.Tensor, time: int, dt: float = 1.0, **kwargs) -> torch.Tensor:
+        # language=rst
+        """
+        Encodes a single example; same signature and output shape as ``poisson``.
+        """
+        spikes = self.batch(datum.unsqueeze(0), time=time, dt=dt)
+        return spikes[:, 0]
+
+    def batch(self, data: torch.Tensor, time: int, dt: float = 1.0, **kwargs) -> torch.Tensor:
+        # language=rst
+        """
+        Encodes a batch of consecutive examples; output of shape ``[time, batch_size, ...]``.
+        """
+        indices = range(self.index, self.index + data.size(0))
+        spikes = poisson_batch(data, time=time, dt=dt, seed=self.seed, indices=indices, attempts=self.attempt)
+        self.attempt += 1
+        return spikes.to(data.device)
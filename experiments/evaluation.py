@@ -0,0 +1,300 @@
+import torch
+import numpy as np
+
+from typing import Dict, Tuple, Optional
+
+
+class NgramTable:
+    # language=rst
+    """
+    Tensorized replacement for the ``Dict[Tuple[int, ...], torch.Tensor]`` ngram scores of
+    ``bindsnet.evaluation.ngram`` and ``update_ngram_scores``. Each ngram of neuron indices is encoded as a single
+    integer in base ``n_neurons``. The scores are kept in a table of sorted integer keys with a ``[n_keys, n_labels]``
+    score matrix, so lookups are binary searches. ``predict`` and ``update`` process a whole batch of spike records
+    in one pass, and give the same results as the dictionary-based functions.
+    """
+
+    def __init__(self, n_neurons: int, n_labels: int, n: int = 2) -> None:
+        # language=rst
+        """
+        Constructor for ``NgramTable``.
+
+        :param n_neurons: Number of neurons whose spikes are recorded.
+        :param n_labels: Number of data categories.
+        :param n: Length of ngrams.
+        """
+        assert n_neurons ** n < 2 ** 63, 'ngram codes must fit into 64-bit integers'
+
+        self.n_neurons = n_neurons
+        self.n_labels = n_labels
+        self.n = n
+
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.scores = torch.zeros(0, n_labels)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_dict(cls, ngram_scores: Dict[Tuple[int, ...], torch.Tensor], n_neurons: int, n_labels: int,
+                  n: int = 2) -> 'NgramTable':
+        # language=rst
+        """
+        Builds a table from dictionary ngram scores; e.g., as saved in an auxiliary parameters file.
+
+        :param ngram_scores: Mapping from ngram tuples to per-label scores.
+        :param n_neurons: Number of neurons whose spikes are recorded.
+        :param n_labels: Number of data categories.
+        :param n: Length of ngrams.
+        :return: Equivalent ``NgramTable``.
+        """
+        table = cls(n_neurons, n_labels, n)
+        if ngram_scores:
+            codes = table._encode(np.array(list(ngram_scores.keys()), dtype=np.int64).reshape(-1, n))
+            order = np.argsort(codes)
+            table.keys = codes[order]
+            table.scores = torch.stack([s.float().cpu() for s in ngram_scores.values()])[torch.from_numpy(order)]
+
+        return table
+
+    def to_dict(self) -> Dict[Tuple[int, ...], torch.Tensor]:
+        # language=rst
+        """
+        Converts the table to dictionary ngram scores, for use with ``bindsnet.evaluation``.
+
+        :return: Mapping from ngram tuples to per-label scores.
+        """
+        neurons = self._decode(self.keys)
+        return {tuple(key): score for key, score in zip(neurons.tolist(), self.scores.clone())}
+
+    def _encode(self, neurons: np.ndarray) -> np.ndarray:
+        # Encodes rows of ``n`` neuron indices as integers in base ``n_neurons``.
+        codes = np.zeros(neurons.shape[0], dtype=np.int64)
+        for k in range(self.n):
+            codes = codes * self.n_neurons + neurons[:, k]
+
+        return codes
+
+    def _decode(self, codes: np.ndarray) -> np.ndarray:
+        # Inverse of ``_encode``.
+        neurons = np.zeros((codes.shape[0], self.n), dtype=np.int64)
+        for k in reversed(range(self.n)):
+            neurons[:, k] = codes % self.n_neurons
+            codes = codes // self.n_neurons
+
+        return neurons
+
+    def _lookup(self, codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Positions of ``codes`` in the table, and a mask of which codes were found.
+        if len(self.keys) == 0:
+            return np.zeros(len(codes), dtype=np.int64), np.zeros(len(codes), dtype=bool)
+
+        positions = np.minimum(np.searchsorted(self.keys, codes), len(self.keys) - 1)
+        return positions, self.keys[positions] == codes
+
+    @staticmethod
+    def _fire_order(spikes: torch.Tensor) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Example index, time step and neuron index of every spike, ordered by example, then time, then neuron.
+        spikes = spikes.contiguous().view(spikes.size(0), spikes.size(1), -1)
+        indices = torch.nonzero(spikes).cpu().numpy().astype(np.int64)
+        return indices[:, 0], indices[:, 1], indices[:, 2]
+
+    def score(self, spikes, batch_size: int = 250) -> torch.Tensor:
+        # language=rst
+        """
+        Computes per-label scores for a batch of spike records. As in ``bindsnet.evaluation.ngram``, the scores of
+        all consecutive ngrams in the firing order are summed, except for the last ngram.
+
+        :param spikes: Tensor (or ``SpikeRecord``) of shape ``[n_examples, time, n_neurons]``.
+        :param batch_size: Number of examples to process at once.
+        :return: Scores tensor of shape ``[n_examples, n_labels]``.
+        """
+        n_examples = spikes.size(0)
+        scores = torch.zeros(n_examples, self.n_labels)
+        for start in range(0, n_examples, batch_size):
+            example, _, neuron = self._fire_order(spikes[start:start + batch_size])
+
+            # Windows of n spikes from the same example, with at least one more spike following.
+            j = np.arange(max(len(neuron) - self.n, 0))
+            j = j[example[j + self.n] == example[j]]
+
+            codes = self._encode(neuron[j[:, None] + np.arange(self.n)])
+            positions, found = self._lookup(codes)
+            if found.any():
+                scores.index_add_(
+                    0, torch.from_numpy(start + example[j][found]),
+                    self.scores[torch.from_numpy(positions[found])]
+                )
+
+        return scores
+
+    def predict(self, spikes, batch_size: int = 250) -> torch.Tensor:
+        # language=rst
+        """
+        Predicts labels for a batch of spike records. Same result as ``bindsnet.evaluation.ngram``.
+
+        :param spikes: Tensor (or ``SpikeRecord``) of shape ``[n_examples, time, n_neurons]``.
+        :param batch_size: Number of examples to process at once.
+        :return: Predictions tensor of shape ``[n_examples]``.
+        """
+        return torch.argmax(self.score(spikes, batch_size), 1).long()
+
+    def update(self, spikes, labels: torch.Tensor, batch_size: int = 250) -> 'NgramTable':
+        # language=rst
+        """
+        Adds the ngram counts of a batch of labeled spike records. Same result as
+        ``bindsnet.evaluation.update_ngram_scores``: every sequence of ``n`` consecutive time steps with spikes
+        contributes every combination of one firing neuron per time step.
+
+        :param spikes: Tensor (or ``SpikeRecord``) of shape ``[n_examples, time, n_neurons]``.
+        :param labels: Tensor of shape ``[n_examples]`` of integer data labels.
+        :param batch_size: Number of examples to process at once.
+        :return: The updated table.
+        """
+        labels = labels.long().cpu().numpy()
+        for start in range(0, spikes.size(0), batch_size):
+            example, time, neuron = self._fire_order(spikes[start:start + batch_size])
+            if len(neuron) == 0:
+                continue
+
+            # Group spikes into active time steps.
+            first = np.ones(len(neuron), dtype=bool)
+            first[1:] = (example[1:] != example[:-1]) | (time[1:] != time[:-1])
+            offsets = np.flatnonzero(first)
+            counts = np.diff(np.append(offsets, len(neuron)))
+            step_example = example[offsets]
+
+            # First steps of runs of n consecutive active steps within the same example.
+            starts = np.arange(max(len(offsets) - self.n + 1, 0))
+            starts = starts[step_example[starts + self.n - 1] == step_example[starts]]
+
+            # Expand the cartesian product of firing neurons one time step at a time.
+            sequence = np.arange(len(starts))
+            codes = np.zeros(len(starts), dtype=np.int64)
+            for k in range(self.n):
+                steps = starts[sequence] + k
+                c = counts[steps]
+                repeat = np.repeat(np.arange(len(sequence)), c)
+                within = np.arange(len(repeat)) - np.repeat(np.cumsum(c) - c, c)
+                codes = codes[repeat] * self.n_neurons + neuron[offsets[steps][repeat] + within]
+                sequence = sequence[repeat]
+
+            keys, inverse = np.unique(codes, return_inverse=True)
+            scores = np.zeros((len(keys), self.n_labels), dtype=np.float32)
+            np.add.at(scores, (inverse, labels[start + step_example[starts[sequence]]]), 1)
+            self._add(keys, torch.from_numpy(scores))
+
+        return self
+
+    def merge(self, other: 'NgramTable') -> 'NgramTable':
+        # language=rst
+        """
+        Adds the scores of another table into this one.
+
+        :param other: Table with the same ``n_neurons``, ``n_labels`` and ``n``.
+        :return: The updated table.
+        """
+        self._add(other.keys, other.scores)
+        return self
+
+    def _add(self, keys: np.ndarray, scores: torch.Tensor) -> None:
+        # Adds scores for sorted, unique ``keys`` into the table.
+        merged = np.union1d(self.keys, keys)
+        total = torch.zeros(len(merged), self.n_labels)
+        if len(self.keys) > 0:
+            total.index_add_(0, torch.from_numpy(np.searchsorted(merged, self.keys)), self.scores)
+        if len(keys) > 0:
+            total.index_add_(0, torch.from_numpy(np.searchsorted(merged, keys)), scores.float())
+
+        self.keys = merged
+        self.scores = total
+
+
+def _patch_view(spikes: torch.Tensor, n_patches: int) -> torch.Tensor:
+    # Spike counts of shape ``[n_examples, n_patches, neurons_per_patch]``.
+    counts = spikes.float().sum(1)
+    return counts.view(counts.size(0), n_patches, -1)
+
+
+def assign_patch_scores(spikes: torch.Tensor, labels: torch.Tensor, n_labels: int, n_patches: int,
+                        scores: Optional[torch.Tensor] = None) -> torch.Tensor:
+    # language=rst
+    """
+    Counts, per label, how often each neuron is the most active neuron (or tied for it) in its patch of a locally
+    connected layer. These are the neuron scores used by ``patch_votes``.
+
+    :param spikes: Tensor of shape ``[n_examples, time, n_neurons]`` of recorded spikes. Neurons are ordered by patch.
+    :param labels: Tensor of shape ``[n_examples]`` of integer data labels.
+    :param n_labels: Number of data categories.
+    :param n_patches: Number of patches (receptive field locations) in the layer.
+    :param scores: Optional scores of shape ``[n_labels, n_neurons]`` to add to.
+    :return: Scores tensor of shape ``[n_labels, n_neurons]``.
+    """
+    counts = _patch_view(spikes, n_patches)
+    if scores is None:
+        scores = torch.zeros(n_labels, counts.size(1) * counts.size(2))
+
+    top = counts.max(2, keepdim=True)[0]
+    winners = ((counts == top) & (top > 0)).view(counts.size(0), -1).float()
+    scores.index_add_(0, labels.long(), winners)
+
+    return scores
+
+
+def patch_votes(spikes: torch.Tensor, scores: torch.Tensor, n_patches: int, n: int = 1, weighting: str = 'uniform',
+                threshold: Optional[float] = None, batch_size: int = 250) -> torch.Tensor:
+    # language=rst
+    """
+    Rank-based voting over the patches of a locally connected layer. In each patch, the ``n`` highest spike counts
+    select the neurons that fired that many spikes. Among the scores of the selected neurons, the highest (class,
+    neuron) scores each vote for their class, or, if ``threshold`` is given, all scores above it do.
+
+    Votes are weighted per rank of the spike count: ``'uniform'`` counts each vote once, ``'rank'`` gives
+    ``n - rank``, and ``'proportional'`` gives the spike count divided by the sum of the top ``n`` counts, shared
+    among the votes of that rank. ``n=1`` with ``'uniform'`` votes is the plain max-neuron readout.
+
+    :param spikes: Tensor of shape ``[n_examples, time, n_neurons]`` of recorded spikes. Neurons are ordered by patch.
+    :param scores: Tensor of shape ``[n_labels, n_neurons]`` of neuron scores; e.g., from ``assign_patch_scores``.
+    :param n_patches: Number of patches (receptive field locations) in the layer.
+    :param n: Number of top spike counts per patch that vote.
+    :param weighting: One of ``'uniform'``, ``'rank'`` or ``'proportional'``.
+    :param threshold: If given, every selected score above it votes, instead of only the highest.
+    :param batch_size: Number of examples to process at once.
+    :return: Votes tensor of shape ``[n_examples, n_labels]``.
+    """
+    assert weighting in ('uniform', 'rank', 'proportional'), f'Unknown vote weighting "{weighting}"'
+
+    n_labels = scores.size(0)
+    scores = scores.float().view(n_labels, n_patches, -1).transpose(0, 1)
+    scores = scores.view(1, n_patches, 1, n_labels, -1)
+
+    votes = []
+    for start in range(0, spikes.size(0), batch_size):
+        counts = _patch_view(spikes[start:start + batch_size], n_patches)
+
+        # Neurons selected by each of the top n spike counts: [batch, patches, n, neurons_per_patch].
+        values = counts.topk(n, dim=2)[0]
+        selected = (counts.unsqueeze(2) == values.unsqueeze(3)) & (values > 0).unsqueeze(3)
+        selected = selected.unsqueeze(3)
+
+        # Voting (class, neuron) pairs: [batch, patches, n, n_labels, neurons_per_patch].
+        if threshold is None:
+            best = scores.masked_fill(~selected, -np.inf).flatten(3).max(3)[0]
+            hits = selected & (scores == best.view(*best.shape, 1, 1))
+        else:
+            hits = selected & (scores > threshold)
+
+        hits = hits.sum(4).float()
+
+        # Weight of each vote per rank: [batch, patches, n].
+        if weighting == 'uniform':
+            weights = torch.ones_like(values)
+        elif weighting == 'rank':
+            weights = (n - torch.arange(n)).float().expand_as(values)
+        else:
+            shares = values.sum(2, keepdim=True) * hits.sum(3)
+            weights = torch.where(shares > 0, values / shares.clamp(min=1e-12), torch.zeros_like(values))
+
+        votes.append((hits * weights.unsqueeze(3)).sum((1, 2)))
+
+    return torch.cat(votes)
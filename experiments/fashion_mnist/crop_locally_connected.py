@@ -8,21 +8,20 @@ from time import time as t
 from sklearn.metrics import confusion_matrix
 
 from bindsnet.learning import NoOp
-from bindsnet.encoding import poisson
 from bindsnet.network import load_network
-from bindsnet.datasets import FashionMNIST
 from bindsnet.network.monitors import Monitor
 from bindsnet.models import LocallyConnectedNetwork
 from bindsnet.evaluation import assign_labels, update_ngram_scores
 from bindsnet.analysis.plotting import plot_locally_connected_weights, plot_spikes
 
-from experiments.utils import update_curves, print_results
+from experiments.prepared_data import load
+from experiments.utils import update_curves, print_results, IntensityController, SpikeRecord
+from experiments.results import write_results
 
 model = 'crop_locally_connected'
 data = 'fashion_mnist'
 
 top_level = os.path.join('..', '..')
-data_path = os.path.join(top_level, 'data', 'FashionMNIST')
 params_path = os.path.join(top_level, 'params', data, model)
 curves_path = os.path.join(top_level, 'curves', data, model)
 results_path = os.path.join(top_level, 'results', data, model)
@@ -94,22 +93,14 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     voltage_monitor = Monitor(network.layers['Y'], ['v'], time=time)
     network.add_monitor(voltage_monitor, name='output_voltage')
 
-    # Load Fashion-MNIST data.
-    dataset = FashionMNIST(path=data_path, download=True)
+    # Load Fashion-MNIST data, cropped lazily as examples are read.
+    images, labels = load(data, 'train' if train else 'test', crop=crop, device='cuda' if gpu else 'cpu')
 
-    if train:
-        images, labels = dataset.get_train()
-    else:
-        images, labels = dataset.get_test()
-
-    if crop != 0:
-        images = images[:, crop:-crop, crop:-crop]
-
-    # Record spikes during the simulation.
+    # Record spikes during the simulation (bit-packed).
     if not train:
         update_interval = n_examples
 
-    spike_record = torch.zeros(update_interval, time, n_neurons)
+    spike_record = SpikeRecord(update_interval, time, n_neurons)
 
     # Neuron assignments and spike proportions.
     if train:
@@ -145,6 +136,9 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     spike_axes = None
     weights_im = None
 
+    # Escalates input intensity during simulation of examples with too little output activity.
+    controller = IntensityController(network, spikes['Y'], time=time, dt=dt)
+
     start = t()
     for i in range(n_examples):
         if i % progress_interval == 0 and train:
@@ -187,7 +181,7 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
                     best_accuracy = max([x[-1] for x in curves.values()])
 
                 # Assign labels to excitatory layer neurons.
-                assignments, proportions, rates = assign_labels(spike_record, current_labels, n_classes, rates)
+                assignments, proportions, rates = assign_labels(spike_record.counts(), current_labels, n_classes, rates)
 
                 # Compute ngram scores.
                 ngram_scores = update_ngram_scores(spike_record, current_labels, n_classes, 2, ngram_scores)
@@ -196,19 +190,9 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
 
         # Get next input sample.
         image = images[i % len(images)].contiguous().view(-1)
-        sample = poisson(datum=image, time=time, dt=dt)
-        inpts = {'X': sample}
-
-        # Run the network on the input.
-        network.run(inpts=inpts, time=time)
 
-        retries = 0
-        while spikes['Y'].get('s').sum() < 5 and retries < 3:
-            retries += 1
-            image *= 2
-            sample = poisson(datum=image, time=time, dt=dt)
-            inpts = {'X': sample}
-            network.run(inpts=inpts, time=time)
+        # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+        controller.run(image)
 
         # Add to spikes recording.
         spike_record[i % update_interval] = spikes['Y'].get('s').t()
@@ -239,7 +223,7 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
 
     if not train and relabel:
         # Assign labels to excitatory layer neurons.
-        assignments, proportions, rates = assign_labels(spike_record, current_labels, n_classes, rates)
+        assignments, proportions, rates = assign_labels(spike_record.counts(), current_labels, n_classes, rates)
 
         # Compute ngram scores.
         ngram_scores = update_ngram_scores(spike_record, current_labels, n_classes, 2, ngram_scores)
@@ -291,23 +275,20 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(path, name), 'w') as f:
-            if train:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,n_train,inhib,time,lr,lr_decay,timestep,theta_plus,'
-                    'theta_decay,norm,progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                    'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
-                )
-            else:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,n_train,n_test,inhib,time,lr,lr_decay,timestep,'
-                    'theta_plus,theta_decay,norm,progress_interval,update_interval,mean_all_activity,'
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
-                )
-
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    if train:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,n_train,inhib,time,lr,lr_decay,timestep,theta_plus,'
+            'theta_decay,norm,progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+            'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
+        )
+    else:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,n_train,n_test,inhib,time,lr,lr_decay,timestep,'
+            'theta_plus,theta_decay,norm,progress_interval,update_interval,mean_all_activity,'
+            'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
+        )
+
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
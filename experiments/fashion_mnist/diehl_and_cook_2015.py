@@ -8,7 +8,6 @@ import matplotlib.pyplot as plt
 from time import time as t
 from sklearn.metrics import confusion_matrix
 
-from bindsnet.encoding import poisson
 from bindsnet.learning import NoOp
 from bindsnet.network import load_network
 from bindsnet.datasets import FashionMNIST
@@ -18,6 +17,9 @@ from bindsnet.utils import get_square_weights, get_square_assignments
 from bindsnet.evaluation import assign_labels, update_ngram_scores
 from bindsnet.analysis.plotting import plot_input, plot_spikes, plot_weights, plot_assignments, plot_performance
 
+from experiments.results import write_results
+from experiments.utils import IntensityController
+
 sys.path.append('..')
 
 from utils import *
@@ -187,6 +189,9 @@ weights_im = None
 assigns_im = None
 perf_ax = None
 
+# Escalates input intensity during simulation of examples with too little output activity.
+controller = IntensityController(network, spikes['Y'], time=time, dt=dt)
+
 start = t()
 for i in range(n_examples):
     if i % progress_interval == 0:
@@ -234,19 +239,9 @@ for i in range(n_examples):
 
     # Get next input sample.
     image = images[i]
-    sample = poisson(datum=image, time=time, dt=dt)
-    inpts = {'X': sample}
 
-    # Run the network on the input.
-    network.run(inpts=inpts, time=time)
-
-    retries = 0
-    while spikes['Y'].get('s').sum() < 5 and retries < 3:
-        retries += 1
-        image *= 2
-        sample = poisson(datum=image, time=time, dt=dt)
-        inpts = {'X': sample}
-        network.run(inpts=inpts, time=time)
+    # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+    controller.run(image)
 
     # Add to spikes recording.
     spike_record[i % update_interval] = spikes['Y'].get('s').t()
@@ -254,7 +249,7 @@ for i in range(n_examples):
     # Optionally plot various simulation information.
     if plot:
         _input = images[i].view(28, 28)
-        reconstruction = inpts['X'].view(time, 784).sum(0).view(28, 28)
+        reconstruction = controller.sample.view(time, 784).sum(0).view(28, 28)
         _spikes = {layer: spikes[layer].get('s') for layer in spikes}
         input_exc_weights = network.connections[('X', 'Y')].w
         square_weights = get_square_weights(input_exc_weights.view(784, n_neurons), n_sqrt, 28)
@@ -323,19 +318,16 @@ to_write = params + results if train else test_params + results
 to_write = [str(x) for x in to_write]
 name = 'train.csv' if train else 'test.csv'
 
-if not os.path.isfile(os.path.join(results_path, name)):
-    with open(os.path.join(results_path, name), 'w') as f:
-        if train:
-            f.write('random_seed,n_neurons,n_train,inhib,time,timestep,theta_plus,theta_decay,intensity,norm,'
-                    'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                    'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
-        else:
-            f.write('random_seed,n_neurons,n_train,n_test,inhib,time,timestep,theta_plus,theta_decay,intensity,norm,'
-                    'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                    'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
+if train:
+    header = ('random_seed,n_neurons,n_train,inhib,time,timestep,theta_plus,theta_decay,intensity,norm,'
+            'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+            'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
+else:
+    header = ('random_seed,n_neurons,n_train,n_test,inhib,time,timestep,theta_plus,theta_decay,intensity,norm,'
+            'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+            'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
 
-with open(os.path.join(results_path, name), 'a') as f:
-    f.write(','.join(to_write) + '\n')
+write_results(results_path, name, header, to_write)
 
 if labels.numel() > n_examples:
     labels = labels[:n_examples]
@@ -6,7 +6,6 @@ import matplotlib.pyplot as plt
 
 from time import time as t
 
-from bindsnet.encoding import rank_order
 from bindsnet.datasets import FashionMNIST
 from bindsnet.learning import PostPre, NoOp
 from bindsnet.network.monitors import Monitor
@@ -17,7 +16,11 @@ from bindsnet.evaluation import assign_labels, update_ngram_scores
 from bindsnet.utils import get_square_weights, get_square_assignments
 from bindsnet.analysis.plotting import plot_input, plot_spikes, plot_weights
 
+from experiments import ROOT_DIR
+from experiments.inhibition import constant_inhibition
+from experiments.encoding import rank_order
 from experiments.utils import update_curves, print_results
+from experiments.results import write_results
 
 model = 'real_dac'
 data = 'fashion_mnist'
@@ -78,7 +81,7 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, time=50,
         )
         network.add_connection(input_connection, source='X', target='Y')
 
-        w = -inhib * (torch.ones(n_neurons, n_neurons) - torch.diag(torch.ones(n_neurons)))
+        w = constant_inhibition(n_neurons, inhib)
         recurrent_connection = Connection(
             source=network.layers['Y'], target=network.layers['Y'], w=w, wmin=-inhib, wmax=0
         )
@@ -204,7 +207,7 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, time=50,
         retries = 0
         while spikes['Y'].get('s').sum() < 5 and retries < 3:
             retries += 1
-            image *= 2
+            image = image * 2
             sample = rank_order(datum=image, time=time, dt=dt)
             inpts = {'X': sample}
             network.run(inpts=inpts, time=time)
@@ -286,9 +289,7 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, time=50,
     torch.save((curves, update_interval, n_examples), open(os.path.join(path, f), 'wb'))
 
     # Save results to disk.
-    path = os.path.join('..', '..', 'results', data, model)
-    if not os.path.isdir(path):
-        os.makedirs(path)
+    results_path = os.path.join(ROOT_DIR, 'results', data, model)
 
     results = [
         np.mean(curves['all']), np.mean(curves['proportion']), np.mean(curves['ngram']),
@@ -307,19 +308,16 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, time=50,
     else:
         name = 'test.csv'
 
-    if not os.path.isfile(os.path.join(path, name)):
-        with open(os.path.join(path, name), 'w') as f:
-            if train:
-                f.write('random_seed,n_neurons,n_train,inhib,time,lr,lr_decay,theta_plus,theta_decay,'
-                        'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                        'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
-            else:
-                f.write('random_seed,n_neurons,n_train,n_test,inhib,time,lr,lr_decay,theta_plus,theta_decay,'
-                        'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                        'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
+    if train:
+        header = ('random_seed,n_neurons,n_train,inhib,time,lr,lr_decay,theta_plus,theta_decay,'
+                  'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+                  'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
+    else:
+        header = ('random_seed,n_neurons,n_train,n_test,inhib,time,lr,lr_decay,theta_plus,theta_decay,'
+                  'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+                  'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
 
-    with open(os.path.join(path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    write_results(results_path, name, header, to_write)
 
 
 if __name__ == '__main__':
@@ -8,7 +8,6 @@ from time import time as t
 from sklearn.metrics import confusion_matrix
 
 from bindsnet.learning import NoOp
-from bindsnet.encoding import poisson
 from bindsnet.network import load_network
 from bindsnet.datasets import FashionMNIST
 from bindsnet.network.monitors import Monitor
@@ -16,7 +15,9 @@ from bindsnet.models import LocallyConnectedNetwork
 from bindsnet.evaluation import assign_labels, update_ngram_scores
 from bindsnet.analysis.plotting import plot_locally_connected_weights, plot_spikes
 
-from experiments.utils import update_curves, print_results
+from experiments.utils import update_curves, print_results, IntensityController
+from experiments.results import write_results
+from experiments.input_sources import ConstantSource
 
 model = 'real_crop_locally_connected'
 data = 'fashion_mnist'
@@ -143,6 +144,9 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     spike_axes = None
     weights_im = None
 
+    # Escalates input intensity during simulation of examples with too little output activity.
+    controller = IntensityController(network, spikes['Y'], time=time, dt=dt, encoder=ConstantSource)
+
     start = t()
     for i in range(n_examples):
         if i % progress_interval == 0 and train:
@@ -194,17 +198,9 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
 
         # Get next input sample.
         image = images[i].contiguous().view(-1)
-        inpts = {'X': image.repeat(time, 1)}
-
-        # Run the network on the input.
-        network.run(inpts=inpts, time=time)
 
-        retries = 0
-        while spikes['Y'].get('s').sum() < 5 and retries < 3:
-            retries += 1
-            image *= 2
-            inpts = {'X': image.repeat(time, 1)}
-            network.run(inpts=inpts, time=time)
+        # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+        controller.run(image)
 
         # Add to spikes recording.
         spike_record[i % update_interval] = spikes['Y'].get('s').t()
@@ -282,23 +278,20 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(path, name), 'w') as f:
-            if train:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,n_train,inhib,time,lr,lr_decay,timestep,theta_plus,theta_decay,'
-                    'norm,progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                    'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
-                )
-            else:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,n_train,n_test,inhib,time,lr,lr_decay,timestep,theta_plus,'
-                    'theta_decay,norm,progress_interval,update_interval,mean_all_activity,'
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
-                )
-
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    if train:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,n_train,inhib,time,lr,lr_decay,timestep,theta_plus,theta_decay,'
+            'norm,progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+            'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
+        )
+    else:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,n_train,n_test,inhib,time,lr,lr_decay,timestep,theta_plus,'
+            'theta_decay,norm,progress_interval,update_interval,mean_all_activity,'
+            'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
+        )
+
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
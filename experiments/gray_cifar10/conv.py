@@ -12,7 +12,9 @@ from bindsnet.learning import PostPre
 from bindsnet.network import Network
 from bindsnet.network.monitors import Monitor
 from bindsnet.network.nodes import Input, DiehlAndCookNodes
-from bindsnet.network.topology import Conv2dConnection, Connection
+from bindsnet.network.topology import Conv2dConnection
+
+from experiments.inhibition import LateralInhibitionConnection
 
 print()
 
@@ -50,14 +52,7 @@ def main(seed=0, n_train=60000, n_test=10000, kernel_size=16, stride=4, n_filter
         norm=0.4 * kernel_size ** 2, nu=[0, lr], wmin=0, wmax=1
     )
 
-    w = -inhib * torch.ones(n_filters, conv_size, conv_size, n_filters, conv_size, conv_size)
-    for f in range(n_filters):
-        for i in range(conv_size):
-            for j in range(conv_size):
-                w[f, i, j, f, i, j] = 0
-
-    w = w.view(n_filters * conv_size ** 2, n_filters * conv_size ** 2)
-    recurrent_conn = Connection(conv_layer, conv_layer, w=w)
+    recurrent_conn = LateralInhibitionConnection(conv_layer, conv_layer, inhib=inhib)
 
     network.add_layer(input_layer, name='X')
     network.add_layer(conv_layer, name='Y')
@@ -12,6 +12,11 @@ sys.path.append('..')
 
 from utils import *
 
+from experiments import ROOT_DIR
+from experiments.prepared_data import load
+from experiments.results import write_results
+from experiments.utils import IntensityController
+
 print()
 
 parser = argparse.ArgumentParser()
@@ -133,17 +138,9 @@ network.add_monitor(voltage_monitor, name='output_voltage')
 mask = network.connections[('X', 'Y')].w == 0
 masks = {('X', 'Y'): mask}
 
-# Load CIFAR-10 data.
-dataset = CIFAR10(path=os.path.join('..', '..', 'data', 'CIFAR10'),
-                  download=True)
-
-if train:
-    images, labels = dataset.get_train()
-else:
-    images, labels = dataset.get_test()
-
-images *= intensity
-images = images.mean(-1)
+# Load grayscale CIFAR-10 data, averaged over color channels and scaled by intensity lazily as examples are read.
+images, labels = load('gray_cifar10', 'train' if train else 'test', intensity=intensity,
+                      device='cuda' if gpu else 'cpu')
 
 # Record spikes during the simulation.
 spike_record = torch.zeros(update_interval, time, n_neurons)
@@ -176,6 +173,9 @@ if train:
 else:
     print('\nBegin test.\n')
 
+# Escalates input intensity during simulation of examples with too little output activity.
+controller = IntensityController(network, spikes['Y'], time=time, dt=dt)
+
 start = t()
 for i in range(n_examples):
     if i % progress_interval == 0:
@@ -221,19 +221,9 @@ for i in range(n_examples):
 
     # Get next input sample.
     image = images[i].view(-1)
-    sample = poisson(datum=image, time=time, dt=dt)
-    inpts = {'X' : sample}
-
-    # Run the network on the input.
-    network.run(inpts=inpts, time=time, masks=masks)
 
-    retries = 0
-    while spikes['Y'].get('s').sum() < 5 and retries < 3:
-        retries += 1
-        image *= 2
-        sample = poisson(datum=image, time=time, dt=dt)
-        inpts = {'X' : sample}
-        network.run(inpts=inpts, time=time, masks=masks)
+    # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+    controller.run(image, masks=masks)
 
     # Add to spikes recording.
     spike_record[i % update_interval] = spikes['Y'].get('s').t()
@@ -242,7 +232,7 @@ for i in range(n_examples):
         image = image.view(32, 32) / intensity
         image /= image.max()
         image = 1 - image
-        inpt = 255 - sample.view(time, 32*32).sum(0).view(32, 32).float()
+        inpt = 255 - controller.sample.view(time, 32*32).sum(0).view(32, 32).float()
         weights = conv_conn.w.view(32 * 32, -1)
         _spikes = {'X' : spikes['X'].get('s').view(input_layer.n, time),
                    'Y' : spikes['Y'].get('s').view(n_filters * conv_size ** 2, time)}
@@ -325,9 +315,7 @@ f = '_'.join(to_write) + '.pt'
 torch.save((curves, update_interval, n_examples), open(os.path.join(path, f), 'wb'))
 
 # Save results to disk.
-path = os.path.join('..', '..', 'results', data, model)
-if not os.path.isdir(path):
-    os.makedirs(path)
+results_path = os.path.join(ROOT_DIR, 'results', data, model)
 
 results = [np.mean(curves['all']),
            np.mean(curves['proportion']),
@@ -348,24 +336,21 @@ if train:
 else:
     name = 'test.csv'
 
-if not os.path.isfile(os.path.join(path, name)):
-    with open(os.path.join(path, name), 'w') as f:
-        if train:
-            f.write('random_seed,kernel_size,stride,n_filters,' + \
-                    'n_train,inhib,time,timestep,' + \
-                    'theta_plus,theta_decay,intensity,' + \
-                    'progress_interval,update_interval,mean_all_activity,' + \
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,' + \
-                    'max_proportion_weighting,max_ngram\n')
-        else:
-            f.write('random_seed,kernel_size,stride,n_filters,' + \
-                    'n_train,n_test,inhib,time,timestep,' + \
-                    'theta_plus,theta_decay,intensity,' + \
-                    'progress_interval,update_interval,mean_all_activity,' + \
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,' + \
-                    'max_proportion_weighting,max_ngram\n')
-
-with open(os.path.join(path, name), 'a') as f:
-    f.write(','.join(to_write) + '\n')
+if train:
+    header = ('random_seed,kernel_size,stride,n_filters,' + \
+              'n_train,inhib,time,timestep,' + \
+              'theta_plus,theta_decay,intensity,' + \
+              'progress_interval,update_interval,mean_all_activity,' + \
+              'mean_proportion_weighting,mean_ngram,max_all_activity,' + \
+              'max_proportion_weighting,max_ngram\n')
+else:
+    header = ('random_seed,kernel_size,stride,n_filters,' + \
+              'n_train,n_test,inhib,time,timestep,' + \
+              'theta_plus,theta_decay,intensity,' + \
+              'progress_interval,update_interval,mean_all_activity,' + \
+              'mean_proportion_weighting,mean_ngram,max_all_activity,' + \
+              'max_proportion_weighting,max_ngram\n')
+
+write_results(results_path, name, header, to_write)
 
 print()
@@ -8,6 +8,8 @@ import matplotlib.pyplot as plt
 from bindsnet import *
 from time import time as t
 
+from experiments.inhibition import constant_inhibition
+
 print()
 
 parser = argparse.ArgumentParser()
@@ -57,7 +59,7 @@ conv_conn = Connection(
     input_layer, conv_layer, update_rule=post_pre, norm=0.5 * n_neurons, nu=[1e-4, 1e-2], wmax=5.0
 )
 
-w = -inhib * (torch.ones(n_neurons, n_neurons) - torch.diag(torch.ones(n_neurons)))
+w = constant_inhibition(n_neurons, inhib)
 recurrent_conn = Connection(conv_layer, conv_layer, w=w)
 
 network.add_layer(input_layer, name='X')
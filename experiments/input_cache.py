@@ -0,0 +1,250 @@
+import os
+import json
+import fcntl
+import torch
+import argparse
+import numpy as np
+
+from typing import Callable, Dict, Sequence, Union
+
+from experiments import ROOT_DIR
+from experiments.encoding import poisson_batch, rank_order
+from experiments.prepared_data import load
+
+# Batch encoders by name: ``(data, time, dt, seed, indices) -> [time, batch_size, n_inputs]`` spikes.
+ENCODERS = {
+    'poisson': lambda data, time, dt, seed, indices: poisson_batch(data, time, dt=dt, seed=seed, indices=indices),
+    'rank_order': lambda data, time, dt, seed, indices: rank_order(data, time, dt=dt, batched=True),
+}
+
+
+def cache_path(dataset: str, split: str, crop: int, intensity: float, time: int, dt: float, encoder: str,
+               seed: int) -> str:
+    # language=rst
+    """
+    Directory of the encoded inputs of a dataset split under an input configuration.
+    """
+    name = '_'.join(str(x) for x in (split, crop, intensity, time, dt, encoder, seed))
+    return os.path.join(ROOT_DIR, 'encoded', dataset, name)
+
+
+class EncodedInputs:
+    # language=rst
+    """
+    Spike trains of all examples of a dataset split, encoded once and stored bit-packed (one bit per input per time
+    step) in a memory-mapped ``.npy`` file, keyed by the input configuration: dataset, split, crop, intensity, time,
+    dt, encoder and seed. Jobs of a sweep that share an input configuration share its cache; the first one to need it
+    encodes it while holding a file lock, and all others stream it.
+    """
+
+    def __init__(self, path: str) -> None:
+        # language=rst
+        """
+        Opens an existing cache.
+
+        :param path: Cache directory.
+        """
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+
+        self.time = self.meta['time']
+        self.n_inputs = self.meta['n_inputs']
+
+        # Opened lazily, once per (worker) process.
+        self.packed = None
+
+    @classmethod
+    def build(cls, images: torch.Tensor, dataset: str, split: str, crop: int, intensity: float, time: int,
+              dt: float = 1.0, encoder: str = 'poisson', seed: int = 0, chunk_size: int = 1000) -> 'EncodedInputs':
+        # language=rst
+        """
+        Opens the cache of an input configuration, encoding and writing it first if it doesn't exist yet.
+
+        :param images: Tensor (or ``ImageView``) of shape ``[n_examples, ...]`` of the split's input intensities,
+            already cropped and scaled by ``intensity``.
+        :param dataset: Name of the dataset; e.g., ``mnist``.
+        :param split: ``train`` or ``test``.
+        :param crop: Amount images were cropped at their borders.
+        :param intensity: Constant images were multiplied by.
+        :param time: Simulation time per example.
+        :param dt: Simulation time step.
+        :param encoder: Name of the encoder in ``ENCODERS``.
+        :param seed: Seed of the encoder's random streams; example ``i`` is encoded with index ``i``.
+        :param chunk_size: Number of examples encoded at once.
+        :return: The ``EncodedInputs``.
+        """
+        path = cache_path(dataset, split, crop, intensity, time, dt, encoder, seed)
+        if os.path.isfile(os.path.join(path, 'meta.json')):
+            return cls(path)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            # Another job may have written it while we waited for the lock.
+            if not os.path.isfile(os.path.join(path, 'meta.json')):
+                cls._write(path, images, time, dt, ENCODERS[encoder], seed, chunk_size)
+
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+        return cls(path)
+
+    @staticmethod
+    def _write(path: str, images: torch.Tensor, time: int, dt: float, encode: Callable, seed: int,
+               chunk_size: int) -> None:
+        # Encodes all images chunk by chunk into a temporary directory, then moves it into place.
+        tmp = path + f'.{os.getpid()}.tmp'
+        os.makedirs(tmp, exist_ok=True)
+
+        n, n_inputs = len(images), int(np.prod(images.shape[1:]))
+        timesteps = int(time / dt)
+        packed = np.lib.format.open_memmap(
+            os.path.join(tmp, 'spikes.npy'), 'w+', np.uint8, (n, timesteps, (n_inputs + 7) // 8)
+        )
+
+        for lo in range(0, n, chunk_size):
+            hi = min(lo + chunk_size, n)
+            spikes = encode(images[lo:hi].contiguous().view(hi - lo, -1), time, dt, seed, range(lo, hi))
+            packed[lo:hi] = np.packbits(spikes.permute(1, 0, 2).cpu().numpy().astype(np.uint8), axis=-1)
+
+        del packed
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump({'n_examples': n, 'time': timesteps, 'n_inputs': n_inputs, 'shape': list(images.shape[1:])}, f)
+
+        os.rename(tmp, path)
+
+    def _open(self) -> None:
+        self.packed = np.load(os.path.join(self.path, 'spikes.npy'), mmap_mode='r')
+
+    def __getstate__(self) -> Dict:
+        # Don't pickle memory maps into worker processes; each worker opens its own.
+        state = self.__dict__.copy()
+        state['packed'] = None
+        return state
+
+    def __len__(self) -> int:
+        return self.meta['n_examples']
+
+    def __getitem__(self, index: Union[int, Sequence[int]]) -> torch.Tensor:
+        # language=rst
+        """
+        Reads the spike trains of one example, or of a batch of examples given a sequence of indices.
+
+        :param index: Example index, or sequence of example indices.
+        :return: ``uint8`` tensor of shape ``[time, n_inputs]``, or ``[time, batch_size, n_inputs]``.
+        """
+        if self.packed is None:
+            self._open()
+
+        spikes = np.unpackbits(self.packed[np.asarray(index)], axis=-1)[..., :self.n_inputs]
+        spikes = torch.from_numpy(spikes)
+        return spikes.permute(1, 0, 2) if spikes.dim() == 3 else spikes
+
+
+class CachedEncoder:
+    # language=rst
+    """
+    Drop-in for an encoder (e.g., for ``IntensityController``) that streams the current example's spike trains from
+    ``EncodedInputs``, successive calls continuing where the previous one stopped. Inputs that differ from the cached
+    example (e.g., after an intensity escalation), or that run past the cached time, are encoded by ``fallback``.
+    Call ``start`` with the example index (or first index of a batch) before simulating an example.
+
+    Runs with and without the cache are statistically equivalent, but don't see the same spikes for the same seed:
+    the cache holds one spike train per example over the whole simulation, whereas ``KeyedPoisson`` encodes each
+    segment of an ``IntensityController`` separately, keyed by its own attempt counter. Compare results of runs that
+    either all use the cache or all don't.
+    """
+
+    def __init__(self, inputs: EncodedInputs, images: torch.Tensor, fallback: Callable) -> None:
+        # language=rst
+        """
+        Constructor for ``CachedEncoder``.
+
+        :param inputs: Cached spike trains of ``images``.
+        :param images: Tensor (or ``ImageView``) of shape ``[n_examples, ...]`` of the cached input intensities.
+        :param fallback: Encoder of inputs not in the cache; e.g., ``KeyedPoisson``.
+        """
+        self.inputs = inputs
+        self.images = images
+        self.fallback = fallback
+        self.index = 0
+        self.offset = 0
+
+    def start(self, index: int) -> None:
+        # language=rst
+        """
+        Moves on to the example (or batch of examples starting at) ``index``.
+        """
+        self.index = index
+        self.offset = 0
+        if hasattr(self.fallback, 'start'):
+            self.fallback.start(index)
+
+    def __call__(self, datum: torch.Tensor, time: int, dt: float = 1.0, **kwargs) -> torch.Tensor:
+        # language=rst
+        """
+        Encodes a single example; same signature and output shape as ``poisson``.
+        """
+        steps = int(time / dt)
+        index = self.index % len(self.inputs)
+        offset, self.offset = self.offset, self.offset + steps
+
+        cached = self.images[index].contiguous().view(-1).cpu()
+        if offset + steps <= self.inputs.time and torch.equal(datum.view(-1).cpu(), cached):
+            return self.inputs[index][offset:offset + steps].view(steps, *datum.shape).to(datum.device)
+
+        return self.fallback(datum=datum, time=time, dt=dt)
+
+    def batch(self, data: torch.Tensor, time: int, dt: float = 1.0, **kwargs) -> torch.Tensor:
+        # language=rst
+        """
+        Encodes a batch of consecutive examples; output of shape ``[time, batch_size, ...]``.
+        """
+        steps = int(time / dt)
+        indices = torch.arange(self.index, self.index + data.size(0)) % len(self.inputs)
+        offset, self.offset = self.offset, self.offset + steps
+
+        flat = data.contiguous().view(data.size(0), -1).cpu()
+        if offset + steps <= self.inputs.time:
+            cached = (flat == self.images[indices].contiguous().view(data.size(0), -1).cpu()).all(1)
+        else:
+            cached = torch.zeros(data.size(0), dtype=torch.bool)
+
+        if cached.all():
+            spikes = self.inputs[indices.tolist()][offset:offset + steps]
+        else:
+            # Encode the whole batch with the fallback to keep its random streams aligned, then overwrite.
+            if hasattr(self.fallback, 'batch'):
+                spikes = self.fallback.batch(data, time=time, dt=dt)
+            else:
+                spikes = torch.stack([self.fallback(datum=datum, time=time, dt=dt) for datum in data], dim=1)
+
+            spikes = spikes.contiguous().view(steps, data.size(0), -1).cpu()
+            if cached.any():
+                spikes[:, cached] = self.inputs[indices[cached].tolist()][offset:offset + steps]
+
+        return spikes.view(steps, *data.shape).to(data.device)
+
+
+def main(dataset='mnist', split='train', crop=4, intensity=0.5, time=250, dt=1.0, encoder='poisson', seed=0):
+    # Same preprocessing as the experiment scripts.
+    images, _ = load(dataset, split, crop=crop, intensity=intensity)
+
+    inputs = EncodedInputs.build(images, dataset, split, crop, intensity, time, dt=dt, encoder=encoder, seed=seed)
+    print(f'{len(inputs)} encoded examples in {inputs.path}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dataset', type=str, default='mnist', choices=['mnist', 'fashion_mnist'])
+    parser.add_argument('--split', type=str, default='train', choices=['train', 'test'])
+    parser.add_argument('--crop', type=int, default=4)
+    parser.add_argument('--intensity', type=float, default=0.5)
+    parser.add_argument('--time', type=int, default=250)
+    parser.add_argument('--dt', type=float, default=1.0)
+    parser.add_argument('--encoder', type=str, default='poisson', choices=list(ENCODERS))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    main(**vars(args))
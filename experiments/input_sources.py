@@ -0,0 +1,189 @@
+import torch
+
+from typing import Optional, Union
+
+from experiments.encoding import rank_order_times
+
+
+class InputSource:
+    # language=rst
+    """
+    Lazy input of an ``Input`` layer for ``Network.run``: looks like a ``[time, *shape]`` tensor to the simulation
+    loop, which indexes it once per time step (``inpts[name][t]``), but produces each time step's input on demand
+    instead of materializing all of them. Memory is ``O(n)`` rather than ``O(time * n)`` per example. Time steps must
+    be read in order, starting from ``0``; reading step ``0`` again restarts the input.
+    """
+
+    def __init__(self, shape: torch.Size, time: int, dt: float = 1.0) -> None:
+        # language=rst
+        """
+        Constructor for ``InputSource``.
+
+        :param shape: Shape of the input at a single time step.
+        :param time: Length of the input.
+        :param dt: Simulation time step.
+        """
+        self.shape = torch.Size([int(time / dt), *shape])
+
+    def reset(self) -> None:
+        # language=rst
+        """
+        Restarts the input from time step ``0``.
+        """
+        pass
+
+    def step(self, t: int) -> torch.Tensor:
+        # language=rst
+        """
+        Produces the input of time step ``t``.
+        """
+        raise NotImplementedError
+
+    def __getitem__(self, t: Union[int, slice]) -> torch.Tensor:
+        if isinstance(t, slice):
+            return torch.stack([self[i] for i in range(*t.indices(len(self)))])
+
+        if t < 0:
+            t += len(self)
+
+        if t == 0:
+            self.reset()
+
+        return self.step(t)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def size(self, dim: Optional[int] = None) -> Union[torch.Size, int]:
+        return self.shape if dim is None else self.shape[dim]
+
+    def dim(self) -> int:
+        return len(self.shape)
+
+    def materialize(self) -> torch.Tensor:
+        # language=rst
+        """
+        Produces the input of all time steps as a ``[time, *shape]`` tensor, as the eager encoders return.
+        """
+        return self[:]
+
+
+class ConstantSource(InputSource):
+    # language=rst
+    """
+    Real-valued input held constant over the simulation; replaces ``datum.repeat(time, 1, ...)``. Every time step
+    returns the same tensor, without copying.
+    """
+
+    def __init__(self, datum: torch.Tensor, time: int, dt: float = 1.0) -> None:
+        # language=rst
+        """
+        Constructor for ``ConstantSource``.
+
+        :param datum: Input at every time step.
+        :param time: Length of the input.
+        :param dt: Simulation time step.
+        """
+        super().__init__(datum.shape, time, dt)
+        self.datum = datum
+
+    def step(self, t: int) -> torch.Tensor:
+        return self.datum
+
+
+class BernoulliSource(InputSource):
+    # language=rst
+    """
+    Bernoulli spike trains, as ``bernoulli`` encodes them: each input spikes independently at every time step, with
+    probability proportional to its intensity, scaled so that the most intense input spikes with ``max_prob``.
+    """
+
+    def __init__(self, datum: torch.Tensor, time: int, dt: float = 1.0, max_prob: float = 1.0,
+                 generator: Optional[torch.Generator] = None) -> None:
+        # language=rst
+        """
+        Constructor for ``BernoulliSource``.
+
+        :param datum: Tensor of non-negative input intensities.
+        :param time: Length of the spike trains.
+        :param dt: Simulation time step.
+        :param max_prob: Spike probability of the most intense input.
+        :param generator: Optional random number generator.
+        """
+        super().__init__(datum.shape, time, dt)
+        self.p = max_prob * datum.float() / datum.max().float()
+        self.generator = generator
+
+    def step(self, t: int) -> torch.Tensor:
+        return torch.bernoulli(self.p, generator=self.generator).byte()
+
+
+class PoissonSource(InputSource):
+    # language=rst
+    """
+    Poisson spike trains, as ``bindsnet.encoding.poisson`` encodes them: inter-spike intervals are Poisson-distributed
+    with mean ``1000 / (intensity * dt)`` time steps, with zero intervals raised to one, and the ``n``-th spike falls
+    on time step ``t_n`` (0-indexed), where ``t_n`` is the sum of the first ``n`` intervals; so no input spikes on time
+    step 0. Keeps only the time step of every input's next spike, and samples the following interval when it spikes.
+    """
+
+    def __init__(self, datum: torch.Tensor, time: int, dt: float = 1.0,
+                 generator: Optional[torch.Generator] = None) -> None:
+        # language=rst
+        """
+        Constructor for ``PoissonSource``.
+
+        :param datum: Tensor of non-negative input intensities.
+        :param time: Length of the spike trains.
+        :param dt: Simulation time step.
+        :param generator: Optional random number generator.
+        """
+        super().__init__(datum.shape, time, dt)
+        self.generator = generator
+
+        # Mean inter-spike intervals; inputs with zero intensity never spike.
+        datum = datum.float()
+        self.nonzero = datum != 0
+        self.rate = torch.zeros_like(datum)
+        self.rate[self.nonzero] = 1 / datum[self.nonzero] * (1000 / dt)
+        self.reset()
+
+    def reset(self) -> None:
+        # First spike times (time step of the n-th spike is the sum of n intervals).
+        self.next = self._intervals(self.rate)
+        self.next[~self.nonzero] = float('inf')
+
+    def _intervals(self, rate: torch.Tensor) -> torch.Tensor:
+        intervals = torch.poisson(rate, generator=self.generator)
+        return intervals + (intervals == 0).float()
+
+    def step(self, t: int) -> torch.Tensor:
+        spikes = self.next == t
+        if spikes.any():
+            self.next[spikes] += self._intervals(self.rate[spikes])
+
+        return spikes.byte()
+
+
+class RankOrderSource(InputSource):
+    # language=rst
+    """
+    Rank order spike trains, as ``rank_order`` encodes them: one spike per input, in order of decreasing intensity.
+    Keeps only the spike time of every input.
+    """
+
+    def __init__(self, datum: torch.Tensor, time: int, dt: float = 1.0) -> None:
+        # language=rst
+        """
+        Constructor for ``RankOrderSource``.
+
+        :param datum: Tensor of non-negative input intensities.
+        :param time: Length of the spike trains.
+        :param dt: Simulation time step.
+        """
+        super().__init__(datum.shape, time, dt)
+        self.times = rank_order_times(datum, time, dt).view(datum.shape)
+
+    def step(self, t: int) -> torch.Tensor:
+        # Spike times count from 1; 0 marks inputs that never spike.
+        return (self.times == t + 1).byte()
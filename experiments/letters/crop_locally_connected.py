@@ -8,10 +8,7 @@ import matplotlib.pyplot as plt
 from time import time as t
 from sklearn.metrics import confusion_matrix
 
-from torchvision.datasets import EMNIST
-
 from bindsnet.learning import NoOp, PostPre
-from bindsnet.encoding import poisson
 from bindsnet.network import load_network
 from bindsnet.network.monitors import Monitor
 from bindsnet.models import LocallyConnectedNetwork
@@ -19,12 +16,13 @@ from bindsnet.evaluation import assign_labels, update_ngram_scores
 from bindsnet.analysis.plotting import plot_locally_connected_weights, plot_spikes, plot_input
 
 from experiments import ROOT_DIR
-from experiments.utils import update_curves, print_results
+from experiments.prepared_data import load
+from experiments.utils import update_curves, print_results, IntensityController, SpikeRecord
+from experiments.results import write_results
 
 model = 'crop_locally_connected'
 data = 'letters'
 
-data_path = os.path.join(ROOT_DIR, 'data', 'EMNIST')
 params_path = os.path.join(ROOT_DIR, 'params', data, model)
 curves_path = os.path.join(ROOT_DIR, 'curves', data, model)
 results_path = os.path.join(ROOT_DIR, 'results', data, model)
@@ -95,31 +93,18 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     voltage_monitor = Monitor(network.layers['Y'], ['v'], time=time)
     network.add_monitor(voltage_monitor, name='output_voltage')
 
-    # Load EMNIST data.
-    dataset = EMNIST(root=data_path, split='letters', train=train, download=True)
-
-    if train:
-        images = dataset.train_data.float()
-        labels = dataset.train_labels.long()
-    else:
-        images = dataset.test_data.float()
-        labels = dataset.test_labels.long()
-
-    if gpu:
-        images = images.cuda()
-        labels = labels.cuda()
+    # Load EMNIST data, cropped and scaled by intensity lazily as examples are read.
+    images, labels = load(
+        data, 'train' if train else 'test', crop=crop, intensity=intensity, device='cuda' if gpu else 'cpu'
+    )
 
     permutation = torch.randperm(images.size(0))
-    images = images[permutation]
+    images = images.take(permutation)
     labels = labels[permutation]
-    images *= intensity
     labels -= 1
 
-    if crop != 0:
-        images = images[:, crop:-crop, crop:-crop]
-
-    # Record spikes during the simulation.
-    spike_record = torch.zeros(update_interval, time, n_neurons)
+    # Record spikes during the simulation (bit-packed).
+    spike_record = SpikeRecord(update_interval, time, n_neurons)
 
     # Neuron assignments and spike proportions.
     if train:
@@ -157,6 +142,9 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     inpt_ims = None
     inpt_axes = None
 
+    # Escalates input intensity during simulation of examples with too little output activity.
+    controller = IntensityController(network, spikes['Y'], time=time, dt=dt)
+
     start = t()
     for i in range(n_examples):
         if i % progress_interval == 0:
@@ -199,7 +187,7 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
                     best_accuracy = max([x[-1] for x in curves.values()])
 
                 # Assign labels to excitatory layer neurons.
-                assignments, proportions, rates = assign_labels(spike_record, current_labels, n_classes, rates)
+                assignments, proportions, rates = assign_labels(spike_record.counts(), current_labels, n_classes, rates)
 
                 # Compute ngram scores.
                 ngram_scores = update_ngram_scores(spike_record, current_labels, n_classes, 2, ngram_scores)
@@ -208,19 +196,9 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
 
         # Get next input sample.
         image = images[i % len(images)].contiguous().view(-1)
-        sample = poisson(datum=image, time=time, dt=dt)
-        inpts = {'X': sample}
 
-        # Run the network on the input.
-        network.run(inpts=inpts, time=time)
-
-        retries = 0
-        while spikes['Y'].get('s').sum() < 5 and retries < 3:
-            retries += 1
-            image *= 2
-            sample = poisson(datum=image, time=time, dt=dt)
-            inpts = {'X': sample}
-            network.run(inpts=inpts, time=time)
+        # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+        controller.run(image)
 
         # Add to spikes recording.
         spike_record[i % update_interval] = spikes['Y'].get('s').t()
@@ -228,7 +206,7 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
         # Optionally plot various simulation information.
         if plot:
             _input = image.view(side_length, side_length)
-            reconstruction = inpts['X'].view(time, side_length ** 2).sum(0).view(side_length, side_length)
+            reconstruction = controller.sample.view(time, side_length ** 2).sum(0).view(side_length, side_length)
             _spikes = {
                 'X': spikes['X'].get('s').view(side_length ** 2, time),
                 'Y': spikes['Y'].get('s').view(n_filters * conv_prod, time)
@@ -296,23 +274,20 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,inhib,time,timestep,theta_plus,'
-                    'theta_decay,intensity,norm,progress_interval,update_interval,mean_all_activity,'
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
-                )
-            else:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,n_test,inhib,time,timestep,'
-                    'theta_plus,theta_decay,intensity,norm,progress_interval,update_interval,mean_all_activity,'
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
-                )
-
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    if train:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,inhib,time,timestep,theta_plus,'
+            'theta_decay,intensity,norm,progress_interval,update_interval,mean_all_activity,'
+            'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
+        )
+    else:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,n_test,inhib,time,timestep,'
+            'theta_plus,theta_decay,intensity,norm,progress_interval,update_interval,mean_all_activity,'
+            'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
+        )
+
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
@@ -10,7 +10,6 @@ from sklearn.metrics import confusion_matrix
 from torchvision.datasets import EMNIST
 
 from bindsnet.learning import NoOp
-from bindsnet.encoding import poisson
 from bindsnet.network import load_network
 from bindsnet.network.monitors import Monitor
 from bindsnet.models import DiehlAndCook2015v2
@@ -20,7 +19,8 @@ from bindsnet.utils import get_square_weights, get_square_assignments
 from bindsnet.analysis.plotting import plot_input, plot_spikes, plot_weights, plot_assignments, plot_performance
 
 from experiments import ROOT_DIR
-from experiments.utils import update_curves, print_results
+from experiments.utils import update_curves, print_results, IntensityController
+from experiments.results import write_results
 
 model = 'weight_dependent_dac'
 data = 'letters'
@@ -144,6 +144,9 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=100, lr=1e-2,
     assigns_im = None
     perf_ax = None
 
+    # Escalates input intensity during simulation of examples with too little output activity.
+    controller = IntensityController(network, spikes['Y'], time=time, dt=dt)
+
     start = t()
     for i in range(n_examples):
         if i % progress_interval == 0:
@@ -194,19 +197,9 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=100, lr=1e-2,
 
         # Get next input sample.
         image = images[i % len(images)]
-        sample = poisson(datum=image, time=time, dt=dt)
-        inpts = {'X': sample}
-
-        # Run the network on the input.
-        network.run(inpts=inpts, time=time)
 
-        retries = 0
-        while spikes['Y'].get('s').sum() < 5 and retries < 3:
-            retries += 1
-            image *= 2
-            sample = poisson(datum=image, time=time, dt=dt)
-            inpts = {'X': sample}
-            network.run(inpts=inpts, time=time)
+        # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+        controller.run(image)
 
         # Add to spikes recording.
         spike_record[i % update_interval] = spikes['Y'].get('s').t()
@@ -283,23 +276,20 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=100, lr=1e-2,
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                f.write(
-                    'random_seed,n_neurons,n_train,inhib,lr,lr_decay,time,timestep,theta_plus,theta_decay,intensity,'
-                    'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                    'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
-                )
-            else:
-                f.write(
-                    'random_seed,n_neurons,n_train,n_test,inhib,lr,lr_decay,time,timestep,theta_plus,theta_decay,'
-                    'intensity,progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                    'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
-                )
-
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    if train:
+        header = (
+            'random_seed,n_neurons,n_train,inhib,lr,lr_decay,time,timestep,theta_plus,theta_decay,intensity,'
+            'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+            'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
+        )
+    else:
+        header = (
+            'random_seed,n_neurons,n_train,n_test,inhib,lr,lr_decay,time,timestep,theta_plus,theta_decay,'
+            'intensity,progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+            'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
+        )
+
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
@@ -20,6 +20,9 @@ from bindsnet.learning import WeightDependentPostPre
 from bindsnet.analysis.plotting import plot_input, plot_spikes, plot_weights, plot_voltages
 
 from experiments import ROOT_DIR
+from experiments.inhibition import constant_inhibition
+from experiments.results import write_results
+from experiments.utils import IntensityController
 
 model = 'antihebb_unclamp_dac'
 data = 'mnist'
@@ -86,7 +89,7 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, lr=1e-2,
         )
         network.add_connection(input_connection, source='X', target='Y')
 
-        w = -inhib * (torch.ones(n_neurons, n_neurons) - torch.diag(torch.ones(n_neurons)))
+        w = constant_inhibition(n_neurons, inhib)
         recurrent_connection = Connection(
             source=network.layers['Y'], target=network.layers['Y'], w=w, wmin=-inhib, wmax=0,
             update_rule=WeightDependentPostPre, nu=[0, -100 * lr], norm=inhib / 2 * n_neurons
@@ -159,6 +162,9 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, lr=1e-2,
     predictions = torch.zeros(n_examples)
     corrects = torch.zeros(n_examples)
 
+    # Escalates input intensity during simulation of test examples with too little output activity.
+    controller = IntensityController(network, monitors['Y'], time=time, dt=dt, min_spikes=1, factor=1.5)
+
     start = t()
     for i in range(n_examples):
         if i % progress_interval == 0:
@@ -172,27 +178,14 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, lr=1e-2,
         # Get next input sample.
         image = images[i % len(images)]
         label = labels[i % len(images)].item()
-        sample = poisson(datum=image, time=time, dt=dt)
-        inpts = {'X': sample}
 
-        # Run the network on the input.
+        # Run the network on the input; in the test phase, escalate intensity part-way through if the output is quiet.
         if train:
+            sample = poisson(datum=image, time=time, dt=dt)
+            inpts = {'X': sample}
             network.run(inpts=inpts, time=time, unclamp={'Y': unclamps[label]}, masks=masks)
         else:
-            network.run(inpts=inpts, time=time)
-
-        if not train:
-            retries = 0
-            while monitors['Y'].get('s').sum() == 0 and retries < 3:
-                retries += 1
-                image *= 1.5
-                sample = poisson(datum=image, time=time, dt=dt)
-                inpts = {'X': sample}
-
-                if train:
-                    network.run(inpts=inpts, time=time, unclamp={'Y': unclamps[label]}, masks=masks)
-                else:
-                    network.run(inpts=inpts, time=time)
+            controller.run(image)
 
         output = monitors['Y'].get('s')
         summed_neurons = output.sum(dim=1).view(n_classes, per_class)
@@ -243,21 +236,18 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, lr=1e-2,
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                f.write(
-                    'random_seed,n_neurons,n_train,inhib,lr,lr_decay,time,timestep,theta_plus,'
-                    'theta_decay,intensity,progress_interval,update_interval,accuracy\n'
-                )
-            else:
-                f.write(
-                    'random_seed,n_neurons,n_train,n_test,inhib,lr,lr_decay,time,timestep,'
-                    'theta_plus,theta_decay,intensity,progress_interval,update_interval,accuracy\n'
-                )
+    if train:
+        header = (
+            'random_seed,n_neurons,n_train,inhib,lr,lr_decay,time,timestep,theta_plus,'
+            'theta_decay,intensity,progress_interval,update_interval,accuracy\n'
+        )
+    else:
+        header = (
+            'random_seed,n_neurons,n_train,n_test,inhib,lr,lr_decay,time,timestep,'
+            'theta_plus,theta_decay,intensity,progress_interval,update_interval,accuracy\n'
+        )
 
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
@@ -14,12 +14,14 @@ from bindsnet.network.monitors import Monitor
 from bindsnet.network import Network, load_network
 from bindsnet.evaluation import logreg_fit
 from bindsnet.learning import WeightDependentPostPre, NoOp
-from bindsnet.network.topology import Connection, Conv2dConnection
+from bindsnet.network.topology import Conv2dConnection
 from bindsnet.network.nodes import Input, DiehlAndCookNodes, LIFNodes
 from bindsnet.analysis.plotting import plot_input, plot_spikes, plot_conv2d_weights
 
 from experiments import ROOT_DIR
+from experiments.inhibition import LateralInhibitionConnection
 from experiments.utils import print_results, update_curves
+from experiments.results import write_results
 
 model = 'conv'
 data = 'mnist'
@@ -95,16 +97,7 @@ def main(seed=0, n_train=60000, n_test=10000, kernel_size=(16,), stride=(4,), n_
             stride=stride, update_rule=None, wmax=0.25
         )
 
-        w = -inhib * torch.ones(
-            n_filters, conv_size[0], conv_size[1], n_filters, conv_size[0], conv_size[1]
-        )
-        for f in range(n_filters):
-            for i in range(conv_size[0]):
-                for j in range(conv_size[1]):
-                    w[f, i, j, f, i, j] = 0
-
-        w = w.view(n_filters * conv_size[0] * conv_size[1], n_filters * conv_size[0] * conv_size[1])
-        recurrent_conn = Connection(conv_layer, conv_layer, w=w)
+        recurrent_conn = LateralInhibitionConnection(conv_layer, conv_layer, inhib=inhib)
 
         network.add_layer(input_layer, name='X')
         network.add_layer(conv_layer, name='Y')
@@ -320,27 +313,22 @@ def main(seed=0, n_train=60000, n_test=10000, kernel_size=(16,), stride=(4,), n_
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                columns = [
-                    'seed', 'n_train', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time',
-                    'lr', 'lr_decay', 'dt', 'intensity', 'update_interval', 'mean_logreg', 'std_logreg'
-                ]
+    if train:
+        columns = [
+            'seed', 'n_train', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time',
+            'lr', 'lr_decay', 'dt', 'intensity', 'update_interval', 'mean_logreg', 'std_logreg'
+        ]
 
-                header = ','.join(columns) + '\n'
-                f.write(header)
-            else:
-                columns = [
-                    'seed', 'n_train', 'n_test', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time',
-                    'lr', 'lr_decay', 'dt', 'intensity', 'update_interval', 'mean_logreg', 'std_logreg'
-                ]
+        header = ','.join(columns) + '\n'
+    else:
+        columns = [
+            'seed', 'n_train', 'n_test', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time',
+            'lr', 'lr_decay', 'dt', 'intensity', 'update_interval', 'mean_logreg', 'std_logreg'
+        ]
 
-                header = ','.join(columns) + '\n'
-                f.write(header)
+        header = ','.join(columns) + '\n'
 
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
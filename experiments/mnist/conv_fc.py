@@ -20,7 +20,9 @@ from bindsnet.analysis.plotting import plot_input, plot_spikes, plot_conv2d_weig
 from bindsnet.utils import get_square_assignments
 
 from experiments import ROOT_DIR
+from experiments.inhibition import constant_inhibition, LateralInhibitionConnection
 from experiments.utils import print_results, update_curves
+from experiments.results import write_results
 
 model = 'conv'
 data = 'mnist'
@@ -101,16 +103,7 @@ def main(seed=0, n_train=60000, n_test=10000, kernel_size=(8,), stride=(4,), n_f
             kernel_size=kernel_size, stride=stride, nu=[0, 0], wmax=2.0
         )
 
-        w = -inhib * torch.ones(
-            n_filters, conv_size[0], conv_size[1], n_filters, conv_size[0], conv_size[1]
-        )
-        for f in range(n_filters):
-            for i in range(conv_size[0]):
-                for j in range(conv_size[1]):
-                    w[f, i, j, f, i, j] = 0
-
-        w = w.view(n_filters * conv_size[0] * conv_size[1], n_filters * conv_size[0] * conv_size[1])
-        recurrent_conn = Connection(conv_layer, conv_layer, w=w)
+        recurrent_conn = LateralInhibitionConnection(conv_layer, conv_layer, inhib=inhib)
 
         full_layer = DiehlAndCookNodes(
             n=n_full, thresh=-52.0, traces=True, theta_plus=0.05, refrac=0
@@ -125,7 +118,7 @@ def main(seed=0, n_train=60000, n_test=10000, kernel_size=(8,), stride=(4,), n_f
             conv_layer_prime, full_layer_prime, 0, wmax=1
         )
 
-        w = -inhib * (torch.ones(n_full, n_full) - torch.diag(torch.ones(n_full)))
+        w = constant_inhibition(n_full, inhib)
         recurrent_conn2 = Connection(full_layer, full_layer, w=w)
 
         network.add_layer(input_layer, name='X')
@@ -363,31 +356,26 @@ def main(seed=0, n_train=60000, n_test=10000, kernel_size=(8,), stride=(4,), n_f
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                columns = [
-                    'seed', 'n_train', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time',
-                    'lr', 'lr_decay', 'dt', 'intensity', 'update_interval', 'mean_all_activity',
-                    'mean_proportion_weighting', 'mean_logreg', 'max_all_activity', 'max_proportion_weighting',
-                    'max_logreg'
-                ]
-
-                header = ','.join(columns) + '\n'
-                f.write(header)
-            else:
-                columns = [
-                    'seed', 'n_train', 'n_test', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time',
-                    'lr', 'lr_decay', 'dt', 'intensity', 'update_interval', 'mean_all_activity',
-                    'mean_proportion_weighting', 'mean_logreg', 'max_all_activity', 'max_proportion_weighting',
-                    'max_logreg'
-                ]
-
-                header = ','.join(columns) + '\n'
-                f.write(header)
-
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    if train:
+        columns = [
+            'seed', 'n_train', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time',
+            'lr', 'lr_decay', 'dt', 'intensity', 'update_interval', 'mean_all_activity',
+            'mean_proportion_weighting', 'mean_logreg', 'max_all_activity', 'max_proportion_weighting',
+            'max_logreg'
+        ]
+
+        header = ','.join(columns) + '\n'
+    else:
+        columns = [
+            'seed', 'n_train', 'n_test', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time',
+            'lr', 'lr_decay', 'dt', 'intensity', 'update_interval', 'mean_all_activity',
+            'mean_proportion_weighting', 'mean_logreg', 'max_all_activity', 'max_proportion_weighting',
+            'max_logreg'
+        ]
+
+        header = ','.join(columns) + '\n'
+
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
@@ -20,6 +20,7 @@ from bindsnet.analysis.plotting import plot_input, plot_spikes, plot_conv2d_weig
 
 from experiments import ROOT_DIR
 from experiments.utils import print_results, update_curves
+from experiments.results import write_results
 
 model = 'conv'
 data = 'mnist'
@@ -384,31 +385,26 @@ def main(seed=0, n_train=60000, n_test=10000, kernel_size=(8,), kernel_size2=(4,
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                columns = [
-                    'seed', 'n_train', 'kernel_size', 'stride', 'n_filters', 'n_filters2', 'padding', 'inhib', 'time',
-                    'lr', 'lr_decay', 'dt', 'intensity', 'update_interval', 'mean_all_activity',
-                    'mean_proportion_weighting', 'mean_logreg', 'max_all_activity', 'max_proportion_weighting',
-                    'max_logreg'
-                ]
-
-                header = ','.join(columns) + '\n'
-                f.write(header)
-            else:
-                columns = [
-                    'seed', 'n_train', 'n_test', 'kernel_size', 'stride', 'n_filters', 'n_filters2', 'padding',
-                    'inhib', 'time', 'lr', 'lr_decay', 'dt', 'intensity', 'update_interval', 'mean_all_activity',
-                    'mean_proportion_weighting', 'mean_logreg', 'max_all_activity', 'max_proportion_weighting',
-                    'max_logreg'
-                ]
-
-                header = ','.join(columns) + '\n'
-                f.write(header)
-
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    if train:
+        columns = [
+            'seed', 'n_train', 'kernel_size', 'stride', 'n_filters', 'n_filters2', 'padding', 'inhib', 'time',
+            'lr', 'lr_decay', 'dt', 'intensity', 'update_interval', 'mean_all_activity',
+            'mean_proportion_weighting', 'mean_logreg', 'max_all_activity', 'max_proportion_weighting',
+            'max_logreg'
+        ]
+
+        header = ','.join(columns) + '\n'
+    else:
+        columns = [
+            'seed', 'n_train', 'n_test', 'kernel_size', 'stride', 'n_filters', 'n_filters2', 'padding',
+            'inhib', 'time', 'lr', 'lr_decay', 'dt', 'intensity', 'update_interval', 'mean_all_activity',
+            'mean_proportion_weighting', 'mean_logreg', 'max_all_activity', 'max_proportion_weighting',
+            'max_logreg'
+        ]
+
+        header = ','.join(columns) + '\n'
+
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
@@ -6,41 +6,54 @@ import matplotlib.pyplot as plt
 
 from time import time as t
 
+from torch.nn.modules.utils import _pair
 from sklearn.metrics import confusion_matrix
 
-from bindsnet.learning import NoOp
-from bindsnet.datasets import MNIST
-from bindsnet.encoding import poisson
-from bindsnet.network import load_network
+from bindsnet.learning import NoOp, PostPre
 from bindsnet.network.monitors import Monitor
-from bindsnet.models import LocallyConnectedNetwork
-from bindsnet.evaluation import assign_labels, update_ngram_scores
+from bindsnet.network import load_network, Network
+from bindsnet.network.nodes import Input, DiehlAndCookNodes
+from bindsnet.network.topology import LocallyConnectedConnection
 from bindsnet.analysis.plotting import plot_locally_connected_weights, plot_spikes
 
 from experiments import ROOT_DIR
-from experiments.utils import update_curves, print_results
+from experiments.encoding import KeyedPoisson
+from experiments.evaluation import NgramTable
+from experiments.inhibition import LateralInhibitionConnection
+from experiments.input_cache import EncodedInputs, CachedEncoder
+from experiments.prepared_data import load
+from experiments.profiling import NetworkProfiler
+from experiments.spike_archive import SpikeArchiveWriter
+from experiments.utils import update_curves, print_results, IntensityController, StreamingEvaluator, Telemetry, \
+    ParallelSimulator
+from experiments.results import write_results
 
 model = 'crop_locally_connected'
 data = 'mnist'
 
-data_path = os.path.join(ROOT_DIR, 'data', 'MNIST')
 params_path = os.path.join(ROOT_DIR, 'params', data, model)
 spikes_path = os.path.join(ROOT_DIR, 'spikes', data, model)
 curves_path = os.path.join(ROOT_DIR, 'curves', data, model)
 results_path = os.path.join(ROOT_DIR, 'results', data, model)
 confusion_path = os.path.join(ROOT_DIR, 'confusion', data, model)
+profiles_path = os.path.join(ROOT_DIR, 'profiles', data, model)
+telemetry_path = os.path.join(ROOT_DIR, 'telemetry', data, model)
 
-for path in [params_path, spikes_path, curves_path, results_path, confusion_path]:
+for path in [
+    params_path, spikes_path, curves_path, results_path, confusion_path, profiles_path, telemetry_path
+]:
     if not os.path.isdir(path):
         os.makedirs(path)
 
 
 def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stride=(2,), time=100, n_filters=25, crop=0,
          lr=1e-2, lr_decay=0.99, dt=1, theta_plus=0.05, theta_decay=1e-7, intensity=5, norm=0.2, progress_interval=10,
-         update_interval=250, train=True, plot=False, gpu=False):
+         update_interval=250, train=True, plot=False, gpu=False, save_spikes=False, profile=False,
+         cache_inputs=False, workers=1):
 
     assert n_train % update_interval == 0 and n_test % update_interval == 0, \
         'No. examples must be divisible by update_interval'
+    assert workers == 1 or not (train or profile), 'Parallel simulation is only supported in the unprofiled test phase'
 
     params = [
         seed, kernel_size, stride, n_filters, crop, lr, lr_decay, n_train, inhib, time, dt,
@@ -70,11 +83,34 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
 
     # Build network.
     if train:
-        network = LocallyConnectedNetwork(
-            n_inpt=n_inpt, input_shape=[side_length, side_length], kernel_size=kernel_size, stride=stride,
-            n_filters=n_filters, inh=inhib, dt=dt, nu=[0, lr], theta_plus=theta_plus,
-            theta_decay=theta_decay, wmin=0.0, wmax=1.0, norm=norm
+        # The layers and input connection of ``LocallyConnectedNetwork``, with its dense recurrent inhibition (across
+        # filters at each location) replaced by the implicit equivalent.
+        input_shape = [side_length, side_length]
+        if _pair(kernel_size) == input_shape:
+            conv_size = [1, 1]
+        else:
+            conv_size = (int((input_shape[0] - _pair(kernel_size)[0]) / _pair(stride)[0]) + 1,
+                         int((input_shape[1] - _pair(kernel_size)[1]) / _pair(stride)[1]) + 1)
+
+        network = Network(dt=dt)
+
+        input_layer = Input(n=n_inpt, traces=True, trace_tc=5e-2)
+        output_layer = DiehlAndCookNodes(
+            n=n_filters * conv_size[0] * conv_size[1], traces=True, rest=-65.0, reset=-60.0,
+            thresh=-52.0, refrac=5, decay=1e-2, trace_tc=5e-2, theta_plus=theta_plus, theta_decay=theta_decay
         )
+        input_output_conn = LocallyConnectedConnection(
+            input_layer, output_layer, kernel_size=kernel_size, stride=stride, n_filters=n_filters,
+            nu=[0, lr], update_rule=PostPre, wmin=0, wmax=1, norm=norm, input_shape=input_shape
+        )
+        recurrent_conn = LateralInhibitionConnection(
+            output_layer, output_layer, inhib=inhib, scope='location', n_filters=n_filters
+        )
+
+        network.add_layer(input_layer, name='X')
+        network.add_layer(output_layer, name='Y')
+        network.add_connection(input_output_conn, source='X', target='Y')
+        network.add_connection(recurrent_conn, source='Y', target='Y')
     else:
         network = load_network(os.path.join(params_path, model_name + '.pt'))
         network.connections['X', 'Y'].update_rule = NoOp(
@@ -92,19 +128,12 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     voltage_monitor = Monitor(network.layers['Y'], ['v'], time=time)
     network.add_monitor(voltage_monitor, name='output_voltage')
 
-    # Load MNIST data.
-    dataset = MNIST(path=data_path, download=True)
-
-    if train:
-        images, labels = dataset.get_train()
-    else:
-        images, labels = dataset.get_test()
-
-    images *= intensity
-    images = images[:, crop:-crop, crop:-crop]
+    # Load MNIST data, cropped and scaled by intensity lazily as examples are read.
+    images, labels = load(
+        data, 'train' if train else 'test', crop=crop, intensity=intensity, device='cuda' if gpu else 'cpu'
+    )
 
-    # Record spikes during the simulation.
-    spike_record = torch.zeros(update_interval, time, n_neurons)
+    # Record spike counts during the simulation.
     full_spike_record = torch.zeros(n_examples, n_neurons).long()
 
     # Neuron assignments and spike proportions.
@@ -112,10 +141,17 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
         assignments = -torch.ones_like(torch.Tensor(n_neurons))
         proportions = torch.zeros_like(torch.Tensor(n_neurons, n_classes))
         rates = torch.zeros_like(torch.Tensor(n_neurons, n_classes))
-        ngram_scores = {}
+        ngram_scores = NgramTable(n_neurons, n_classes, n=2)
     else:
         path = os.path.join(params_path, '_'.join(['auxiliary', model_name]) + '.pt')
         assignments, proportions, rates, ngram_scores = torch.load(open(path, 'rb'))
+        ngram_scores = NgramTable.from_dict(ngram_scores, n_neurons, n_classes, n=2)
+
+    # Classify each example and fold its activity into label assignments as soon as it has been simulated.
+    evaluator = StreamingEvaluator(
+        n_neurons, n_classes, n=2, learn=train, assignments=assignments, proportions=proportions, rates=rates,
+        ngram_scores=ngram_scores
+    )
 
     if train:
         best_accuracy = 0
@@ -141,12 +177,51 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     spike_axes = None
     weights_im = None
 
+    # Input spike trains are drawn from per-example random streams, so they don't depend on the order of simulation.
+    encoder = KeyedPoisson(seed)
+
+    # Optionally stream input spike trains encoded once per input configuration, shared by all runs that use it.
+    if cache_inputs:
+        inputs = EncodedInputs.build(
+            images, data, 'train' if train else 'test', crop, intensity, time, dt=dt, encoder='poisson', seed=seed
+        )
+        encoder = CachedEncoder(inputs, images, fallback=encoder)
+
+    # Escalates input intensity during simulation of examples with too little output activity.
+    controller = IntensityController(network, spikes['Y'], time=time, dt=dt, encoder=encoder)
+
+    # Optionally simulate test examples on a pool of network copies; examples are independent without learning.
+    simulator = ParallelSimulator(controller, images, spikes, workers) if workers > 1 else None
+
+    # Optionally archive the output spike trains of all examples.
+    if save_spikes:
+        to_write = ['train'] + params if train else ['test'] + test_params
+        name = '_'.join([str(x) for x in to_write])
+        archive = SpikeArchiveWriter(
+            os.path.join(spikes_path, name + '.spk'), time=time, n_neurons=n_neurons,
+            chunk_size=update_interval, params={'run': name}
+        )
+
+    # Optionally time the simulation per layer, connection, learning rule and monitor.
+    if profile:
+        profiler = NetworkProfiler(network, synchronize=gpu).enable()
+
+    # Throughput metrics, written at every progress_interval.
+    run_name = '_'.join([str(x) for x in (['train'] + params if train else ['test'] + test_params)])
+    telemetry = Telemetry(os.path.join(telemetry_path, run_name + '.jsonl'), run=run_name, layers=network.layers)
+
     start = t()
     for i in range(n_examples):
         if i % progress_interval == 0:
             print(f'Progress: {i} / {n_examples} ({t() - start:.4f} seconds)')
             start = t()
 
+            if i > 0:
+                telemetry.emit()
+
+            if profile and i > 0:
+                print(profiler.table())
+
         if i % update_interval == 0 and i > 0:
             if i % len(labels) == 0:
                 current_labels = labels[-update_interval:]
@@ -154,10 +229,9 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
                 current_labels = labels[i % len(images) - update_interval:i % len(images)]
 
             # Update and print accuracy evaluations.
-            curves, preds = update_curves(
-                curves, current_labels, n_classes, spike_record=spike_record, assignments=assignments,
-                proportions=proportions, ngram_scores=ngram_scores, n=2
-            )
+            with telemetry.evaluating():
+                curves, preds = update_curves(curves, current_labels, n_classes, evaluator=evaluator)
+
             print_results(curves)
 
             for scheme in preds:
@@ -178,43 +252,47 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
                     # Save network to disk.
                     network.save(os.path.join(params_path, model_name + '.pt'))
                     path = os.path.join(params_path, '_'.join(['auxiliary', model_name]) + '.pt')
-                    torch.save((assignments, proportions, rates, ngram_scores), open(path, 'wb'))
+                    torch.save((assignments, proportions, rates, ngram_scores.to_dict()), open(path, 'wb'))
 
                     best_accuracy = max([x[-1] for x in curves.values()])
 
-                # Assign labels to excitatory layer neurons.
-                assignments, proportions, rates = assign_labels(spike_record, current_labels, n_classes, rates)
-
-                # Compute ngram scores.
-                ngram_scores = update_ngram_scores(spike_record, current_labels, n_classes, 2, ngram_scores)
+                # Assign labels to excitatory layer neurons and compute ngram scores.
+                with telemetry.evaluating():
+                    assignments, proportions, rates, ngram_scores = evaluator.assign_labels()
 
             print()
 
-        # Get next input sample.
-        image = images[i % len(images)].contiguous().view(-1)
-        sample = poisson(datum=image, time=time, dt=dt)
-        inpts = {'X': sample}
+        if simulator is not None:
+            # Simulate the next update_interval examples in parallel, then record them one by one.
+            if i % update_interval == 0:
+                outputs = simulator.run(range(i, i + update_interval))
 
-        # Run the network on the input.
-        network.run(inpts=inpts, time=time)
+            record, elapsed, retries = outputs[i % update_interval]
+        else:
+            # Get next input sample.
+            image = images[i % len(images)].contiguous().view(-1)
 
-        retries = 0
-        while spikes['Y'].get('s').sum() < 5 and retries < 3:
-            retries += 1
-            image *= 2
-            sample = poisson(datum=image, time=time, dt=dt)
-            inpts = {'X': sample}
-            network.run(inpts=inpts, time=time)
+            # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+            encoder.start(i)
+            controller.run(image)
 
-        # Add to spikes recording.
-        spike_record[i % update_interval] = spikes['Y'].get('s').t()
-        full_spike_record[i] = spikes['Y'].get('s').t().sum(0).long()
+            record = {layer: spikes[layer].get('s').t() for layer in spikes}
+            elapsed, retries = controller.elapsed, controller.retries
+
+        # Classify example and add to spikes recording.
+        evaluator.add(record['Y'], labels[i % len(labels)])
+        full_spike_record[i] = record['Y'].sum(0).long()
+        telemetry.example(
+            timesteps=elapsed, retries=retries, spikes={layer: record[layer].sum().item() for layer in record}
+        )
+        if save_spikes:
+            archive.write(record['Y'], labels[i % len(labels)])
 
         # Optionally plot various simulation information.
         if plot:
             _spikes = {
-                'X': spikes['X'].get('s').view(side_length ** 2, time),
-                'Y': spikes['Y'].get('s').view(n_filters * conv_prod, time)
+                'X': record['X'].t().contiguous().view(side_length ** 2, time),
+                'Y': record['Y'].t().contiguous().view(n_filters * conv_prod, time)
             }
 
             spike_ims, spike_axes = plot_spikes(spikes=_spikes, ims=spike_ims, axes=spike_axes)
@@ -228,6 +306,20 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
         network.reset_()  # Reset state variables.
 
     print(f'Progress: {n_examples} / {n_examples} ({t() - start:.4f} seconds)')
+    telemetry.emit()
+
+    if simulator is not None:
+        simulator.close()
+
+    if save_spikes:
+        archive.close()
+
+    if profile:
+        profiler.disable()
+        print(profiler.table())
+
+        to_write = ['train'] + params if train else ['test'] + test_params
+        profiler.dump(os.path.join(profiles_path, '_'.join([str(x) for x in to_write]) + '.json'))
 
     i += 1
 
@@ -246,10 +338,7 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
                 labels = torch.cat([labels, labels])
 
     # Update and print accuracy evaluations.
-    curves, preds = update_curves(
-        curves, current_labels, n_classes, spike_record=spike_record, assignments=assignments,
-        proportions=proportions, ngram_scores=ngram_scores, n=2
-    )
+    curves, preds = update_curves(curves, current_labels, n_classes, evaluator=evaluator)
     print_results(curves)
 
     for scheme in preds:
@@ -262,7 +351,7 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
             # Save network to disk.
             network.save(os.path.join(params_path, model_name + '.pt'))
             path = os.path.join(params_path, '_'.join(['auxiliary', model_name]) + '.pt')
-            torch.save((assignments, proportions, rates, ngram_scores), open(path, 'wb'))
+            torch.save((assignments, proportions, rates, ngram_scores.to_dict()), open(path, 'wb'))
 
     if train:
         print('\nTraining complete.\n')
@@ -293,23 +382,20 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     else:
         name = 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,inhib,time,timestep,theta_plus,'
-                    'theta_decay,intensity,norm,progress_interval,update_interval,mean_all_activity,'
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
-                )
-            else:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,n_test,inhib,time,timestep,'
-                    'theta_plus,theta_decay,intensity,norm,progress_interval,update_interval,mean_all_activity,'
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
-                )
+    if train:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,inhib,time,timestep,theta_plus,'
+            'theta_decay,intensity,norm,progress_interval,update_interval,mean_all_activity,'
+            'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
+        )
+    else:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,n_test,inhib,time,timestep,'
+            'theta_plus,theta_decay,intensity,norm,progress_interval,update_interval,mean_all_activity,'
+            'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
+        )
 
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    write_results(results_path, name, header, to_write)
 
     # Compute confusion matrices and save them to disk.
     confusions = {}
@@ -351,7 +437,11 @@ if __name__ == '__main__':
     parser.add_argument('--train', dest='train', action='store_true', help='train phase')
     parser.add_argument('--test', dest='train', action='store_false', help='train phase')
     parser.add_argument('--gpu', dest='gpu', action='store_true', help='whether to use cpu or gpu tensors')
-    parser.set_defaults(plot=False, gpu=False, train=True)
+    parser.add_argument('--save_spikes', dest='save_spikes', action='store_true', help='archive output spike trains')
+    parser.add_argument('--workers', type=int, default=1, help='no. processes simulating test examples')
+    parser.add_argument('--profile', dest='profile', action='store_true', help='time simulation per network component')
+    parser.add_argument('--cache_inputs', dest='cache_inputs', action='store_true', help='stream pre-encoded inputs')
+    parser.set_defaults(plot=False, gpu=False, train=True, save_spikes=False, profile=False, cache_inputs=False)
     args = parser.parse_args()
 
     kernel_size = args.kernel_size
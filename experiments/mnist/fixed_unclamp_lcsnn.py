@@ -19,6 +19,9 @@ from bindsnet.learning import NoOp, WeightDependentPostPre
 from bindsnet.analysis.plotting import plot_locally_connected_weights, plot_spikes, plot_weights
 
 from experiments import ROOT_DIR
+from experiments.inhibition import constant_inhibition
+from experiments.results import write_results
+from experiments.utils import IntensityController
 
 model = 'fixed_unclamp_lcsnn'
 data = 'mnist'
@@ -103,7 +106,7 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
             wmax=1, norm=norm * network.layers['Y'].n
         )
 
-        w = -inhib * (torch.ones(n_output, n_output) - torch.diag(torch.ones(n_output)))
+        w = constant_inhibition(n_output, inhib)
         output_recurrent_connection = Connection(
             output_layer, output_layer, w=w, update_rule=NoOp, wmin=-inhib, wmax=0
         )
@@ -170,6 +173,9 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     predictions = torch.zeros(n_examples)
     corrects = torch.zeros(n_examples)
 
+    # Escalates input intensity during simulation of test examples with too little output activity.
+    controller = IntensityController(network, spikes['Z'], time=time, dt=dt, min_spikes=5, factor=1.5)
+
     start = t()
     for i in range(n_examples):
         if i % progress_interval == 0:
@@ -184,27 +190,14 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
         # Get next input sample.
         image = images[i % len(images)]
         label = labels[i % len(images)].item()
-        sample = poisson(datum=image, time=time, dt=dt)
-        inpts = {'X': sample}
 
-        # Run the network on the input.
+        # Run the network on the input; in the test phase, escalate intensity part-way through if the output is quiet.
         if train:
+            sample = poisson(datum=image, time=time, dt=dt)
+            inpts = {'X': sample}
             network.run(inpts=inpts, time=time, unclamp={'Z': unclamps[label]})
         else:
-            network.run(inpts=inpts, time=time)
-
-        if not train:
-            retries = 0
-            while spikes['Z'].get('s').sum() < 5 and retries < 3:
-                retries += 1
-                image *= 1.5
-                sample = poisson(datum=image, time=time, dt=dt)
-                inpts = {'X': sample}
-
-                if train:
-                    network.run(inpts=inpts, time=time, unclamp={'Z': unclamps[label]})
-                else:
-                    network.run(inpts=inpts, time=time)
+            controller.run(image)
 
         output = spikes['Z'].get('s')
         summed_neurons = output.sum(dim=1).view(per_class, n_classes)
@@ -258,21 +251,18 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,inhib,time,timestep,theta_plus,'
-                    'theta_decay,intensity,norm,progress_interval,accuracy\n'
-                )
-            else:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,n_test,inhib,time,timestep,'
-                    'theta_plus,theta_decay,intensity,norm,progress_interval,update_interval,accuracy\n'
-                )
+    if train:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,inhib,time,timestep,theta_plus,'
+            'theta_decay,intensity,norm,progress_interval,accuracy\n'
+        )
+    else:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,n_test,inhib,time,timestep,'
+            'theta_plus,theta_decay,intensity,norm,progress_interval,update_interval,accuracy\n'
+        )
 
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
@@ -7,11 +7,9 @@ import matplotlib.pyplot as plt
 from time import time as t
 
 from torch.nn.modules.utils import _pair
-from scipy.spatial.distance import euclidean
 from sklearn.metrics import confusion_matrix
 
 from bindsnet.datasets import MNIST
-from bindsnet.encoding import poisson
 from bindsnet.learning import NoOp, PostPre
 from bindsnet.network.monitors import Monitor
 from bindsnet.network import load_network, Network
@@ -21,7 +19,9 @@ from bindsnet.network.topology import LocallyConnectedConnection, Connection
 from bindsnet.analysis.plotting import plot_locally_connected_weights, plot_spikes
 
 from experiments import ROOT_DIR
-from experiments.utils import update_curves, print_results
+from experiments.inhibition import distance_inhibition, per_location
+from experiments.utils import update_curves, print_results, IntensityController
+from experiments.results import write_results
 
 model = 'increasing_crop_locally_connected'
 data = 'mnist'
@@ -91,18 +91,7 @@ def main(seed=0, n_train=60000, n_test=10000, c_low=1, c_high=25, p_low=0.5, ker
             nu=[0, lr], update_rule=PostPre, wmin=0, wmax=1, norm=norm, input_shape=input_shape
         )
 
-        w = torch.zeros(n_filters, *conv_size, n_filters, *conv_size)
-        for fltr1 in range(n_filters):
-            for fltr2 in range(n_filters):
-                if fltr1 != fltr2:
-                    for j in range(conv_size[0]):
-                        for k in range(conv_size[1]):
-                            x1, y1 = fltr1 // np.sqrt(n_filters), fltr1 % np.sqrt(n_filters)
-                            x2, y2 = fltr2 // np.sqrt(n_filters), fltr2 % np.sqrt(n_filters)
-
-                            w[fltr1, j, k, fltr2, j, k] = max(-c_high, -c_low * np.sqrt(euclidean([x1, y1], [x2, y2])))
-
-        w = w.view(n_filters * conv_size[0] * conv_size[1], n_filters * conv_size[0] * conv_size[1])
+        w = per_location(distance_inhibition(n_filters, c_low, c_high), conv_size)
         recurrent_conn = Connection(output_layer, output_layer, w=w)
 
         plt.matshow(w)
@@ -184,6 +173,9 @@ def main(seed=0, n_train=60000, n_test=10000, c_low=1, c_high=25, p_low=0.5, ker
         increases = 0
         inhib = c_low
 
+    # Escalates input intensity during simulation of examples with too little output activity.
+    controller = IntensityController(network, spikes['Y'], time=time, dt=dt)
+
     start = t()
     for i in range(n_examples):
         if i % progress_interval == 0:
@@ -199,18 +191,7 @@ def main(seed=0, n_train=60000, n_test=10000, c_low=1, c_high=25, p_low=0.5, ker
 
                     print(f'\nIncreasing inhibition to {inhib}.\n')
 
-                    w = torch.zeros(n_filters, *conv_size, n_filters, *conv_size)
-                    for fltr1 in range(n_filters):
-                        for fltr2 in range(n_filters):
-                            if fltr1 != fltr2:
-                                for j in range(conv_size[0]):
-                                    for k in range(conv_size[1]):
-                                        x1, y1 = fltr1 // np.sqrt(n_filters), fltr1 % np.sqrt(n_filters)
-                                        x2, y2 = fltr2 // np.sqrt(n_filters), fltr2 % np.sqrt(n_filters)
-
-                                        w[fltr1, j, k, fltr2, j, k] = max(-c_high, -c_low * np.sqrt(euclidean([x1, y1], [x2, y2])))
-
-                    w = w.view(n_filters * conv_size[0] * conv_size[1], n_filters * conv_size[0] * conv_size[1])
+                    w = per_location(distance_inhibition(n_filters, c_low, c_high), conv_size)
                     network.connections['Y', 'Y'].w = w
 
             if i % len(labels) == 0:
@@ -254,19 +235,9 @@ def main(seed=0, n_train=60000, n_test=10000, c_low=1, c_high=25, p_low=0.5, ker
 
         # Get next input sample.
         image = images[i % update_interval].contiguous().view(-1)
-        sample = poisson(datum=image, time=time, dt=dt)
-        inpts = {'X': sample}
-
-        # Run the network on the input.
-        network.run(inpts=inpts, time=time)
 
-        retries = 0
-        while spikes['Y'].get('s').sum() < 5 and retries < 3:
-            retries += 1
-            image *= 2
-            sample = poisson(datum=image, time=time, dt=dt)
-            inpts = {'X': sample}
-            network.run(inpts=inpts, time=time)
+        # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+        controller.run(image)
 
         # Add to spikes recording.
         spike_record[i % update_interval] = spikes['Y'].get('s').t()
@@ -339,23 +310,20 @@ def main(seed=0, n_train=60000, n_test=10000, c_low=1, c_high=25, p_low=0.5, ker
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,c_low,c_high,p_low,time,timestep,theta_plus,'
-                    'theta_decay,intensity,norm,progress_interval,update_interval,mean_all_activity,'
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
-                )
-            else:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,n_test,c_low,c_high,p_low,time,timestep,'
-                    'theta_plus,theta_decay,intensity,norm,progress_interval,update_interval,mean_all_activity,'
-                    'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
-                )
-
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    if train:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,c_low,c_high,p_low,time,timestep,theta_plus,'
+            'theta_decay,intensity,norm,progress_interval,update_interval,mean_all_activity,'
+            'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
+        )
+    else:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,n_test,c_low,c_high,p_low,time,timestep,'
+            'theta_plus,theta_decay,intensity,norm,progress_interval,update_interval,mean_all_activity,'
+            'mean_proportion_weighting,mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n'
+        )
+
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
@@ -6,11 +6,9 @@ import matplotlib.pyplot as plt
 
 from time import time as t
 from sklearn.metrics import confusion_matrix
-from scipy.spatial.distance import euclidean
 
 from bindsnet.datasets import MNIST
 from bindsnet.network import Network
-from bindsnet.encoding import poisson
 from bindsnet.network import load_network
 from bindsnet.learning import PostPre, NoOp
 from bindsnet.network.monitors import Monitor
@@ -21,7 +19,9 @@ from bindsnet.utils import get_square_weights, get_square_assignments
 from bindsnet.analysis.plotting import plot_spikes, plot_weights, plot_input, plot_assignments, plot_performance
 
 from experiments import ROOT_DIR
-from experiments.utils import print_results, update_curves
+from experiments.inhibition import distance_inhibition
+from experiments.utils import print_results, update_curves, IntensityController
+from experiments.results import write_results
 
 model = 'increasing_inhibition'
 data = 'mnist'
@@ -80,14 +80,7 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, c_low=1, c_high=25,
             input_layer, exc_layer, w=w, update_rule=PostPre, norm=78.4, nu=(1e-4, 1e-2), wmax=1.0
         )
 
-        w = torch.zeros(exc_layer.n, exc_layer.n)
-        for k1 in range(n_neurons):
-            for k2 in range(n_neurons):
-                if k1 != k2:
-                    x1, y1 = k1 // np.sqrt(n_neurons), k1 % np.sqrt(n_neurons)
-                    x2, y2 = k2 // np.sqrt(n_neurons), k2 % np.sqrt(n_neurons)
-
-                    w[k1, k2] = max(-c_high, -c_low * np.sqrt(euclidean([x1, y1], [x2, y2])))
+        w = distance_inhibition(n_neurons, c_low, c_high)
 
         recurrent_conn = Connection(exc_layer, exc_layer, w=w)
 
@@ -162,6 +155,9 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, c_low=1, c_high=25,
         increases = 0
         inhib = c_low
 
+    # Escalates input intensity during simulation of examples with too little output activity.
+    controller = IntensityController(network, spikes['Y'], time=time, dt=dt)
+
     start = t()
     for i in range(n_examples):
         if train and i % update_interval == 0 and i > 0 and increases < n_increase:
@@ -169,14 +165,7 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, c_low=1, c_high=25,
 
             print(f'\nIncreasing inhibition to {inhib}.\n')
 
-            w = torch.zeros(n_neurons, n_neurons)
-            for k1 in range(n_neurons):
-                for k2 in range(n_neurons):
-                    if k1 != k2:
-                        x1, y1 = k1 // np.sqrt(n_neurons), k1 % np.sqrt(n_neurons)
-                        x2, y2 = k2 // np.sqrt(n_neurons), k2 % np.sqrt(n_neurons)
-
-                        w[k1, k2] = max(-c_high, -inhib * np.sqrt(euclidean([x1, y1], [x2, y2])))
+            w = distance_inhibition(n_neurons, inhib, c_high)
 
             network.connections['Y', 'Y'].w = w
 
@@ -228,26 +217,16 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, c_low=1, c_high=25,
 
         # Get next input sample.
         image = images[i]
-        sample = poisson(datum=image, time=int(time / dt))
-        inpts = {'X' : sample}
-
-        # Run the network on the input.
-        network.run(inpts=inpts, time=time)
 
-        retries = 0
-        while spikes['Y'].get('s').sum() < 5 and retries < 3:
-            retries += 1
-            image *= 2
-            sample = poisson(datum=image, time=int(time / dt))
-            inpts = {'X' : sample}
-            network.run(inpts=inpts, time=time)
+        # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+        controller.run(image)
 
         # Add to spikes recording.
         spike_record[i % update_interval] = spikes['Y'].get('s').t()
 
         # Optionally plot various simulation information.
         if plot:
-            inpt = inpts['X'].view(time, 784).sum(0).view(28, 28)
+            inpt = controller.sample.view(time, 784).sum(0).view(28, 28)
             _spikes = {layer: spikes[layer].get('s') for layer in spikes}
             input_exc_weights = network.connections['X', 'Y'].w
             square_weights = get_square_weights(input_exc_weights.view(784, n_neurons), n_sqrt, 28)
@@ -315,19 +294,16 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, c_low=1, c_high=25,
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                f.write('random_seed,n_neurons,n_train,excite,c_low,c_high,p_low,time,timestep,theta_plus,theta_decay,'
-                        'intensity,progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                        'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
-            else:
-                f.write('random_seed,n_neurons,n_train,n_test,excite,c_low,c_high,p_low,time,timestep,theta_plus,theta_decay,'
-                        'intensity,progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                        'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
+    if train:
+        header = ('random_seed,n_neurons,n_train,excite,c_low,c_high,p_low,time,timestep,theta_plus,theta_decay,'
+                'intensity,progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+                'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
+    else:
+        header = ('random_seed,n_neurons,n_train,n_test,excite,c_low,c_high,p_low,time,timestep,theta_plus,theta_decay,'
+                'intensity,progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+                'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
 
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
@@ -11,7 +11,7 @@ from sklearn.linear_model import LogisticRegression
 
 from bindsnet.learning import NoOp
 from bindsnet.datasets import MNIST
-from bindsnet.encoding import poisson, bernoulli
+from bindsnet.encoding import bernoulli
 from bindsnet.network import load_network
 from bindsnet.evaluation import logreg_fit
 from bindsnet.network.monitors import Monitor
@@ -21,7 +21,8 @@ from bindsnet.network.nodes import IFNodes
 from bindsnet.network.topology import LocallyConnectedConnection
 
 from experiments import ROOT_DIR
-from experiments.utils import update_curves, print_results
+from experiments.utils import update_curves, print_results, IntensityController
+from experiments.results import write_results
 
 model = 'logreg_locally_connected'
 data = 'mnist'
@@ -153,6 +154,9 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     weights_im = None
     weights2_im = None
 
+    # Escalates input intensity during simulation of examples with too little output activity.
+    controller = IntensityController(network, spikes['Y'], time=time, dt=dt, encoder=bernoulli)
+
     start = t()
     for i in range(n_examples):
         if i % progress_interval == 0:
@@ -200,19 +204,9 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
 
         # Get next input sample.
         image = images[i % len(images)].contiguous().view(-1)
-        sample = bernoulli(datum=image, time=time, dt=dt)
-        inpts = {'X': sample}
-
-        # Run the network on the input.
-        network.run(inpts=inpts, time=time)
 
-        retries = 0
-        while spikes['Y'].get('s').sum() < 5 and retries < 3:
-            retries += 1
-            image *= 2
-            sample = bernoulli(datum=image, time=time, dt=dt)
-            inpts = {'X': sample}
-            network.run(inpts=inpts, time=time)
+        # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+        controller.run(image)
 
         # Add to spikes recording.
         spike_record[i % update_interval] = spikes['Y'].get('s').view(time, -1)
@@ -297,21 +291,18 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     else:
         name = 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,inhib,time,timestep,theta_plus,'
-                    'theta_decay,intensity,norm,progress_interval,update_interval,mean_logreg,std_logreg\n'
-                )
-            else:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,n_test,inhib,time,timestep,'
-                    'theta_plus,theta_decay,intensity,norm,progress_interval,update_interval,mean_logreg,std_logreg\n'
-                )
+    if train:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,inhib,time,timestep,theta_plus,'
+            'theta_decay,intensity,norm,progress_interval,update_interval,mean_logreg,std_logreg\n'
+        )
+    else:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,n_test,inhib,time,timestep,'
+            'theta_plus,theta_decay,intensity,norm,progress_interval,update_interval,mean_logreg,std_logreg\n'
+        )
 
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
@@ -16,7 +16,11 @@ from bindsnet.evaluation import assign_labels, update_ngram_scores
 from bindsnet.utils import get_square_weights, get_square_assignments
 from bindsnet.analysis.plotting import plot_input, plot_spikes, plot_weights
 
-from experiments.utils import update_curves, print_results
+from experiments import ROOT_DIR
+from experiments.inhibition import constant_inhibition
+from experiments.utils import update_curves, print_results, IntensityController
+from experiments.results import write_results
+from experiments.input_sources import ConstantSource
 
 model = 'real_dac'
 data = 'mnist'
@@ -77,7 +81,7 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, time=50,
         )
         network.add_connection(input_connection, source='X', target='Y')
 
-        w = -inhib * (torch.ones(n_neurons, n_neurons) - torch.diag(torch.ones(n_neurons)))
+        w = constant_inhibition(n_neurons, inhib)
         recurrent_connection = Connection(
             source=network.layers['Y'], target=network.layers['Y'], w=w, wmin=-inhib, wmax=0
         )
@@ -147,6 +151,9 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, time=50,
     assigns_im = None
     perf_ax = None
 
+    # Escalates input intensity during simulation of examples with too little output activity.
+    controller = IntensityController(network, spikes['Y'], time=time, dt=dt, encoder=ConstantSource)
+
     start = t()
     for i in range(n_examples):
         if i % progress_interval == 0:
@@ -193,18 +200,10 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, time=50,
             print()
 
         # Get next input sample.
-        image = images[i % n_examples].repeat([time, 1])
-        inpts = {'X': image}
-
-        # Run the network on the input.
-        network.run(inpts=inpts, time=time)
+        image = images[i % n_examples]
 
-        retries = 0
-        while spikes['Y'].get('s').sum() < 5 and retries < 3:
-            retries += 1
-            image *= 2
-            inpts = {'X': image}
-            network.run(inpts=inpts, time=time)
+        # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+        controller.run(image)
 
         # Add to spikes recording.
         spike_record[i % update_interval] = spikes['Y'].get('s').t()
@@ -212,7 +211,7 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, time=50,
         # Optionally plot various simulation information.
         if plot and i % update_interval == 0:
             _input = images[i % n_examples].view(28, 28)
-            reconstruction = inpts['X'].view(time, 784).sum(0).view(28, 28)
+            reconstruction = controller.sample.view(time, 784).sum(0).view(28, 28)
             _spikes = {layer: spikes[layer].get('s') for layer in spikes}
             input_exc_weights = network.connections['X', 'Y'].w
             square_weights = get_square_weights(input_exc_weights.view(784, n_neurons), n_sqrt, 28)
@@ -283,9 +282,7 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, time=50,
     torch.save((curves, update_interval, n_examples), open(os.path.join(path, f), 'wb'))
 
     # Save results to disk.
-    path = os.path.join('..', '..', 'results', data, model)
-    if not os.path.isdir(path):
-        os.makedirs(path)
+    results_path = os.path.join(ROOT_DIR, 'results', data, model)
 
     results = [
         np.mean(curves['all']), np.mean(curves['proportion']), np.mean(curves['ngram']),
@@ -304,19 +301,16 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, time=50,
     else:
         name = 'test.csv'
 
-    if not os.path.isfile(os.path.join(path, name)):
-        with open(os.path.join(path, name), 'w') as f:
-            if train:
-                f.write('random_seed,n_neurons,n_train,inhib,time,lr,lr_decay,theta_plus,theta_decay,'
-                        'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                        'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
-            else:
-                f.write('random_seed,n_neurons,n_train,n_test,inhib,time,lr,lr_decay,theta_plus,theta_decay,'
-                        'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                        'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
+    if train:
+        header = ('random_seed,n_neurons,n_train,inhib,time,lr,lr_decay,theta_plus,theta_decay,'
+                  'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+                  'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
+    else:
+        header = ('random_seed,n_neurons,n_train,n_test,inhib,time,lr,lr_decay,theta_plus,theta_decay,'
+                  'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+                  'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
 
-    with open(os.path.join(path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    write_results(results_path, name, header, to_write)
 
 
 if __name__ == '__main__':
@@ -14,6 +14,8 @@ from bindsnet.network.topology import Connection
 from bindsnet.network.nodes import Input, DiehlAndCookNodes
 from bindsnet.analysis.plotting import plot_input, plot_spikes
 
+from experiments.inhibition import constant_inhibition
+
 print()
 
 parser = argparse.ArgumentParser()
@@ -91,7 +93,7 @@ conv_conn = Connection(
     input_layer, conv_layer, update_rule=PostPre, norm=0.1 * n_input, nu=(0, 1e-2), wmax=1.0
 )
 
-w = -inhib * (torch.ones(n_neurons, n_neurons) - torch.diag(torch.ones(n_neurons)))
+w = constant_inhibition(n_neurons, inhib)
 recurrent_conn = Connection(conv_layer, conv_layer, w=w)
 
 network.add_layer(input_layer, name='X')
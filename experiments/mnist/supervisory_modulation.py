@@ -16,6 +16,7 @@ from bindsnet.network.nodes import IFNodes, RealInput, DiehlAndCookNodes
 from bindsnet.analysis.plotting import plot_input, plot_spikes, plot_weights, plot_assignments, plot_performance
 
 from experiments import ROOT_DIR
+from experiments.inhibition import constant_inhibition
 
 model = 'supervisory_modulation'
 data = 'mnist'
@@ -85,7 +86,7 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=100, lr=0.01,
         )
         network.add_connection(input_connection, source='X', target='Y')
 
-        w = -inhib * (torch.ones(n_neurons, n_neurons) - torch.diag(torch.ones(n_neurons)))
+        w = constant_inhibition(n_neurons, inhib)
         recurrent_connection = Connection(
             source=output_layer, target=output_layer, w=w, wmin=-inhib, wmax=0
         )
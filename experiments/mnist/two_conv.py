@@ -12,11 +12,14 @@ from bindsnet.network import Network
 from bindsnet.learning import PostPre
 from bindsnet.encoding import bernoulli
 from bindsnet.network.monitors import Monitor
-from bindsnet.network.topology import Connection, Conv2dConnection
+from bindsnet.network.topology import Conv2dConnection
 from bindsnet.network.nodes import Input, DiehlAndCookNodes
 from bindsnet.analysis.plotting import plot_input, plot_spikes, plot_conv2d_weights
 
+from experiments import ROOT_DIR
+from experiments.inhibition import LateralInhibitionConnection
 from experiments.utils import print_results, update_curves
+from experiments.results import write_results
 
 print()
 
@@ -159,27 +162,9 @@ conv_conn2 = Conv2dConnection(
     norm=1.0 * int(np.sqrt(total_kernel_size2)), nu=(0, 1e-2), wmax=2.0
 )
 
-w = -inhib * torch.ones(
-    1, n_filters, conv_size[0], conv_size[1], 1, n_filters, conv_size[0], conv_size[1]
-)
-for f in range(n_filters):
-    for i in range(conv_size[0]):
-        for j in range(conv_size[1]):
-            w[0, f, i, j, 0, f, i, j] = 0
-
-w = w.view(n_filters * conv_size[0] * conv_size[1], n_filters * conv_size[0] * conv_size[1])
-recurrent_conn = Connection(conv_layer, conv_layer, w=w)
-
-w = -inhib * torch.ones(
-    1, n_filters, conv_size2[0], conv_size2[1], 1, n_filters, conv_size2[0], conv_size2[1]
-)
-for f in range(n_filters):
-    for i in range(conv_size2[0]):
-        for j in range(conv_size2[1]):
-            w[0, f, i, j, 0, f, i, j] = 0
+recurrent_conn = LateralInhibitionConnection(conv_layer, conv_layer, inhib=inhib)
 
-w = w.view(n_filters * conv_size2[0] * conv_size2[1], n_filters * conv_size2[0] * conv_size2[1])
-recurrent_conn2 = Connection(conv_layer2, conv_layer2, w=w)
+recurrent_conn2 = LateralInhibitionConnection(conv_layer2, conv_layer2, inhib=inhib)
 
 network.add_layer(input_layer, name='X')
 network.add_layer(conv_layer, name='Y')
@@ -381,9 +366,7 @@ f = '_'.join(to_write) + '.pt'
 torch.save((curves, update_interval, n_examples), open(os.path.join(path, f), 'wb'))
 
 # Save results to disk.
-path = os.path.join('..', '..', 'results', data, model)
-if not os.path.isdir(path):
-    os.makedirs(path)
+results_path = os.path.join(ROOT_DIR, 'results', data, model)
 
 results = [
     np.mean(curves['all']), np.mean(curves['proportion']), np.mean(curves['ngram']),
@@ -399,28 +382,23 @@ to_write = [str(x) for x in to_write]
 
 name = 'train.csv' if train else 'test.csv'
 
-if not os.path.isfile(os.path.join(path, name)):
-    with open(os.path.join(path, name), 'w') as f:
-        if train:
-            columns = [
-                'seed', 'n_train', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time', 'dt',
-                'intensity', 'update_interval', 'mean_all_activity', 'mean_proportion_weighting',
-                'mean_ngram', 'max_all_activity', 'max_proportion_weighting', 'max_ngram'
-            ]
-
-            header = ','.join(columns) + '\n'
-            f.write(header)
-        else:
-            columns = [
-                'seed', 'n_train', 'n_test', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time',
-                'dt', 'intensity', 'update_interval', 'mean_all_activity', 'mean_proportion_weighting',
-                'mean_ngram', 'max_all_activity', 'max_proportion_weighting', 'max_ngram'
-            ]
+if train:
+    columns = [
+        'seed', 'n_train', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time', 'dt',
+        'intensity', 'update_interval', 'mean_all_activity', 'mean_proportion_weighting',
+        'mean_ngram', 'max_all_activity', 'max_proportion_weighting', 'max_ngram'
+    ]
+
+    header = ','.join(columns) + '\n'
+else:
+    columns = [
+        'seed', 'n_train', 'n_test', 'kernel_size', 'stride', 'n_filters', 'padding', 'inhib', 'time',
+        'dt', 'intensity', 'update_interval', 'mean_all_activity', 'mean_proportion_weighting',
+        'mean_ngram', 'max_all_activity', 'max_proportion_weighting', 'max_ngram'
+    ]
 
-            header = ','.join(columns) + '\n'
-            f.write(header)
+    header = ','.join(columns) + '\n'
 
-with open(os.path.join(path, name), 'a') as f:
-    f.write(','.join(to_write) + '\n')
+write_results(results_path, name, header, to_write)
 
 print()
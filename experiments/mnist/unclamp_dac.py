@@ -22,6 +22,8 @@ from bindsnet.learning import WeightDependentPostPre
 from bindsnet.analysis.plotting import plot_input, plot_spikes, plot_weights, plot_voltages
 
 from experiments import ROOT_DIR
+from experiments.inhibition import constant_inhibition
+from experiments.results import write_results
 
 model = 'unclamp_dac'
 data = 'mnist'
@@ -161,7 +163,7 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, lr=1e-2,
             network.connections['X', 'Y'].update_rule.nu[1] *= lr_decay
 
             if not flag:
-                w = -inhib * (torch.ones(n_neurons, n_neurons) - torch.diag(torch.ones(n_neurons)))
+                w = constant_inhibition(n_neurons, inhib)
                 recurrent_connection = Connection(
                     source=network.layers['Y'], target=network.layers['Y'], w=w, wmin=-inhib, wmax=0
                 )
@@ -238,21 +240,18 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=250, lr=1e-2,
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                f.write(
-                    'random_seed,n_neurons,n_train,inhib,lr,lr_decay,time,timestep,theta_plus,'
-                    'theta_decay,intensity,progress_interval,update_interval,accuracy\n'
-                )
-            else:
-                f.write(
-                    'random_seed,n_neurons,n_train,n_test,inhib,lr,lr_decay,time,timestep,'
-                    'theta_plus,theta_decay,intensity,progress_interval,update_interval,accuracy\n'
-                )
+    if train:
+        header = (
+            'random_seed,n_neurons,n_train,inhib,lr,lr_decay,time,timestep,theta_plus,'
+            'theta_decay,intensity,progress_interval,update_interval,accuracy\n'
+        )
+    else:
+        header = (
+            'random_seed,n_neurons,n_train,n_test,inhib,lr,lr_decay,time,timestep,'
+            'theta_plus,theta_decay,intensity,progress_interval,update_interval,accuracy\n'
+        )
 
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
@@ -19,6 +19,8 @@ from bindsnet.learning import NoOp, WeightDependentPostPre
 from bindsnet.analysis.plotting import plot_locally_connected_weights, plot_spikes, plot_weights
 
 from experiments import ROOT_DIR
+from experiments.inhibition import constant_inhibition, LateralInhibitionConnection
+from experiments.results import write_results
 
 model = 'unclamp_lcsnn'
 data = 'mnist'
@@ -88,16 +90,9 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
             norm=norm, input_shape=(side_length, side_length)
         )
 
-        w = torch.zeros(n_filters, *conv_size, n_filters, *conv_size)
-        for fltr1 in range(n_filters):
-            for fltr2 in range(n_filters):
-                if fltr1 != fltr2:
-                    for i in range(conv_size[0]):
-                        for j in range(conv_size[1]):
-                            w[fltr1, i, j, fltr2, i, j] = -inhib
-
-        w = w.view(n_filters * conv_size[0] * conv_size[1], n_filters * conv_size[0] * conv_size[1])
-        recurrent_conn = Connection(output_layer, output_layer, w=w)
+        recurrent_conn = LateralInhibitionConnection(
+            output_layer, output_layer, inhib=inhib, scope='location', n_filters=n_filters
+        )
 
         network.add_layer(input_layer, name='X')
         network.add_layer(output_layer, name='Y')
@@ -114,7 +109,7 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
             wmax=1, norm=norm * n_output
         )
 
-        w = -inhib * (torch.ones(n_output, n_output) - torch.diag(torch.ones(n_output)))
+        w = constant_inhibition(n_output, inhib)
         output_recurrent_connection = Connection(
             output_layer, output_layer, w=w, update_rule=NoOp, wmin=-inhib, wmax=0
         )
@@ -280,21 +275,18 @@ def main(seed=0, n_train=60000, n_test=10000, inhib=250, kernel_size=(16,), stri
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,inhib,time,timestep,theta_plus,'
-                    'theta_decay,intensity,norm,progress_interval,accuracy\n'
-                )
-            else:
-                f.write(
-                    'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,n_test,inhib,time,timestep,'
-                    'theta_plus,theta_decay,intensity,norm,progress_interval,update_interval,accuracy\n'
-                )
+    if train:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,inhib,time,timestep,theta_plus,'
+            'theta_decay,intensity,norm,progress_interval,accuracy\n'
+        )
+    else:
+        header = (
+            'random_seed,kernel_size,stride,n_filters,crop,lr,lr_decay,n_train,n_test,inhib,time,timestep,'
+            'theta_plus,theta_decay,intensity,norm,progress_interval,update_interval,accuracy\n'
+        )
 
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
@@ -0,0 +1,314 @@
+import os
+import json
+import fcntl
+import torch
+import argparse
+import numpy as np
+
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+from experiments import ROOT_DIR
+
+# Prepared datasets by name: ``(source, grayscale)``. Variants of a source (e.g., grayscale CIFAR-10) share its file.
+DATASETS = {
+    'mnist': ('mnist', False),
+    'fashion_mnist': ('fashion_mnist', False),
+    'letters': ('letters', False),
+    'cifar10': ('cifar10', False),
+    'gray_cifar10': ('cifar10', True),
+    'breakout': ('breakout', False),
+}
+
+
+def _uint8(images: Union[torch.Tensor, np.ndarray]) -> np.ndarray:
+    # Pixel values are stored exactly, so they must be integers in [0, 255].
+    images = images.cpu().numpy() if isinstance(images, torch.Tensor) else np.asarray(images)
+    if images.dtype != np.uint8:
+        if images.size and (images.min() < 0 or images.max() > 255 or not np.all(np.mod(images, 1) == 0)):
+            raise ValueError('Only integer pixel values in [0, 255] can be prepared.')
+
+        images = images.astype(np.uint8)
+
+    return images
+
+
+def _labels(labels: Union[torch.Tensor, np.ndarray]) -> np.ndarray:
+    labels = labels.cpu().numpy() if isinstance(labels, torch.Tensor) else np.asarray(labels)
+    return labels.astype(np.int64)
+
+
+def _mnist(split: str) -> Tuple[np.ndarray, np.ndarray]:
+    from bindsnet.datasets import MNIST
+
+    dataset = MNIST(path=os.path.join(ROOT_DIR, 'data', 'MNIST'), download=True)
+    images, labels = dataset.get_train() if split == 'train' else dataset.get_test()
+    return _uint8(images), _labels(labels)
+
+
+def _fashion_mnist(split: str) -> Tuple[np.ndarray, np.ndarray]:
+    from bindsnet.datasets import FashionMNIST
+
+    dataset = FashionMNIST(path=os.path.join(ROOT_DIR, 'data', 'FashionMNIST'), download=True)
+    images, labels = dataset.get_train() if split == 'train' else dataset.get_test()
+    return _uint8(images), _labels(labels)
+
+
+def _letters(split: str) -> Tuple[np.ndarray, np.ndarray]:
+    from torchvision.datasets import EMNIST
+
+    dataset = EMNIST(root=os.path.join(ROOT_DIR, 'data', 'EMNIST'), split='letters', train=split == 'train',
+                     download=True)
+    if split == 'train':
+        return _uint8(dataset.train_data), _labels(dataset.train_labels)
+    else:
+        return _uint8(dataset.test_data), _labels(dataset.test_labels)
+
+
+def _cifar10(split: str) -> Tuple[np.ndarray, np.ndarray]:
+    from bindsnet.datasets import CIFAR10
+
+    dataset = CIFAR10(path=os.path.join(ROOT_DIR, 'data', 'CIFAR10'), download=True)
+    images, labels = dataset.get_train() if split == 'train' else dataset.get_test()
+    return _uint8(images), _labels(labels)
+
+
+def _breakout(split: str) -> Tuple[np.ndarray, np.ndarray]:
+    # Breakout frames have a single split.
+    path = os.path.join(ROOT_DIR, 'data', 'Breakout')
+    images = torch.load(os.path.join(path, 'frames.pt'), map_location='cpu')
+    labels = torch.load(os.path.join(path, 'labels.pt'), map_location='cpu')
+    return _uint8(images), _labels(labels)
+
+
+# Readers of the raw data of every source: ``split -> (uint8 images, int64 labels)``.
+READERS = {
+    'mnist': _mnist, 'fashion_mnist': _fashion_mnist, 'letters': _letters, 'cifar10': _cifar10, 'breakout': _breakout
+}
+
+
+def prepared_path(source: str, split: str) -> str:
+    # language=rst
+    """
+    Directory of the prepared data of a dataset split.
+    """
+    return os.path.join(ROOT_DIR, 'prepared', source, split)
+
+
+class PreparedData:
+    # language=rst
+    """
+    Images and labels of a dataset split, decoded once and stored as ``uint8`` in a memory-mapped ``.npy`` file.
+    Opening it takes no time and reads nothing; jobs on a node share the pages of the file in the page cache. The
+    first job to need a split prepares it while holding a file lock, and all others wait for it and open it.
+    """
+
+    def __init__(self, path: str) -> None:
+        # language=rst
+        """
+        Opens existing prepared data.
+
+        :param path: Prepared data directory.
+        """
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+
+        self.labels = torch.from_numpy(np.load(os.path.join(path, 'labels.npy')))
+
+        # Opened lazily, once per (worker) process.
+        self.images = None
+
+    @classmethod
+    def prepare(cls, source: str, split: str = 'train') -> 'PreparedData':
+        # language=rst
+        """
+        Opens the prepared data of a dataset split, reading and writing it first if it doesn't exist yet.
+
+        :param source: Name of the source in ``READERS``.
+        :param split: ``train`` or ``test``.
+        :return: The ``PreparedData``.
+        """
+        path = prepared_path(source, split)
+        if os.path.isfile(os.path.join(path, 'meta.json')):
+            return cls(path)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            # Another job may have written it while we waited for the lock.
+            if not os.path.isfile(os.path.join(path, 'meta.json')):
+                cls._write(path, *READERS[source](split))
+
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+        return cls(path)
+
+    @staticmethod
+    def _write(path: str, images: np.ndarray, labels: np.ndarray) -> None:
+        # Writes into a temporary directory, then moves it into place.
+        tmp = path + f'.{os.getpid()}.tmp'
+        os.makedirs(tmp, exist_ok=True)
+
+        np.save(os.path.join(tmp, 'images.npy'), images)
+        np.save(os.path.join(tmp, 'labels.npy'), labels)
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump({'n_examples': len(images), 'shape': list(images.shape[1:])}, f)
+
+        os.rename(tmp, path)
+
+    def _open(self) -> np.ndarray:
+        if self.images is None:
+            self.images = np.load(os.path.join(self.path, 'images.npy'), mmap_mode='r')
+
+        return self.images
+
+    def __getstate__(self) -> Dict:
+        # Don't pickle memory maps into worker processes; each worker opens its own.
+        state = self.__dict__.copy()
+        state['images'] = None
+        return state
+
+    def __len__(self) -> int:
+        return self.meta['n_examples']
+
+    def view(self, crop: Union[int, Sequence[int]] = 0, intensity: float = 1.0, grayscale: bool = False,
+             device: Union[str, torch.device] = 'cpu') -> 'ImageView':
+        # language=rst
+        """
+        Lazily preprocessed view of the images; see ``ImageView``.
+        """
+        return ImageView(self, crop=crop, intensity=intensity, grayscale=grayscale, device=device)
+
+
+class ImageView:
+    # language=rst
+    """
+    Read-only view of prepared images that indexes like the preprocessed image tensor of the experiment scripts
+    (``images[i]``, ``images[i:j]``, ``images[indices]``), but preprocesses only the examples it is indexed with:
+    cropping slices the memory map without copying, and conversion to ``float``, averaging of color channels and
+    scaling by ``intensity`` are applied per example or batch, on its way to ``device``. Selections of examples (e.g.,
+    permutations or rebalancing) are views too; see ``take``.
+    """
+
+    def __init__(self, data: PreparedData, crop: Union[int, Sequence[int]] = 0, intensity: float = 1.0,
+                 grayscale: bool = False, device: Union[str, torch.device] = 'cpu',
+                 indices: Optional[np.ndarray] = None) -> None:
+        # language=rst
+        """
+        Constructor for ``ImageView``.
+
+        :param data: Prepared data.
+        :param crop: Amount to crop images at all borders, or at the ``(top, bottom, left, right)`` borders.
+        :param intensity: Constant to multiply images by.
+        :param grayscale: Whether to average images over their last (color) dimension.
+        :param device: Device of the returned tensors.
+        :param indices: Examples of ``data`` in the view, in order; all, if not given.
+        """
+        self.data = data
+        self.crop = (crop,) * 4 if isinstance(crop, int) else tuple(crop)
+        self.intensity = intensity
+        self.grayscale = grayscale
+        self.device = device
+        self.indices = indices
+
+        top, bottom, left, right = self.crop
+        height, width = data.meta['shape'][:2]
+        shape = [height - top - bottom, width - left - right, *data.meta['shape'][2:]]
+        if grayscale:
+            shape = shape[:-1]
+
+        self.shape = torch.Size([len(data) if indices is None else len(indices), *shape])
+
+    def _images(self) -> np.ndarray:
+        # Zero-copy crop of the memory map.
+        top, bottom, left, right = self.crop
+        images = self.data._open()
+        return images[:, top:images.shape[1] - bottom, left:images.shape[2] - right]
+
+    def take(self, indices: Union[torch.Tensor, np.ndarray, Sequence[int]]) -> 'ImageView':
+        # language=rst
+        """
+        View of a selection of the examples of this view, in the given order, without reading them.
+
+        :param indices: Indices of examples of this view; e.g., a permutation.
+        :return: The ``ImageView``.
+        """
+        indices = np.asarray(indices.cpu() if isinstance(indices, torch.Tensor) else indices, dtype=np.int64)
+        if self.indices is not None:
+            indices = self.indices[indices]
+
+        return ImageView(self.data, crop=self.crop, intensity=self.intensity, grayscale=self.grayscale,
+                         device=self.device, indices=indices)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def size(self, dim: Optional[int] = None) -> Union[torch.Size, int]:
+        return self.shape if dim is None else self.shape[dim]
+
+    def dim(self) -> int:
+        return len(self.shape)
+
+    def __getitem__(self, index: Union[int, slice, torch.Tensor, np.ndarray, Sequence[int]]) -> torch.Tensor:
+        # language=rst
+        """
+        Reads and preprocesses one example, or a batch of examples given a slice or sequence of indices.
+
+        :param index: Example index, slice, or sequence of example indices.
+        :return: ``float`` tensor of shape ``shape[1:]``, or ``[batch_size, *shape[1:]]``.
+        """
+        if isinstance(index, torch.Tensor):
+            index = index.cpu().numpy()
+
+        if isinstance(index, slice):
+            index = np.arange(len(self))[index]
+        elif not isinstance(index, (int, np.integer)):
+            index = np.asarray(index, dtype=np.int64)
+
+        if self.indices is not None:
+            index = self.indices[index]
+
+        # Copy out of the memory map only the selected (uint8) examples.
+        images = torch.from_numpy(np.array(self._images()[index])).to(self.device).float()
+        if self.grayscale:
+            images = images.mean(-1)
+
+        if self.intensity != 1:
+            images *= self.intensity
+
+        return images
+
+
+def load(dataset: str, split: str = 'train', crop: Union[int, Sequence[int]] = 0, intensity: float = 1.0,
+         device: Union[str, torch.device] = 'cpu') -> Tuple[ImageView, torch.Tensor]:
+    # language=rst
+    """
+    Loads a dataset split from its prepared data, preparing it first if needed; the replacement of loading a dataset,
+    multiplying it by ``intensity`` and cropping it in the experiment scripts.
+
+    :param dataset: Name of the dataset in ``DATASETS``.
+    :param split: ``train`` or ``test``.
+    :param crop: Amount to crop images at all borders, or at the ``(top, bottom, left, right)`` borders.
+    :param intensity: Constant to multiply images by.
+    :param device: Device of the images and labels.
+    :return: ``ImageView`` of the images and ``long`` tensor of the labels.
+    """
+    source, grayscale = DATASETS[dataset]
+    data = PreparedData.prepare(source, split)
+    return data.view(crop=crop, intensity=intensity, grayscale=grayscale, device=device), data.labels.to(device)
+
+
+def main(dataset='mnist', split='train'):
+    source, _ = DATASETS[dataset]
+    data = PreparedData.prepare(source, split)
+    print(f'{len(data)} prepared examples of shape {tuple(data.meta["shape"])} in {data.path}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dataset', type=str, default='mnist', choices=list(DATASETS))
+    parser.add_argument('--split', type=str, default='train', choices=['train', 'test'])
+    args = parser.parse_args()
+
+    main(**vars(args))
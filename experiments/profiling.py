@@ -0,0 +1,164 @@
+import json
+import torch
+
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+from bindsnet.network import Network
+
+
+class NetworkProfiler:
+    # language=rst
+    """
+    Opt-in wall-time profiler of ``Network.run``. While enabled, the per-step methods of the network's components are
+    wrapped on their instances: each layer's ``step`` / ``forward``, each connection's ``compute`` and ``normalize``,
+    each connection's learning rule ``update`` and each monitor's ``record``, as well as ``Network.run`` itself, so
+    the remainder (input handling, resets, ...) is reported as ``other``. Nothing is wrapped while disabled, so the
+    simulation runs at full speed.
+    """
+
+    def __init__(self, network: Network, synchronize: bool = False) -> None:
+        # language=rst
+        """
+        Constructor for ``NetworkProfiler``.
+
+        :param network: Network to profile; add its layers, connections and monitors first.
+        :param synchronize: Whether to synchronize CUDA around every timed call, so GPU kernels are attributed to the
+            component that launched them (at the cost of the overlap of their execution).
+        """
+        self.network = network
+        self.synchronize = synchronize
+        self.stats = {}
+        self._wrapped = []
+
+    def _targets(self) -> List[Tuple[str, str, object, str]]:
+        # (kind, name, object, method) of every wrapped method.
+        targets = [('network', 'run', self.network, 'run')]
+        for name, layer in self.network.layers.items():
+            method = 'step' if hasattr(layer, 'step') else 'forward'
+            targets.append(('layer', name, layer, method))
+
+        for (source, target), connection in self.network.connections.items():
+            name = f'{source}->{target}'
+            targets.append(('connection', name, connection, 'compute'))
+            if hasattr(connection, 'normalize'):
+                targets.append(('normalization', name, connection, 'normalize'))
+
+            rule = getattr(connection, 'update_rule', None)
+            if rule is not None and hasattr(rule, 'update'):
+                targets.append(('learning', f'{name} ({type(rule).__name__})', rule, 'update'))
+
+        for name, monitor in self.network.monitors.items():
+            targets.append(('monitor', name, monitor, 'record'))
+
+        return targets
+
+    def _wrap(self, key: Tuple[str, str], method: Callable) -> Callable:
+        stats = self.stats.setdefault(key, [0, 0.0])
+        synchronize = self.synchronize
+
+        def timed(*args, **kwargs):
+            if synchronize:
+                torch.cuda.synchronize()
+
+            start = perf_counter()
+            result = method(*args, **kwargs)
+            if synchronize:
+                torch.cuda.synchronize()
+
+            stats[0] += 1
+            stats[1] += perf_counter() - start
+            return result
+
+        return timed
+
+    def enable(self) -> 'NetworkProfiler':
+        # language=rst
+        """
+        Starts timing the network's components.
+        """
+        if self._wrapped:
+            return self
+
+        for kind, name, obj, method in self._targets():
+            # Keep whatever the instance itself defined, to restore it exactly.
+            previous = obj.__dict__.get(method)
+            setattr(obj, method, self._wrap((kind, name), getattr(obj, method)))
+            self._wrapped.append((obj, method, previous))
+
+        return self
+
+    def disable(self) -> 'NetworkProfiler':
+        # language=rst
+        """
+        Stops timing and restores the original methods. Accumulated statistics are kept.
+        """
+        for obj, method, previous in reversed(self._wrapped):
+            if previous is None:
+                delattr(obj, method)
+            else:
+                setattr(obj, method, previous)
+
+        self._wrapped = []
+        return self
+
+    def __enter__(self) -> 'NetworkProfiler':
+        return self.enable()
+
+    def __exit__(self, *args) -> None:
+        self.disable()
+
+    def reset(self) -> None:
+        # language=rst
+        """
+        Zeros the accumulated statistics.
+        """
+        for stats in self.stats.values():
+            stats[0], stats[1] = 0, 0.0
+
+    def to_dict(self) -> Dict[str, Dict]:
+        # language=rst
+        """
+        Accumulated statistics per component, including the unattributed remainder of ``Network.run`` as ``other``.
+
+        :return: Mapping from ``'<kind> <name>'`` to its ``calls``, total ``seconds`` and ``fraction`` of the time
+            spent in ``Network.run``.
+        """
+        calls, total = self.stats.get(('network', 'run'), [0, 0.0])
+        parts = {k: v for k, v in self.stats.items() if k != ('network', 'run')}
+
+        entries = {
+            f'{kind} {name}': {'calls': c, 'seconds': s, 'fraction': s / total if total > 0 else 0.0}
+            for (kind, name), (c, s) in sorted(parts.items(), key=lambda x: -x[1][1])
+        }
+
+        other = max(total - sum(s for _, s in parts.values()), 0.0)
+        entries['other'] = {'calls': calls, 'seconds': other, 'fraction': other / total if total > 0 else 0.0}
+        entries['network run'] = {'calls': calls, 'seconds': total, 'fraction': 1.0 if total > 0 else 0.0}
+
+        return entries
+
+    def table(self) -> str:
+        # language=rst
+        """
+        Formats the accumulated statistics as a table, slowest components first.
+        """
+        lines = [f'{"component":40s} {"calls":>9s} {"total (s)":>10s} {"ms / call":>10s} {"% run":>6s}']
+        for name, entry in self.to_dict().items():
+            per_call = 1e3 * entry['seconds'] / entry['calls'] if entry['calls'] else 0.0
+            lines.append(
+                f'{name:40s} {entry["calls"]:>9d} {entry["seconds"]:>10.3f} {per_call:>10.4f} '
+                f'{100 * entry["fraction"]:>6.1f}'
+            )
+
+        return '\n'.join(lines)
+
+    def dump(self, path: str) -> None:
+        # language=rst
+        """
+        Writes the accumulated statistics to a JSON file.
+
+        :param path: Output file.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
@@ -0,0 +1,226 @@
+import os
+import ast
+import argparse
+import importlib
+import traceback
+import numpy as np
+import multiprocessing as mp
+
+from time import time as t
+from typing import Dict, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# Loaded experiment scripts, per worker process.
+_modules = {}
+
+
+class AsyncPSO:
+    # language=rst
+    """
+    Particle swarm optimizer (maximizing) whose particles move independently: as soon as a particle's fitness is
+    reported, its personal and the global best are updated and the particle takes its next step, without waiting for
+    the rest of the swarm. Updates are vectorized over dimensions (and over particles on initialization). Uses the
+    SPSO constants :math:`\\omega = 1 / (2 \\ln 2)` and :math:`c = 1 / 2 + \\ln 2`.
+    """
+
+    def __init__(self, n_dim: int, n_particles: Optional[int] = None, low: float = 0.0, high: float = 500.0,
+                 seed: int = 0) -> None:
+        # language=rst
+        """
+        Constructor for ``AsyncPSO``.
+
+        :param n_dim: Number of optimized parameters.
+        :param n_particles: Swarm size; defaults to ``10 + 2 * sqrt(n_dim)``.
+        :param low: Lower bound of the initial positions.
+        :param high: Upper bound of the initial positions.
+        :param seed: Seed of the optimizer's random number generator.
+        """
+        self.n_dim = n_dim
+        self.n_particles = n_particles if n_particles is not None else int(10 + 2 * np.sqrt(n_dim))
+        self.omega = 1 / (2 * np.log(2))
+        self.c = 1 / 2 + np.log(2)
+
+        self.rng = np.random.RandomState(seed)
+
+        shape = (self.n_particles, n_dim)
+        self.positions = low + (high - low) * self.rng.random_sample(shape)
+        self.velocities = (low + (high - low) * self.rng.random_sample(shape) - self.positions) / 2
+
+        self.best_positions = self.positions.copy()
+        self.best_fitness = np.full(self.n_particles, -np.inf)
+        self.global_position = self.positions[0].copy()
+        self.global_fitness = -np.inf
+
+        # Number of completed updates per particle.
+        self.updates = np.zeros(self.n_particles, dtype=np.int64)
+
+    def report(self, i: int, fitness: float) -> np.ndarray:
+        # language=rst
+        """
+        Reports the fitness of particle ``i`` at its current position and moves it to its next position.
+
+        :param i: Index of the particle.
+        :param fitness: Fitness of the particle's current position.
+        :return: The particle's next position.
+        """
+        if fitness > self.best_fitness[i]:
+            self.best_fitness[i] = fitness
+            self.best_positions[i] = self.positions[i]
+
+        if fitness > self.global_fitness:
+            self.global_fitness = fitness
+            self.global_position = self.positions[i].copy()
+
+        r1, r2 = self.rng.random_sample((2, self.n_dim))
+        self.velocities[i] = self.omega * self.velocities[i] + \
+            r1 * self.c * (self.best_positions[i] - self.positions[i]) + \
+            r2 * self.c * (self.global_position - self.positions[i])
+        self.positions[i] = self.positions[i] + self.velocities[i]
+        self.updates[i] += 1
+
+        return self.positions[i]
+
+    def save(self, path: str) -> None:
+        # language=rst
+        """
+        Checkpoints the swarm to a single ``.npz`` file, replaced atomically.
+
+        :param path: Checkpoint file.
+        """
+        name, keys, pos, has_gauss, cached_gaussian = self.rng.get_state()
+        tmp = path + '.tmp.npz'
+        np.savez(
+            tmp, positions=self.positions, velocities=self.velocities, best_positions=self.best_positions,
+            best_fitness=self.best_fitness, global_position=self.global_position,
+            global_fitness=self.global_fitness, updates=self.updates, rng_keys=keys,
+            rng_state=np.array([pos, has_gauss]), rng_gaussian=cached_gaussian
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'AsyncPSO':
+        # language=rst
+        """
+        Restores a swarm from a checkpoint written by ``save``.
+
+        :param path: Checkpoint file.
+        :return: The restored ``AsyncPSO``.
+        """
+        state = np.load(path)
+        pso = cls(n_dim=state['positions'].shape[1], n_particles=state['positions'].shape[0])
+        for name in ('positions', 'velocities', 'best_positions', 'best_fitness', 'global_position', 'updates'):
+            setattr(pso, name, state[name].copy())
+
+        pso.global_fitness = float(state['global_fitness'])
+        pos, has_gauss = state['rng_state']
+        pso.rng.set_state(('MT19937', state['rng_keys'], int(pos), int(has_gauss), float(state['rng_gaussian'])))
+
+        return pso
+
+
+def _evaluate(script: str, kwargs: Dict) -> float:
+    # Runs an experiment script's ``main`` in a worker process and returns its fitness; -inf on failure.
+    try:
+        if script not in _modules:
+            _modules[script] = importlib.import_module(script)
+
+        return float(_modules[script].main(**kwargs))
+    except Exception:
+        traceback.print_exc()
+        return -np.inf
+
+
+def optimize(script: str, names: Sequence[str], fixed: Dict = None, seeds: Sequence[int] = (0,),
+             n_iterations: int = 20, workers: int = 1, checkpoint: str = 'pso_state.npz', low: float = 0.0,
+             high: float = 500.0) -> AsyncPSO:
+    # language=rst
+    """
+    Maximizes the return value of an experiment script's ``main`` over some of its arguments with ``AsyncPSO``. Each
+    (particle, seed) evaluation is a separate task on a process pool, and a particle moves on as soon as all its
+    seeds have returned, so workers are not left idle waiting for the slowest evaluation of a generation. The swarm
+    is checkpointed after every particle update, and resumed from ``checkpoint`` if it exists.
+
+    :param script: Module name of the experiment script; e.g., ``experiments.conversion.large_dqn_lif``.
+    :param names: Names of the optimized ``main`` arguments.
+    :param fixed: Other arguments to ``main``.
+    :param seeds: Random seeds to average each particle's fitness over.
+    :param n_iterations: Number of updates per particle.
+    :param workers: Number of worker processes.
+    :param checkpoint: Checkpoint file of the swarm.
+    :param low: Lower bound of the initial positions.
+    :param high: Upper bound of the initial positions.
+    :return: The optimized swarm.
+    """
+    fixed = fixed if fixed is not None else {}
+    if os.path.isfile(checkpoint):
+        pso = AsyncPSO.load(checkpoint)
+        print(f'Resumed swarm from {checkpoint} ({pso.updates.sum()} updates).')
+    else:
+        pso = AsyncPSO(len(names), low=low, high=high)
+
+    pending = {}
+    scores = {i: [] for i in range(pso.n_particles)}
+
+    def submit(i):
+        for seed in seeds:
+            kwargs = dict(fixed, seed=seed, **dict(zip(names, pso.positions[i].tolist())))
+            pending[executor.submit(_evaluate, script, kwargs)] = i
+
+    start = t()
+    with ProcessPoolExecutor(workers, mp_context=mp.get_context('spawn')) as executor:
+        for i in range(pso.n_particles):
+            if pso.updates[i] < n_iterations:
+                submit(i)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                scores[i].append(future.result())
+                if len(scores[i]) < len(seeds):
+                    continue
+
+                fitness = float(np.mean(scores[i]))
+                scores[i] = []
+
+                position = pso.positions[i].copy()
+                pso.report(i, fitness)
+                pso.save(checkpoint)
+
+                print(
+                    f'Particle {i} (update {pso.updates[i]} / {n_iterations}): fitness {fitness:.3f} at {position}; '
+                    f'best {pso.global_fitness:.3f} at {pso.global_position} ({t() - start:.1f}s)'
+                )
+
+                if pso.updates[i] < n_iterations:
+                    submit(i)
+
+    return pso
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('script', type=str, help='experiment module; e.g., experiments.conversion.large_dqn_lif')
+    parser.add_argument('--names', type=str, nargs='+', help='optimized arguments of main',
+                        default=['parameter1', 'parameter2', 'parameter3', 'parameter4', 'parameter5'])
+    parser.add_argument('--fixed', type=str, nargs='*', default=[], help='other arguments; e.g., time=250')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2, 3, 4], help='seeds per evaluation')
+    parser.add_argument('--n_iterations', type=int, default=20, help='no. updates per particle')
+    parser.add_argument('--workers', type=int, default=1, help='no. worker processes')
+    parser.add_argument('--checkpoint', type=str, default='pso_state.npz', help='swarm checkpoint file')
+    parser.add_argument('--low', type=float, default=0.0, help='lower bound of initial positions')
+    parser.add_argument('--high', type=float, default=500.0, help='upper bound of initial positions')
+    args = parser.parse_args()
+
+    fixed = {}
+    for arg in args.fixed:
+        name, value = arg.split('=', 1)
+        try:
+            fixed[name] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            fixed[name] = value
+
+    optimize(
+        args.script, args.names, fixed, seeds=args.seeds, n_iterations=args.n_iterations, workers=args.workers,
+        checkpoint=args.checkpoint, low=args.low, high=args.high
+    )
@@ -0,0 +1,276 @@
+import os
+import ast
+import csv
+import sqlite3
+import argparse
+
+from typing import Dict, List, Optional, Sequence
+
+from experiments import ROOT_DIR
+
+# Columns with these prefixes hold evaluation metrics; all other columns are indexed as hyper-parameters.
+METRIC_PREFIXES = ('mean_', 'max_', 'min_', 'std_', 'last_')
+
+
+def _parse(value):
+    # Converts a results value (as written to the old .csv files) to an int, float or string.
+    if not isinstance(value, str):
+        return value
+
+    # Underscore-joined names (e.g., '0_1.0_1.0') could otherwise parse as numbers with digit separators.
+    if '_' in value:
+        return value
+
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+    if isinstance(value, bool):
+        return int(value)
+    elif isinstance(value, (int, float)):
+        return value
+
+    return str(value)
+
+
+def _type(value) -> str:
+    # SQLite column type for a parsed value.
+    if isinstance(value, int):
+        return 'INTEGER'
+    elif isinstance(value, float):
+        return 'REAL'
+
+    return 'TEXT'
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class ResultsStore:
+    # language=rst
+    """
+    Results of a data / model combination's experiments, stored in an SQLite database (``results.db``) in its results
+    directory; one table per results file (``train``, ``test``, ...). The database runs in write-ahead-logging mode
+    and every row is inserted in its own ``IMMEDIATE`` transaction, so many concurrent jobs can record results
+    without corrupting or interleaving rows. Columns are typed (``INTEGER``, ``REAL`` or ``TEXT``, from the first row
+    written) and hyper-parameter columns are indexed.
+
+    Rows of an existing ``<table>.csv`` are imported when its table is created, so no earlier results are lost.
+    """
+
+    def __init__(self, path: str, timeout: float = 60.0) -> None:
+        # language=rst
+        """
+        Constructor for ``ResultsStore``.
+
+        :param path: Results directory; e.g., ``results/mnist/crop_locally_connected``.
+        :param timeout: Seconds to wait for other writers to release the database.
+        """
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        self.connection = sqlite3.connect(os.path.join(path, 'results.db'), timeout=timeout, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+
+    @classmethod
+    def of(cls, data: str, model: str, **kwargs) -> 'ResultsStore':
+        # language=rst
+        """
+        Opens the store of a data / model combination under ``results/``.
+
+        :param data: Name of the dataset; e.g., ``mnist``.
+        :param model: Name of the model; e.g., ``crop_locally_connected``.
+        :return: The ``ResultsStore``.
+        """
+        return cls(os.path.join(ROOT_DIR, 'results', data, model), **kwargs)
+
+    def __enter__(self) -> 'ResultsStore':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def tables(self) -> List[str]:
+        # language=rst
+        """
+        Names of the results tables in the store.
+        """
+        rows = self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+        return [row[0] for row in rows]
+
+    def columns(self, table: str) -> List[str]:
+        # language=rst
+        """
+        Column names of a results table, in order; empty if the table doesn't exist.
+        """
+        return [row[1] for row in self.connection.execute(f'PRAGMA table_info({_quote(table)})')]
+
+    def _add_columns(self, table: str, columns: Sequence[str], values: Sequence) -> None:
+        # Creates the table, or adds columns it doesn't have yet, typed by the given values; indexes hyper-parameters.
+        existing = self.columns(table)
+        new = [(c, v) for c, v in zip(columns, values) if c not in existing]
+        if not new:
+            return
+
+        if existing:
+            for c, v in new:
+                self.connection.execute(f'ALTER TABLE {_quote(table)} ADD COLUMN {_quote(c)} {_type(v)}')
+        else:
+            definitions = ', '.join(f'{_quote(c)} {_type(v)}' for c, v in new)
+            self.connection.execute(f'CREATE TABLE {_quote(table)} ({definitions})')
+
+        for c, _ in new:
+            if not c.startswith(METRIC_PREFIXES):
+                index = _quote(f'{table}_{c}')
+                self.connection.execute(f'CREATE INDEX IF NOT EXISTS {index} ON {_quote(table)} ({_quote(c)})')
+
+    def _insert(self, table: str, columns: Sequence[str], values: Sequence) -> None:
+        self._add_columns(table, columns, values)
+        names = ', '.join(_quote(c) for c in columns)
+        marks = ', '.join('?' for _ in columns)
+        self.connection.execute(f'INSERT INTO {_quote(table)} ({names}) VALUES ({marks})', list(values))
+
+    def _import_csv(self, table: str, columns: Sequence[str]) -> None:
+        # Imports the rows of a legacy <table>.csv into a newly created table. Rows longer than the legacy header
+        # take their names from ``columns`` if the header is a prefix of them.
+        path = os.path.join(self.path, table + '.csv')
+        if not os.path.isfile(path):
+            return
+
+        with open(path, 'r') as f:
+            reader = csv.reader(f)
+            header = [c.strip() for c in next(reader, [])]
+            if list(columns[:len(header)]) == header:
+                header = columns
+
+            for row in reader:
+                self._insert(table, self._name(header, len(row)), [_parse(v) for v in row])
+
+    @staticmethod
+    def _name(header: Sequence[str], n: int) -> List[str]:
+        # Column names for a row of n values; values without a header entry get positional names.
+        return list(header[:n]) + [f'column_{i}' for i in range(len(header), n)]
+
+    def write(self, table: str, columns: Sequence[str], values: Sequence) -> None:
+        # language=rst
+        """
+        Records a row of results atomically, creating the table or adding columns as needed.
+
+        :param table: Results table; e.g., ``train`` or ``test``.
+        :param columns: Column names; e.g., hyper-parameter names followed by metric names.
+        :param values: Values of the columns. Strings holding numbers are stored as numbers.
+        """
+        values = [_parse(v) for v in values]
+        columns = self._name([c.strip() for c in columns], len(values))
+
+        self._transaction(table, columns, values)
+
+    def _transaction(self, table: str, columns: Sequence[str], values: Optional[Sequence] = None) -> None:
+        # Imports the legacy .csv file if the table doesn't exist yet, then inserts the row, if any, atomically.
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            if not self.columns(table):
+                self._import_csv(table, columns)
+
+            if values is not None:
+                self._insert(table, columns, values)
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+
+        self.connection.execute('COMMIT')
+
+    def rows(self, table: str, where: Optional[Dict] = None) -> List[Dict]:
+        # language=rst
+        """
+        Reads the rows of a results table, optionally restricted to given column values.
+
+        :param table: Results table; e.g., ``train`` or ``test``.
+        :param where: Mapping from column name to required value.
+        :return: List of rows as ``{column: value}`` dictionaries; empty if the table doesn't exist.
+        """
+        if not self.columns(table):
+            self._transaction(table, [])
+            if not self.columns(table):
+                return []
+
+        where = where if where is not None else {}
+        query = f'SELECT * FROM {_quote(table)}'
+        if where:
+            query += ' WHERE ' + ' AND '.join(f'{_quote(c)} = ?' for c in where)
+
+        cursor = self.connection.execute(query, [_parse(v) for v in where.values()])
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def dataframe(self, table: str):
+        # language=rst
+        """
+        Reads a results table into a typed ``pandas.DataFrame``.
+
+        :param table: Results table; e.g., ``train`` or ``test``.
+        :return: ``DataFrame`` with one column per results column.
+        """
+        import pandas as pd
+
+        if not self.columns(table):
+            self._transaction(table, [])
+
+        return pd.read_sql_query(f'SELECT * FROM {_quote(table)}', self.connection)
+
+    def export_csv(self, table: str, path: Optional[str] = None) -> str:
+        # language=rst
+        """
+        Writes a results table out in the old comma-separated format, for tools that read ``train.csv`` etc.
+
+        :param table: Results table; e.g., ``train`` or ``test``.
+        :param path: Output file; defaults to ``<table>.csv`` in the results directory.
+        :return: Path of the written file.
+        """
+        path = path if path is not None else os.path.join(self.path, table + '.csv')
+        rows = self.rows(table)
+        with open(path, 'w') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(self.columns(table))
+            for row in rows:
+                writer.writerow(['' if v is None else v for v in row.values()])
+
+        return path
+
+
+def write_results(results_path: str, name: str, header: str, to_write: Sequence) -> None:
+    # language=rst
+    """
+    Records a row of results in the results store of ``results_path``. Drop-in replacement for appending
+    ``','.join(to_write)`` to the ``name`` file, writing ``header`` first if the file was missing.
+
+    :param results_path: Results directory of the data / model combination.
+    :param name: Name of the old results file; e.g., ``train.csv``. Its stem names the results table.
+    :param header: Comma-separated column names.
+    :param to_write: Row of values.
+    """
+    with ResultsStore(results_path) as store:
+        store.write(os.path.splitext(name)[0], header.strip().split(','), to_write)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('data', type=str, help='dataset name; e.g., mnist')
+    parser.add_argument('model', type=str, help='model name; e.g., crop_locally_connected')
+    parser.add_argument('--export', dest='export', action='store_true', help='export all tables to .csv files')
+    parser.set_defaults(export=False)
+    args = parser.parse_args()
+
+    with ResultsStore.of(args.data, args.model) as store:
+        for table in store.tables():
+            if args.export:
+                print(f'Exported {table} to {store.export_csv(table)}')
+            else:
+                print(f'{table}: {len(store.rows(table))} rows; columns {", ".join(store.columns(table))}')
@@ -5,13 +5,13 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 from bindsnet.datasets import MNIST
-from bindsnet.encoding import poisson
 from bindsnet.evaluation import ngram
 from bindsnet.network import load_network
 from bindsnet.network.monitors import Monitor
 from bindsnet.analysis.plotting import plot_locally_connected_weights, plot_spikes, plot_input
 
 from experiments import ROOT_DIR
+from experiments.utils import IntensityController, EarlyTermination
 
 model = 'crop_locally_connected'
 data = 'mnist'
@@ -62,7 +62,7 @@ def forward_perturbation(epsilon, image, target):
     return perturb
 
 
-def main(seed=0, n_examples=100, gpu=False, plot=False):
+def main(seed=0, n_examples=100, early_stop=False, gpu=False, plot=False):
 
     np.random.seed(seed)
 
@@ -121,6 +121,21 @@ def main(seed=0, n_examples=100, gpu=False, plot=False):
         spikes[layer] = Monitor(network.layers[layer], state_vars=['s'], time=time)
         network.add_monitor(spikes[layer], name=f'{layer}_spikes')
 
+    # Optionally end each simulation as soon as the ngram prediction can no longer change.
+    terminate = None
+    if early_stop:
+        terminate = EarlyTermination(
+            time=time, n_classes=n_classes, schemes=['ngram'], one_spike=True, ngram_scores=ngram_scores, n=2
+        )
+
+    controller = IntensityController(network, spikes['Y'], time=time, max_retries=0, terminate=terminate)
+
+    def predict(datum):
+        # Run the network on the input and classify the output spikes of this simulation only.
+        controller.run(datum)
+        s = spikes['Y'].get('s')[:, -controller.elapsed:].t().unsqueeze(0)
+        return ngram(spikes=s, ngram_scores=ngram_scores, n_labels=n_classes, n=2).item()
+
     # Train the network.
     print('\nBegin black box adversarial attack.\n')
 
@@ -140,15 +155,7 @@ def main(seed=0, n_examples=100, gpu=False, plot=False):
         label = labels[i % len(images)]
 
         # Check if the image is correctly classified.
-        sample = poisson(datum=original, time=time)
-        inpts = {'X': sample}
-
-        # Run the network on the input.
-        network.run(inpts=inpts, time=time)
-
-        # Check for incorrect classification.
-        s = spikes['Y'].get('s').view(1, n_neurons, time)
-        prediction = ngram(spikes=s, ngram_scores=ngram_scores, n_labels=10, n=2).item()
+        prediction = predict(original)
 
         if prediction != label:
             continue
@@ -157,15 +164,9 @@ def main(seed=0, n_examples=100, gpu=False, plot=False):
         adversarial = False
         while not adversarial:
             adv_example = 255 * torch.rand(original.size())
-            sample = poisson(datum=adv_example, time=time)
-            inpts = {'X': sample}
-
-            # Run the network on the input.
-            network.run(inpts=inpts, time=time)
 
             # Check for incorrect classification.
-            s = spikes['Y'].get('s').view(1, n_neurons, time)
-            prediction = ngram(spikes=s, ngram_scores=ngram_scores, n_labels=n_classes, n=2).item()
+            prediction = predict(adv_example)
 
             if prediction == label:
                 adversarial = True
@@ -217,15 +218,8 @@ def main(seed=0, n_examples=100, gpu=False, plot=False):
             candidate = spherical_candidate + length * new_source_direction
             candidate = torch.clamp(candidate, 0, 255)
 
-            sample = poisson(datum=candidate, time=time)
-            inpts = {'X': sample}
-
-            # Run the network on the input.
-            network.run(inpts=inpts, time=time)
-
             # Check for incorrect classification.
-            s = spikes['Y'].get('s').view(1, n_neurons, time)
-            prediction = ngram(spikes=s, ngram_scores=ngram_scores, n_labels=10, n=2).item()
+            prediction = predict(candidate)
 
             # Optionally plot various simulation information.
             if plot:
@@ -259,15 +253,19 @@ def main(seed=0, n_examples=100, gpu=False, plot=False):
 
     print('\nAdversarial attack complete.\n')
 
+    if early_stop:
+        print(f'Early termination saved {controller.saved} time steps.\n')
+
 
 if __name__ == '__main__':
     # Parameters.
     parser = argparse.ArgumentParser()
     parser.add_argument('--seed', type=int, default=0)
     parser.add_argument('--n_examples', type=int, default=100)
+    parser.add_argument('--early_stop', dest='early_stop', action='store_true')
     parser.add_argument('--gpu', dest='gpu', action='store_true')
     parser.add_argument('--plot', dest='plot', action='store_true')
-    parser.set_defaults(gpu=False, plot=False)
+    parser.set_defaults(early_stop=False, gpu=False, plot=False)
     args = parser.parse_args()
     args = vars(args)
 
@@ -7,19 +7,19 @@ from time import time as t
 
 from bindsnet.learning import NoOp
 from bindsnet.datasets import MNIST
-from bindsnet.encoding import poisson
 from bindsnet.network import load_network
 from bindsnet.network.monitors import Monitor
 
 from experiments import ROOT_DIR
-from experiments.utils import update_curves, print_results
+from experiments.utils import update_curves, print_results, IntensityController, EarlyTermination
+from experiments.results import write_results
 
 
 data_path = os.path.join(ROOT_DIR, 'data', 'MNIST')
 results_path = os.path.join(ROOT_DIR, 'results', 'mnist', 'diehl_and_cook_2015')
 
 
-def main(seed=0, p_remove=0):
+def main(seed=0, p_remove=0, early_stop=False):
 
     model = '2_400_60000_500.0_0.01_0.99_250_1_0.05_1e-07_0.5_10_250.pt'
 
@@ -91,6 +91,17 @@ def main(seed=0, p_remove=0):
         spikes[layer] = Monitor(network.layers[layer], state_vars=['s'], time=time)
         network.add_monitor(spikes[layer], name=f'{layer}_spikes')
 
+    # Optionally end the simulation of each example as soon as its predictions can no longer change.
+    terminate = None
+    if early_stop:
+        terminate = EarlyTermination(
+            time=time, n_classes=n_classes, one_spike=getattr(network.layers['Y'], 'one_spike', False),
+            assignments=assignments, proportions=proportions, ngram_scores=ngram_scores, n=2
+        )
+
+    # Escalates input intensity during simulation of examples with too little output activity.
+    controller = IntensityController(network, spikes['Y'], time=time, dt=1, terminate=terminate)
+
     start = t()
     for i in range(n_examples):
         if i % 10 == 0:
@@ -115,19 +126,9 @@ def main(seed=0, p_remove=0):
 
         # Get next input sample.
         image = images[i % len(images)].contiguous().view(-1)
-        sample = poisson(datum=image, time=time, dt=1)
-        inpts = {'X': sample}
-
-        # Run the network on the input.
-        network.run(inpts=inpts, time=time)
 
-        retries = 0
-        while spikes['Y'].get('s').sum() < 5 and retries < 3:
-            retries += 1
-            image *= 2
-            sample = poisson(datum=image, time=time, dt=1)
-            inpts = {'X': sample}
-            network.run(inpts=inpts, time=time)
+        # Run the network on the input, escalating input intensity part-way through if the output is quiet.
+        controller.run(image)
 
         # Add to spikes recording.
         spike_record[i % update_interval] = spikes['Y'].get('s').t()
@@ -153,6 +154,9 @@ def main(seed=0, p_remove=0):
     for scheme in preds:
         predictions[scheme] = torch.cat([predictions[scheme], preds[scheme]], -1)
 
+    if early_stop:
+        print(f'Early termination saved {controller.saved} / {n_examples * time} time steps.\n')
+
     print('Average accuracies:\n')
     for scheme in curves.keys():
         print('\t%s: %.2f' % (scheme, float(np.mean(curves[scheme]))))
@@ -166,20 +170,19 @@ def main(seed=0, p_remove=0):
     to_write = [str(x) for x in [seed, p_remove] + results]
     name = 'dac_neuron_robust.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            f.write(
-                'random_seed,p_remove\n'
-            )
+    header = (
+        'random_seed,p_remove,mean_all_activity,mean_proportion_weighting,mean_ngram,max_all_activity,'
+        'max_proportion_weighting,max_ngram\n'
+    )
 
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    write_results(results_path, name, header, to_write)
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--seed', default=0, type=int)
     parser.add_argument('--p_remove', default=0, type=float)
+    parser.add_argument('--early_stop', dest='early_stop', action='store_true')
     args = parser.parse_args()
     args = vars(args)
     main(**args)
@@ -0,0 +1,360 @@
+import os
+import json
+import zlib
+import torch
+import struct
+import numpy as np
+
+from typing import Dict, Iterator, Optional, Sequence, Tuple, Union
+from torch.utils.data import Dataset, DataLoader, BatchSampler, RandomSampler, SequentialSampler
+
+MAGIC = b'BNSPIKES'
+VERSION = 1
+
+# Per-chunk index entry: file offset, no. examples, and compressed lengths of the labels, counts and spikes sections.
+INDEX_FIELDS = 5
+
+
+class SpikeArchiveWriter:
+    # language=rst
+    """
+    Writes recorded binary spike trains and labels of a run to a single chunked archive file. The file starts with a
+    header (magic, version and a JSON description of shapes, dtypes and run parameters). It is followed by chunks of
+    ``chunk_size`` examples, each holding zlib-compressed labels, per-example spike counts and spike trains bit-packed
+    along the neuron dimension. The file ends with an index of chunk offsets, so ``SpikeArchive`` can seek to any
+    range of examples.
+    """
+
+    def __init__(self, path: str, time: int, n_neurons: int, chunk_size: int = 250, params: Optional[Dict] = None,
+                 level: int = 1) -> None:
+        # language=rst
+        """
+        Constructor for ``SpikeArchiveWriter``.
+
+        :param path: Path of the archive file to create.
+        :param time: Number of time steps per example.
+        :param n_neurons: Number of recorded neurons.
+        :param chunk_size: Number of examples per chunk.
+        :param params: JSON-serializable run parameters to store in the header.
+        :param level: ``zlib`` compression level.
+        """
+        self.path = path
+        self.time = time
+        self.n_neurons = n_neurons
+        self.chunk_size = chunk_size
+        self.level = level
+
+        self.counts_dtype = 'uint16' if time < 2 ** 16 else 'int32'
+        self.header = {
+            'time': time, 'n_neurons': n_neurons, 'chunk_size': chunk_size, 'counts_dtype': self.counts_dtype,
+            'params': params if params is not None else {}
+        }
+
+        self.file = open(path, 'wb')
+        header = json.dumps(self.header).encode('utf-8')
+        self.file.write(MAGIC + struct.pack('<II', VERSION, len(header)) + header)
+
+        self.index = []
+        self.buffer_spikes = []
+        self.buffer_labels = []
+        self.n_buffered = 0
+
+    def __enter__(self) -> 'SpikeArchiveWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(self, spikes: torch.Tensor, labels: torch.Tensor) -> None:
+        # language=rst
+        """
+        Appends examples to the archive. Full chunks are written to disk as they fill up.
+
+        :param spikes: Binary tensor of shape ``[n_examples, time, n_neurons]`` (or ``[time, n_neurons]``).
+        :param labels: Tensor of shape ``[n_examples]`` (or a single integer label).
+        """
+        spikes = spikes.detach().cpu().view(-1, self.time, self.n_neurons).numpy().astype(bool)
+        labels = torch.as_tensor(labels).detach().cpu().view(-1).numpy().astype(np.int64)
+        assert spikes.shape[0] == labels.shape[0], 'No. spike trains and labels must match'
+
+        self.buffer_spikes.append(spikes)
+        self.buffer_labels.append(labels)
+        self.n_buffered += spikes.shape[0]
+
+        while self.n_buffered >= self.chunk_size:
+            self._flush(self.chunk_size)
+
+    def _flush(self, n_examples: int) -> None:
+        # Writes the first ``n_examples`` buffered examples as a chunk.
+        spikes = np.concatenate(self.buffer_spikes)
+        labels = np.concatenate(self.buffer_labels)
+
+        sections = [
+            labels[:n_examples].tobytes(),
+            spikes[:n_examples].sum(1).astype(self.counts_dtype).tobytes(),
+            np.packbits(spikes[:n_examples], axis=-1).tobytes()
+        ]
+        sections = [zlib.compress(s, self.level) for s in sections]
+
+        self.index.append([self.file.tell(), n_examples] + [len(s) for s in sections])
+        for s in sections:
+            self.file.write(s)
+
+        self.buffer_spikes = [spikes[n_examples:]]
+        self.buffer_labels = [labels[n_examples:]]
+        self.n_buffered -= n_examples
+
+    def close(self) -> None:
+        # language=rst
+        """
+        Writes any remaining examples, the chunk index and the trailer, and closes the file.
+        """
+        if self.file.closed:
+            return
+
+        if self.n_buffered > 0:
+            self._flush(self.n_buffered)
+
+        index_offset = self.file.tell()
+        self.file.write(np.array(self.index, dtype=np.int64).reshape(-1, INDEX_FIELDS).tobytes())
+        self.file.write(struct.pack('<qq', index_offset, len(self.index)) + MAGIC)
+        self.file.close()
+
+
+class SpikeArchive:
+    # language=rst
+    """
+    Reader for archives written by ``SpikeArchiveWriter``. Only the chunks overlapping a requested range of examples
+    are read and decompressed. Summed (spike count) reads skip the spike train sections entirely.
+    """
+
+    def __init__(self, path: str) -> None:
+        # language=rst
+        """
+        Constructor for ``SpikeArchive``.
+
+        :param path: Path of the archive file.
+        """
+        self.path = path
+        self.file = open(path, 'rb')
+
+        magic, (version, header_len) = self.file.read(len(MAGIC)), struct.unpack('<II', self.file.read(8))
+        assert magic == MAGIC, f'{path} is not a spike archive'
+        assert version == VERSION, f'Unsupported spike archive version {version}'
+
+        header = json.loads(self.file.read(header_len).decode('utf-8'))
+        self.time = header['time']
+        self.n_neurons = header['n_neurons']
+        self.chunk_size = header['chunk_size']
+        self.counts_dtype = np.dtype(header['counts_dtype'])
+        self.params = header['params']
+
+        self.file.seek(-(16 + len(MAGIC)), 2)
+        index_offset, n_chunks = struct.unpack('<qq', self.file.read(16))
+        assert self.file.read(len(MAGIC)) == MAGIC, f'{path} is truncated; was the writer closed?'
+
+        self.file.seek(index_offset)
+        self.index = np.frombuffer(self.file.read(n_chunks * INDEX_FIELDS * 8), dtype=np.int64)
+        self.index = self.index.reshape(n_chunks, INDEX_FIELDS)
+
+        # Example offset of each chunk.
+        self.offsets = np.concatenate([[0], np.cumsum(self.index[:, 1])])
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def __enter__(self) -> 'SpikeArchive':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.file.close()
+
+    def _read_raw(self, c: int, summed: bool) -> Tuple[np.ndarray, np.ndarray]:
+        # Decompresses chunk ``c`` into labels and either spike counts or bit-packed spike trains.
+        offset, n_examples, labels_len, counts_len, spikes_len = self.index[c]
+        self.file.seek(offset)
+
+        labels = np.frombuffer(zlib.decompress(self.file.read(labels_len)), dtype=np.int64)
+        if summed:
+            counts = np.frombuffer(zlib.decompress(self.file.read(counts_len)), dtype=self.counts_dtype)
+            return labels, counts.reshape(n_examples, self.n_neurons)
+
+        self.file.seek(counts_len, 1)
+        packed = np.frombuffer(zlib.decompress(self.file.read(spikes_len)), dtype=np.uint8)
+        return labels, packed.reshape(n_examples, self.time, -1)
+
+    def _read_chunk(self, c: int, summed: bool) -> Tuple[torch.Tensor, torch.Tensor]:
+        # Decodes chunk ``c`` into spike counts or spike trains, and labels.
+        labels, data = self._read_raw(c, summed)
+        if summed:
+            spikes = data.astype(np.float32)
+        else:
+            spikes = np.unpackbits(data, axis=-1)[..., :self.n_neurons].astype(np.float32)
+
+        return torch.from_numpy(spikes), torch.from_numpy(labels.copy())
+
+    def chunks(self, start: int = 0, stop: Optional[int] = None,
+               summed: bool = False) -> Iterator[Tuple[torch.Tensor, torch.Tensor]]:
+        # language=rst
+        """
+        Iterates over the examples in ``[start, stop)`` one stored chunk at a time.
+
+        :param start: Index of the first example.
+        :param stop: Index one past the last example; defaults to the end of the archive.
+        :param summed: Whether to yield spike counts ``[n, n_neurons]`` instead of spike trains
+            ``[n, time, n_neurons]``.
+        :return: Iterator over ``(spikes, labels)`` tuples.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        first = np.searchsorted(self.offsets, start, side='right') - 1
+        for c in range(max(first, 0), len(self.index)):
+            if self.offsets[c] >= stop:
+                break
+
+            spikes, labels = self._read_chunk(c, summed)
+            lo = max(start - self.offsets[c], 0)
+            hi = min(stop, self.offsets[c + 1]) - self.offsets[c]
+            yield spikes[lo:hi], labels[lo:hi]
+
+    def read(self, start: int = 0, stop: Optional[int] = None,
+             summed: bool = False) -> Tuple[torch.Tensor, torch.Tensor]:
+        # language=rst
+        """
+        Reads the examples in ``[start, stop)``.
+
+        :param start: Index of the first example.
+        :param stop: Index one past the last example; defaults to the end of the archive.
+        :param summed: Whether to return spike counts ``[n, n_neurons]`` instead of spike trains
+            ``[n, time, n_neurons]``.
+        :return: ``(spikes, labels)`` tuple.
+        """
+        chunks = list(self.chunks(start, stop, summed))
+        if not chunks:
+            shape = (0, self.n_neurons) if summed else (0, self.time, self.n_neurons)
+            return torch.zeros(*shape), torch.zeros(0).long()
+
+        spikes, labels = zip(*chunks)
+        return torch.cat(spikes), torch.cat(labels)
+
+
+class SpikeDataset(Dataset):
+    # language=rst
+    """
+    Random-access ``torch.utils.data.Dataset`` over a spike archive. On first use, the archive is expanded into
+    uncompressed, memory-mapped ``.npy`` files next to it (labels, spike counts and bit-packed spike trains), so any
+    example can be read without decompressing its chunk and without holding the run in memory.
+
+    Indexing with a sequence of indices returns a whole minibatch at once; ``loader`` builds a ``DataLoader`` that
+    samples such minibatches (optionally shuffled) and prefetches them in worker processes.
+    """
+
+    def __init__(self, path: str, summed: bool = False, start: int = 0, stop: Optional[int] = None) -> None:
+        # language=rst
+        """
+        Constructor for ``SpikeDataset``.
+
+        :param path: Path of the spike archive.
+        :param summed: Whether to return spike counts ``[n_neurons]`` instead of spike trains ``[time, n_neurons]``.
+        :param start: Index of the first example of the archive to include.
+        :param stop: Index one past the last example to include; defaults to the end of the archive.
+        """
+        self.path = path
+        self.summed = summed
+        self.cache = path + '.cache'
+
+        with SpikeArchive(path) as archive:
+            self.time = archive.time
+            self.n_neurons = archive.n_neurons
+            self.start = start
+            self.stop = len(archive) if stop is None else min(stop, len(archive))
+
+            stale = not os.path.isdir(self.cache) or os.path.getmtime(self.cache) < os.path.getmtime(path)
+            if stale:
+                self._expand(archive)
+
+        # Memory maps are opened lazily, once per (worker) process.
+        self.arrays = None
+
+    def _expand(self, archive: SpikeArchive) -> None:
+        # Writes the archive's labels, counts and packed spike trains to memory-mappable .npy files.
+        tmp = self.cache + f'.{os.getpid()}.tmp'
+        os.makedirs(tmp, exist_ok=True)
+
+        n, n_bytes = len(archive), (archive.n_neurons + 7) // 8
+        labels = np.lib.format.open_memmap(os.path.join(tmp, 'labels.npy'), 'w+', np.int64, (n,))
+        counts = np.lib.format.open_memmap(
+            os.path.join(tmp, 'counts.npy'), 'w+', archive.counts_dtype, (n, archive.n_neurons)
+        )
+        packed = np.lib.format.open_memmap(
+            os.path.join(tmp, 'packed.npy'), 'w+', np.uint8, (n, archive.time, n_bytes)
+        )
+
+        for c in range(len(archive.index)):
+            lo, hi = archive.offsets[c], archive.offsets[c + 1]
+            labels[lo:hi], counts[lo:hi] = archive._read_raw(c, summed=True)
+            _, packed[lo:hi] = archive._read_raw(c, summed=False)
+
+        del labels, counts, packed
+        if os.path.isdir(self.cache):
+            for f in os.listdir(self.cache):
+                os.remove(os.path.join(self.cache, f))
+
+            os.rmdir(self.cache)
+
+        os.rename(tmp, self.cache)
+
+    def _open(self) -> None:
+        self.arrays = {
+            name: np.load(os.path.join(self.cache, name + '.npy'), mmap_mode='r')
+            for name in ('labels', 'counts', 'packed')
+        }
+
+    def __getstate__(self) -> Dict:
+        # Don't pickle memory maps into worker processes; each worker opens its own.
+        state = self.__dict__.copy()
+        state['arrays'] = None
+        return state
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index: Union[int, Sequence[int]]) -> Tuple[torch.Tensor, torch.Tensor]:
+        # language=rst
+        """
+        Reads one example, or a minibatch of examples given a sequence of indices.
+
+        :param index: Example index, or sequence of example indices.
+        :return: ``(spikes, label)`` tuple; spikes of shape ``[time, n_neurons]`` or ``[n_neurons]`` if ``summed``,
+            with a leading batch dimension when indexed with a sequence.
+        """
+        if self.arrays is None:
+            self._open()
+
+        index = np.asarray(index) + self.start
+        if self.summed:
+            spikes = self.arrays['counts'][index].astype(np.float32)
+        else:
+            spikes = np.unpackbits(self.arrays['packed'][index], axis=-1)[..., :self.n_neurons].astype(np.float32)
+
+        return torch.from_numpy(spikes), torch.as_tensor(self.arrays['labels'][index])
+
+    def loader(self, batch_size: int, shuffle: bool = True, num_workers: int = 0, drop_last: bool = False,
+               **kwargs) -> DataLoader:
+        # language=rst
+        """
+        Builds a ``DataLoader`` over minibatches of this dataset. Each minibatch is read with a single indexing
+        operation on the memory maps.
+
+        :param batch_size: Number of examples per minibatch.
+        :param shuffle: Whether to sample minibatches in a random order.
+        :param num_workers: Number of worker processes prefetching minibatches.
+        :param drop_last: Whether to drop the last, incomplete minibatch.
+        :param kwargs: Further keyword arguments to ``DataLoader``; e.g., ``prefetch_factor`` or ``pin_memory``.
+        :return: ``DataLoader`` yielding ``(spikes, labels)`` minibatches.
+        """
+        sampler = RandomSampler(self) if shuffle else SequentialSampler(self)
+        sampler = BatchSampler(sampler, batch_size=batch_size, drop_last=drop_last)
+        return DataLoader(self, sampler=sampler, batch_size=None, num_workers=num_workers, **kwargs)
@@ -18,7 +18,9 @@ from bindsnet.utils import get_square_weights, get_square_assignments
 from bindsnet.analysis.plotting import plot_input, plot_spikes, plot_weights, plot_assignments, plot_performance
 
 from experiments import ROOT_DIR
+from experiments.inhibition import constant_inhibition
 from experiments.utils import update_curves, print_results
+from experiments.results import write_results
 
 model = 'diehl_and_cook_2015'
 data = 'spoken_mnist'
@@ -84,7 +86,7 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=500, dt=1, th
         )
         network.add_connection(input_connection, source='X', target='Y')
 
-        w = -inhib * (torch.ones(n_neurons, n_neurons) - torch.diag(torch.ones(n_neurons)))
+        w = constant_inhibition(n_neurons, inhib)
         recurrent_connection = Connection(
             source=network.layers['Y'], target=network.layers['Y'], w=w, wmin=-inhib, wmax=0
         )
@@ -208,7 +210,7 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=500, dt=1, th
         retries = 0
         while spikes['Y'].get('s').sum() < 5 and retries < 3:
             retries += 1
-            sample *= 2
+            sample = sample * 2
             inpts = {'X': sample}
             network.run(inpts=inpts, time=time)
 
@@ -287,19 +289,16 @@ def main(seed=0, n_neurons=100, n_train=60000, n_test=10000, inhib=500, dt=1, th
     to_write = [str(x) for x in to_write]
     name = 'train.csv' if train else 'test.csv'
 
-    if not os.path.isfile(os.path.join(results_path, name)):
-        with open(os.path.join(results_path, name), 'w') as f:
-            if train:
-                f.write('random_seed,n_neurons,n_train,inhib,timestep,theta_plus,theta_decay,intensity,'
-                        'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                        'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
-            else:
-                f.write('random_seed,n_neurons,n_train,n_test,inhib,timestep,theta_plus,theta_decay,intensity,'
-                        'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
-                        'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
+    if train:
+        header = ('random_seed,n_neurons,n_train,inhib,timestep,theta_plus,theta_decay,intensity,'
+                'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+                'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
+    else:
+        header = ('random_seed,n_neurons,n_train,n_test,inhib,timestep,theta_plus,theta_decay,intensity,'
+                'progress_interval,update_interval,mean_all_activity,mean_proportion_weighting,'
+                'mean_ngram,max_all_activity,max_proportion_weighting,max_ngram\n')
 
-    with open(os.path.join(results_path, name), 'a') as f:
-        f.write(','.join(to_write) + '\n')
+    write_results(results_path, name, header, to_write)
 
     if labels.numel() > n_examples:
         labels = labels[:n_examples]
@@ -0,0 +1,469 @@
+import os
+import ast
+import pickle
+import inspect
+import argparse
+import importlib
+import traceback
+import multiprocessing as mp
+
+from itertools import product
+from time import time as t
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from experiments.results import ResultsStore
+
+# Results file column names that differ from the names of the scripts' ``main`` arguments.
+COLUMN_ALIASES = {'random_seed': 'seed', 'timestep': 'dt'}
+
+# Per-worker state: loaded datasets, keyed by (dataset class, path, split), and the loaded script modules.
+_datasets = {}
+_modules = {}
+
+
+def expand_grid(grid: Dict[str, Sequence], fixed: Dict = None) -> List[Dict]:
+    # language=rst
+    """
+    Expands a hyper-parameter grid into the list of all its configurations.
+
+    :param grid: Mapping from ``main`` argument name to the values to sweep over.
+    :param fixed: Arguments shared by all configurations.
+    :return: List of keyword argument dictionaries, in the order of nested ``for`` loops over ``grid``.
+    """
+    fixed = fixed if fixed is not None else {}
+    return [dict(fixed, **dict(zip(grid.keys(), values))) for values in product(*grid.values())]
+
+
+def _same(value, entry) -> bool:
+    # Compares an argument value with its (typed, or string) value in the results store.
+    if not isinstance(entry, str):
+        return entry == value
+
+    try:
+        return ast.literal_eval(entry) == value
+    except (ValueError, SyntaxError):
+        return str(value) == entry
+
+
+def _matches(config: Dict, row: Dict) -> bool:
+    # Whether a results row was produced by a configuration; rows without any argument columns never match.
+    compared = [(COLUMN_ALIASES.get(c, c), v) for c, v in row.items() if COLUMN_ALIASES.get(c, c) in config]
+    return len(compared) > 0 and all(_same(config[name], v) for name, v in compared)
+
+
+def completed(script: str, configs: List[Dict], train: bool = True) -> List[bool]:
+    # language=rst
+    """
+    Checks which configurations already have a row in the ``train`` (or ``test``) table of the results store of
+    ``results/<data>/<model>``. All results columns that are arguments of the script's ``main`` must match, using the
+    script defaults for arguments missing from a configuration.
+
+    :param script: Module name of the experiment script; e.g., ``experiments.mnist.crop_locally_connected``.
+    :param configs: Keyword argument dictionaries.
+    :param train: Whether to check training (or test) results.
+    :return: Whether each configuration has been run.
+    """
+    module = importlib.import_module(script)
+    with ResultsStore.of(module.data, module.model) as store:
+        rows = store.rows('train' if train else 'test')
+
+    defaults = {
+        name: p.default for name, p in inspect.signature(module.main).parameters.items()
+        if p.default is not inspect.Parameter.empty
+    }
+
+    done = []
+    for config in configs:
+        config = dict(defaults, **config)
+        done.append(any(_matches(config, row) for row in rows))
+
+    return done
+
+
+def _cached_dataset(cls):
+    # Subclass of a ``bindsnet.datasets`` class that loads each split once per worker. Copies are returned, since
+    # scripts scale the loaded images in-place.
+    class Cached(cls):
+        def _cached(self, split, load):
+            key = (cls.__name__, str(getattr(self, 'path', None)), split)
+            if key not in _datasets:
+                _datasets[key] = load()
+
+            return tuple(x.clone() if hasattr(x, 'clone') else x for x in _datasets[key])
+
+        def get_train(self):
+            return self._cached('train', super().get_train)
+
+        def get_test(self):
+            return self._cached('test', super().get_test)
+
+    Cached.__name__ = cls.__name__
+    return Cached
+
+
+def _load(script: str):
+    # Imports an experiment script once per worker, with dataset loading cached.
+    if script not in _modules:
+        module = importlib.import_module(script)
+        for name, value in list(vars(module).items()):
+            if isinstance(value, type) and hasattr(value, 'get_train') and hasattr(value, 'get_test'):
+                setattr(module, name, _cached_dataset(value))
+
+        _modules[script] = module
+
+    return _modules[script]
+
+
+def _init_worker(threads: int, counter) -> None:
+    # Pins each worker to its own block of cores and limits its intra-op threads.
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[var] = str(threads)
+
+    import torch
+    torch.set_num_threads(threads)
+
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+
+    if hasattr(os, 'sched_setaffinity'):
+        cores = sorted(os.sched_getaffinity(0))
+        block = cores[index * threads % len(cores):][:threads]
+        if block:
+            os.sched_setaffinity(0, block)
+
+
+def _run(task: Tuple[str, Dict, Sequence[str]]) -> Tuple[Dict, float, str]:
+    # Runs the phases of a single configuration; returns the configuration, wall time and traceback, if any.
+    script, config, phases = task
+    start = t()
+    try:
+        module = _load(script)
+        for phase in phases:
+            module.main(**dict(config, train=phase == 'train'))
+    except Exception:
+        return config, t() - start, traceback.format_exc()
+
+    return config, t() - start, ''
+
+
+def available_cores() -> int:
+    # language=rst
+    """
+    Number of cores this process may run on (respects SLURM / ``taskset`` CPU masks where supported).
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count()
+
+
+def sweep(script: str, grid: Dict[str, Sequence], fixed: Dict = None, phases: Sequence[str] = ('train', 'test'),
+          workers: int = None, threads: int = 1, skip: bool = True, dry_run: bool = False) -> List[Tuple[Dict, str]]:
+    # language=rst
+    """
+    Runs an experiment script's ``main`` over a hyper-parameter grid on a local process pool. Workers are
+    long-lived, so torch, bindsnet and the datasets are loaded once per worker rather than once per configuration.
+
+    :param script: Module name of the experiment script; e.g., ``experiments.mnist.crop_locally_connected``.
+    :param grid: Mapping from ``main`` argument name to the values to sweep over.
+    :param fixed: Arguments shared by all configurations.
+    :param phases: Phases to run per configuration, in order; ``'train'`` and / or ``'test'``.
+    :param workers: Number of worker processes; defaults to the available cores divided by ``threads``.
+    :param threads: Number of torch threads per worker.
+    :param skip: Whether to skip phases whose results are already in the results files.
+    :param dry_run: Only print the configurations that would run.
+    :return: List of ``(config, traceback)`` for failed configurations.
+    """
+    configs = expand_grid(grid, fixed)
+
+    done = {p: completed(script, configs, train=p == 'train') if skip else [False] * len(configs) for p in phases}
+
+    tasks = []
+    for i, config in enumerate(configs):
+        todo = [p for p in phases if not done[p][i]]
+        if todo:
+            tasks.append((script, config, todo))
+
+    print(f'{len(tasks)} / {len(configs)} configurations to run.')
+    if dry_run:
+        for _, config, todo in tasks:
+            print('-', ', '.join(todo), ':', config)
+
+        return []
+
+    workers = workers if workers is not None else max(available_cores() // threads, 1)
+    workers = min(workers, len(tasks))
+    if workers == 0:
+        return []
+
+    context = mp.get_context('spawn')
+    counter = context.Value('i', 0)
+
+    failures = []
+    start = t()
+    with context.Pool(workers, initializer=_init_worker, initargs=(threads, counter)) as pool:
+        for i, (config, elapsed, error) in enumerate(pool.imap_unordered(_run, tasks)):
+            status = 'failed' if error else 'done'
+            print(f'[{i + 1} / {len(tasks)}] {status} in {elapsed:.1f}s: {config}')
+            if error:
+                print(error)
+                failures.append((config, error))
+
+    print(f'Sweep complete in {t() - start:.1f}s; {len(failures)} failed.')
+    return failures
+
+
+class Pruned(Exception):
+    # language=rst
+    """
+    Raised from ``update_curves`` to stop a configuration that lost at a successive-halving rung.
+    """
+
+
+def rungs(min_examples: int, eta: int, n_train: int) -> List[int]:
+    # language=rst
+    """
+    Rung boundaries of successive halving: ``min_examples * eta ** k`` training examples, below ``n_train``.
+
+    :param min_examples: Training examples before the first rung.
+    :param eta: Factor between consecutive rungs; only the best ``1 / eta`` of configurations pass a rung.
+    :param n_train: Full training budget.
+    :return: Increasing list of rung boundaries.
+    """
+    boundaries = []
+    while min_examples * eta ** len(boundaries) < n_train:
+        boundaries.append(min_examples * eta ** len(boundaries))
+
+    return boundaries
+
+
+def _rung_scores(curves: Dict[str, list], update_interval: int, boundaries: Sequence[int],
+                 metric: str) -> List[float]:
+    # Accuracies of an accuracy curve at the rung boundaries it has reached.
+    curve = curves[metric]
+    indices = [-(-b // update_interval) - 1 for b in boundaries]
+    return [float(curve[i]) for i in indices if i < len(curve)]
+
+
+def _seed_rungs(module, brackets: Sequence[Sequence[int]], metric: str) -> Dict:
+    # Rung scores of earlier runs, from the training curves checkpointed under the script's ``curves_path``.
+    scores = {}
+    path = getattr(module, 'curves_path', None)
+    if path is None or not os.path.isdir(path):
+        return scores
+
+    import torch
+
+    # Curves files hold plain Python objects; newer torch versions only unpickle those with ``weights_only=False``.
+    kwargs = {'weights_only': False} if 'weights_only' in inspect.signature(torch.load).parameters else {}
+
+    for f in os.listdir(path):
+        if not (f.startswith('train_') and f.endswith('.pt')):
+            continue
+
+        # Skip files that were removed, or are still being written by a running job.
+        try:
+            curves, update_interval, _ = torch.load(os.path.join(path, f), **kwargs)
+        except (OSError, EOFError, RuntimeError, pickle.UnpicklingError):
+            continue
+
+        if metric not in curves:
+            continue
+
+        for b, boundaries in enumerate(brackets):
+            for k, score in enumerate(_rung_scores(curves, update_interval, boundaries, metric)):
+                scores.setdefault((b, k), []).append(score)
+
+    return scores
+
+
+def _halving_hook(state, lock, index: int, bracket: int, boundaries: Sequence[int], eta: int, metric: str,
+                  update_interval: int):
+    # Curve hook of a configuration: records its accuracy at each rung it reaches (in the shared ``state``) and
+    # stops it unless it is among the best 1 / eta of the configurations that have reached the rung so far. Rungs
+    # with fewer than eta scores promote everyone, so the first configurations aren't stopped for lack of company.
+    passed = [0]
+
+    def hook(curves):
+        score = float(curves[metric][-1])
+        state[index] = (len(curves[metric]) * update_interval, score)
+        for k, rung_score in enumerate(_rung_scores(curves, update_interval, boundaries, metric)[passed[0]:],
+                                       passed[0]):
+            passed[0] = k + 1
+            with lock:
+                scores = state.get((bracket, k), []) + [rung_score]
+                state[(bracket, k)] = scores
+
+            rank = sorted(scores, reverse=True).index(rung_score)
+            if len(scores) >= eta and rank >= max(len(scores) // eta, 1):
+                raise Pruned(f'rank {rank + 1} / {len(scores)} at rung {k} ({boundaries[k]} examples)')
+
+    return hook
+
+
+def _run_halving(task: Tuple) -> Tuple[Dict, float, str, Optional[int]]:
+    # Runs the phases of a configuration with the successive-halving hook installed during training; returns the
+    # configuration, wall time, traceback (if any) and the rung it was stopped at (if any).
+    script, config, phases, index, bracket, boundaries, eta, metric, state, lock = task
+    start = t()
+    from experiments import utils
+
+    try:
+        module = _load(script)
+        defaults = inspect.signature(module.main).parameters
+        update_interval = config.get('update_interval', defaults['update_interval'].default)
+        hook = _halving_hook(state, lock, index, bracket, boundaries, eta, metric, update_interval)
+        for phase in phases:
+            utils.curve_hooks[:] = [hook] if phase == 'train' else []
+            module.main(**dict(config, train=phase == 'train'))
+    except Pruned as e:
+        print(f'Stopped {config}: {e}')
+        return config, t() - start, '', state.get(index, (None,))[0]
+    except Exception:
+        return config, t() - start, traceback.format_exc(), None
+    finally:
+        utils.curve_hooks[:] = []
+
+    return config, t() - start, '', None
+
+
+def halving(script: str, grid: Dict[str, Sequence], fixed: Dict = None, phases: Sequence[str] = ('train', 'test'),
+            min_examples: int = 1000, eta: int = 3, brackets: int = 1, metric: str = 'all', workers: int = None,
+            threads: int = 1, skip: bool = True, dry_run: bool = False) -> List[Tuple[Dict, Optional[float]]]:
+    # language=rst
+    """
+    Sweeps a hyper-parameter grid with asynchronous successive halving. Every configuration trains on the process
+    pool as usual, but each time its accuracy curve (``metric``, as checkpointed to ``curves/<data>/<model>/`` every
+    ``update_interval``) crosses a rung boundary, it is compared with all configurations that reached that rung
+    before it, and is stopped unless it ranks in the best ``1 / eta``. Winners continue to the next rung, up to the
+    full ``n_train``; only they run the remaining phases (e.g. ``test``). Rung accuracies of the training curves
+    already on disk are counted too, so a restarted sweep keeps its pruning history.
+
+    With ``brackets > 1``, configurations are dealt round-robin to Hyperband brackets whose first rung is at
+    ``min_examples * eta ** b`` examples, hedging against early rungs being too noisy to rank configurations.
+
+    The curves are read through ``experiments.utils.curve_hooks``, so this applies to scripts which evaluate with
+    ``experiments.utils.update_curves``.
+
+    :param script: Module name of the experiment script; e.g., ``experiments.mnist.crop_locally_connected``.
+    :param grid: Mapping from ``main`` argument name to the values to sweep over.
+    :param fixed: Arguments shared by all configurations.
+    :param phases: Phases to run per configuration, in order; ``'train'`` and / or ``'test'``.
+    :param min_examples: Training examples before the first rung.
+    :param eta: Factor between consecutive rungs; only the best ``1 / eta`` of configurations pass a rung.
+    :param brackets: Number of Hyperband brackets.
+    :param metric: Classification scheme whose accuracy ranks the configurations.
+    :param workers: Number of worker processes; defaults to the available cores divided by ``threads``.
+    :param threads: Number of torch threads per worker.
+    :param skip: Whether to skip phases whose results are already in the results files.
+    :param dry_run: Only print the configurations and their rungs.
+    :return: List of ``(config, accuracy)`` of the configurations trained to completion, best first.
+    """
+    configs = expand_grid(grid, fixed)
+    module = importlib.import_module(script)
+    defaults = inspect.signature(module.main).parameters
+
+    done = {p: completed(script, configs, train=p == 'train') if skip else [False] * len(configs) for p in phases}
+
+    schedules = []
+    tasks = []
+    for i, config in enumerate(configs):
+        n_train = config.get('n_train', defaults['n_train'].default)
+        bracket = i % brackets
+        schedules.append(rungs(min_examples * eta ** bracket, eta, n_train))
+
+        todo = [p for p in phases if not done[p][i]]
+        if todo:
+            tasks.append([script, config, todo, i, bracket])
+
+    print(f'{len(tasks)} / {len(configs)} configurations to run.')
+    if dry_run:
+        for _, config, todo, i, bracket in tasks:
+            print('-', ', '.join(todo), ':', config, f'(bracket {bracket}; rungs {schedules[i]})')
+
+        return []
+
+    workers = workers if workers is not None else max(available_cores() // threads, 1)
+    workers = min(workers, len(tasks))
+    if workers == 0:
+        return []
+
+    context = mp.get_context('spawn')
+    counter = context.Value('i', 0)
+
+    with context.Manager() as manager:
+        state = manager.dict(_seed_rungs(module, [schedules[b] for b in range(min(brackets, len(configs)))], metric))
+        lock = manager.Lock()
+        tasks = [(*task, schedules[task[3]], eta, metric, state, lock) for task in tasks]
+
+        full = 0
+        finished = []
+        start = t()
+        with context.Pool(workers, initializer=_init_worker, initargs=(threads, counter)) as pool:
+            for i, (config, elapsed, error, stopped) in enumerate(pool.imap_unordered(_run_halving, tasks)):
+                status = 'failed' if error else f'stopped after {stopped} examples' if stopped else 'done'
+                print(f'[{i + 1} / {len(tasks)}] {status} in {elapsed:.1f}s: {config}')
+                if error:
+                    print(error)
+                elif not stopped:
+                    full += 1
+                    index = configs.index(config)
+                    finished.append((config, state[index][1] if index in state else None))
+
+        print(f'Successive halving complete in {t() - start:.1f}s; {full} / {len(tasks)} trained to completion.')
+
+    finished.sort(key=lambda x: -float('inf') if x[1] is None else -x[1])
+    for config, accuracy in finished:
+        print(f'{accuracy}: {config}')
+
+    return finished
+
+
+def _parse(value: str):
+    # Parses a command-line value as a Python literal, falling back to a string.
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('script', type=str, help='experiment module; e.g., experiments.mnist.crop_locally_connected')
+    parser.add_argument('--grid', type=str, nargs='*', default=[], help='swept arguments; e.g., lr=1e-2,1e-3')
+    parser.add_argument('--fixed', type=str, nargs='*', default=[], help='shared arguments; e.g., time=250')
+    parser.add_argument('--phases', type=str, nargs='+', default=['train', 'test'], choices=['train', 'test'])
+    parser.add_argument('--workers', type=int, default=None, help='no. worker processes')
+    parser.add_argument('--threads', type=int, default=1, help='no. torch threads per worker')
+    parser.add_argument('--no_skip', dest='skip', action='store_false', help='re-run completed configurations')
+    parser.add_argument('--dry_run', dest='dry_run', action='store_true', help='only list pending configurations')
+    parser.add_argument('--halving', dest='halving', action='store_true', help='stop losing configurations early')
+    parser.add_argument('--min_examples', type=int, default=1000, help='training examples before the first rung')
+    parser.add_argument('--eta', type=int, default=3, help='reduction factor between rungs')
+    parser.add_argument('--brackets', type=int, default=1, help='no. Hyperband brackets')
+    parser.add_argument('--metric', type=str, default='all', help='classification scheme ranking configurations')
+    parser.set_defaults(skip=True, dry_run=False, halving=False)
+    args = parser.parse_args()
+
+    grid = {}
+    for arg in args.grid:
+        name, values = arg.split('=', 1)
+        grid[name] = [_parse(v) for v in values.split(',')]
+
+    fixed = {}
+    for arg in args.fixed:
+        name, value = arg.split('=', 1)
+        fixed[name] = _parse(value)
+
+    if args.halving:
+        halving(
+            args.script, grid, fixed, phases=args.phases, min_examples=args.min_examples, eta=args.eta,
+            brackets=args.brackets, metric=args.metric, workers=args.workers, threads=args.threads, skip=args.skip,
+            dry_run=args.dry_run
+        )
+    else:
+        sweep(
+            args.script, grid, fixed, phases=args.phases, workers=args.workers, threads=args.threads, skip=args.skip,
+            dry_run=args.dry_run
+        )
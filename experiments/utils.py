@@ -1,9 +1,25 @@
+import os
+import csv
+import json
 import torch
+import socket
+import resource
 import numpy as np
 
-from typing import Dict, Tuple
+from time import time as t
+from copy import deepcopy
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Callable, Optional, Sequence, Union
 
-from bindsnet.evaluation import all_activity, proportion_weighting, ngram, logreg_predict
+from bindsnet.encoding import poisson
+from bindsnet.network import Network
+from bindsnet.network.monitors import Monitor
+from bindsnet.evaluation import all_activity, proportion_weighting, ngram, logreg_predict, update_ngram_scores
+
+from experiments.evaluation import NgramTable
+
+# Callbacks invoked with the accuracy curves after every ``update_curves`` call; e.g., early stopping of sweeps.
+curve_hooks = []
 
 
 def print_results(results: Dict[str, list]) -> None:
@@ -23,6 +39,254 @@ def print_results(results: Dict[str, list]) -> None:
         print(f'Results for scheme "{s}": {last:.2f} (last), {mean:.2f} (mean), {std:.2f} (std.), {best:.2f} (best)')
 
 
+class SpikeRecord:
+    # language=rst
+    """
+    Compact record of binary spike trains for a window of examples, stored bit-packed along the neuron dimension
+    (one bit per neuron per time step, versus 32 bits for a ``float32`` tensor). Per-example spike counts are kept
+    alongside for the rate-based evaluation schemes. Supports the indexing and iteration used by the evaluation
+    functions: assigning with ``record[i] = s`` or ``record[i:j] = s``, reading dense ``float`` tensors back with
+    ``record[i]`` or ``record[i:j]``, and iterating over examples (as ``ngram`` and ``update_ngram_scores`` do).
+    """
+
+    def __init__(self, n_examples: int, time: int, n_neurons: int) -> None:
+        # language=rst
+        """
+        Constructor for ``SpikeRecord``.
+
+        :param n_examples: Number of examples in the record; e.g., ``update_interval``.
+        :param time: Number of time steps per example.
+        :param n_neurons: Number of recorded neurons.
+        """
+        self.n_examples = n_examples
+        self.time = time
+        self.n_neurons = n_neurons
+
+        self.packed = np.zeros((n_examples, time, (n_neurons + 7) // 8), dtype=np.uint8)
+        self.spike_counts = np.zeros((n_examples, n_neurons), dtype=np.int32)
+
+    def __len__(self) -> int:
+        return self.n_examples
+
+    def size(self, dim: Optional[int] = None):
+        # language=rst
+        """
+        Size of the equivalent dense ``[n_examples, time, n_neurons]`` tensor.
+
+        :param dim: Optional dimension to return the size of.
+        :return: ``torch.Size`` of the record, or the size of dimension ``dim``.
+        """
+        size = torch.Size([self.n_examples, self.time, self.n_neurons])
+        return size if dim is None else size[dim]
+
+    def __setitem__(self, index, spikes: torch.Tensor) -> None:
+        spikes = spikes.detach().cpu().numpy().astype(bool)
+        self.packed[index] = np.packbits(spikes, axis=-1)
+        self.spike_counts[index] = spikes.sum(-2)
+
+    def __getitem__(self, index) -> torch.Tensor:
+        unpacked = np.unpackbits(self.packed[index], axis=-1)[..., :self.n_neurons]
+        return torch.from_numpy(unpacked.astype(np.float32))
+
+    def __iter__(self):
+        for i in range(self.n_examples):
+            yield self[i]
+
+    def counts(self) -> torch.Tensor:
+        # language=rst
+        """
+        Spike counts per example and neuron, shaped as a record with a single time step. Equivalent input to the
+        dense record for the rate-based ``assign_labels``, ``all_activity`` and ``proportion_weighting``, which only
+        use activity summed over time.
+
+        :return: Tensor of shape ``[n_examples, 1, n_neurons]`` of spike counts.
+        """
+        return torch.from_numpy(self.spike_counts.astype(np.float32)).unsqueeze(1)
+
+
+def rates_view(spike_record: Union['SpikeRecord', torch.Tensor]) -> torch.Tensor:
+    # language=rst
+    """
+    Returns the cheapest input for rate-based evaluation functions: spike counts for a ``SpikeRecord``, or the
+    dense record unchanged.
+
+    :param spike_record: ``SpikeRecord`` or ``torch.Tensor`` of shape ``[n_examples, time, n_neurons]``.
+    :return: Tensor of shape ``[n_examples, time, n_neurons]`` or ``[n_examples, 1, n_neurons]``.
+    """
+    if isinstance(spike_record, SpikeRecord):
+        return spike_record.counts()
+
+    return spike_record
+
+
+class StreamingEvaluator:
+    # language=rst
+    """
+    Online alternative to recording a window of ``update_interval`` spike trains and evaluating them all at once.
+    Each example is classified as soon as it has been simulated. Its spike counts and ngrams are then folded into
+    running per-class sums. At the end of each window, ``update_curves`` reads the window's predictions and
+    ``assign_labels`` commits the sums to ``rates``, ``proportions``, ``assignments`` and ``ngram_scores``. This
+    gives the same results as ``bindsnet.evaluation.assign_labels`` and ``update_ngram_scores`` applied to the full
+    window. Memory is independent of ``update_interval`` and ``time``, apart from one predicted label per example.
+    """
+
+    def __init__(self, n_neurons: int, n_classes: int, schemes: Sequence[str] = ('all', 'proportion', 'ngram'),
+                 n: int = 2, learn: bool = True, **kwargs) -> None:
+        # language=rst
+        """
+        Constructor for ``StreamingEvaluator``.
+
+        :param n_neurons: Number of recorded neurons.
+        :param n_classes: Number of data categories.
+        :param schemes: Classification schemes to evaluate.
+        :param n: Length of ngrams for the ``'ngram'`` scheme.
+        :param learn: Whether to accumulate activity for ``assign_labels``. Disable in the test phase.
+        :param kwargs: Optional initial ``assignments``, ``proportions``, ``rates`` and ``ngram_scores``; e.g., as
+            loaded from an auxiliary parameters file. ``ngram_scores`` may be a dictionary or an ``NgramTable``.
+        """
+        self.n_classes = n_classes
+        self.schemes = schemes
+        self.n = n
+        self.learn = learn
+
+        self.assignments = kwargs.get('assignments', -torch.ones(n_neurons))
+        self.proportions = kwargs.get('proportions', torch.zeros(n_neurons, n_classes))
+        self.rates = kwargs.get('rates', torch.zeros(n_neurons, n_classes))
+        self.ngram_scores = kwargs.get('ngram_scores', {})
+
+        self.predictions = {scheme: [] for scheme in schemes}
+        self.sums = torch.zeros(n_neurons, n_classes)
+        self.label_counts = torch.zeros(n_classes)
+        self.pending = self._empty_ngrams()
+
+    def _empty_ngrams(self):
+        # Empty ngram scores of the same kind as ``ngram_scores``.
+        if isinstance(self.ngram_scores, NgramTable):
+            return NgramTable(self.ngram_scores.n_neurons, self.n_classes, self.n)
+
+        return {}
+
+    def add(self, spikes: torch.Tensor, label: int) -> Dict[str, int]:
+        # language=rst
+        """
+        Classifies a single example and folds its activity into the running window statistics.
+
+        :param spikes: Tensor of shape ``[time, n_neurons]`` of output spikes.
+        :param label: Integer data label of the example.
+        :return: Mapping from name of classification scheme to predicted label.
+        """
+        spikes = spikes.float()
+        counts = spikes.sum(0)
+        record = counts.view(1, 1, -1)
+
+        predictions = {}
+        for scheme in self.schemes:
+            if scheme == 'all':
+                prediction = all_activity(record, self.assignments, self.n_classes)
+            elif scheme == 'proportion':
+                prediction = proportion_weighting(record, self.assignments, self.proportions, self.n_classes)
+            elif scheme == 'ngram':
+                prediction = ngram_predict(spikes.unsqueeze(0), self.ngram_scores, self.n_classes, self.n)
+            else:
+                raise NotImplementedError
+
+            predictions[scheme] = int(prediction[0])
+            self.predictions[scheme].append(predictions[scheme])
+
+        if self.learn:
+            label = int(label)
+            self.sums[:, label] += counts
+            self.label_counts[label] += 1
+
+            if 'ngram' in self.schemes:
+                self.pending = ngram_update(
+                    spikes.unsqueeze(0), torch.Tensor([label]), self.n_classes, self.n, self.pending
+                )
+
+        return predictions
+
+    def window(self) -> Dict[str, torch.Tensor]:
+        # language=rst
+        """
+        Returns the predictions of the current window and starts a new one.
+
+        :return: Mapping from name of classification scheme to ``torch.Tensor`` of predicted labels.
+        """
+        predictions = {scheme: torch.Tensor(self.predictions[scheme]).long() for scheme in self.schemes}
+        self.predictions = {scheme: [] for scheme in self.schemes}
+        return predictions
+
+    def assign_labels(self, alpha: float = 1.0) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, Dict]:
+        # language=rst
+        """
+        Commits the activity accumulated since the last call, as ``assign_labels`` and ``update_ngram_scores`` would
+        for the whole window.
+
+        :param alpha: Rate decay, as in ``bindsnet.evaluation.assign_labels``.
+        :return: Neuron assignments, proportions, rates, and ngram scores.
+        """
+        for i in range(self.n_classes):
+            if self.label_counts[i] > 0:
+                self.rates[:, i] = alpha * self.rates[:, i] + self.sums[:, i] / self.label_counts[i]
+
+        self.proportions = self.rates / self.rates.sum(1, keepdim=True)
+        self.proportions[self.proportions != self.proportions] = 0  # Set NaNs to 0.
+        self.assignments = torch.max(self.proportions, 1)[1]
+
+        if isinstance(self.ngram_scores, NgramTable):
+            self.ngram_scores.merge(self.pending)
+        else:
+            for order, scores in self.pending.items():
+                if order in self.ngram_scores:
+                    self.ngram_scores[order] += scores
+                else:
+                    self.ngram_scores[order] = scores
+
+        self.sums.zero_()
+        self.label_counts.zero_()
+        self.pending = self._empty_ngrams()
+
+        return self.assignments, self.proportions, self.rates, self.ngram_scores
+
+
+def ngram_predict(spikes, ngram_scores: Union[NgramTable, Dict], n_labels: int, n: int) -> torch.Tensor:
+    # language=rst
+    """
+    Predicts labels with the ngram scheme, using the vectorized ``NgramTable`` when given one and
+    ``bindsnet.evaluation.ngram`` otherwise.
+
+    :param spikes: Tensor (or ``SpikeRecord``) of shape ``[n_examples, time, n_neurons]``.
+    :param ngram_scores: ``NgramTable`` or dictionary of ngram scores.
+    :param n_labels: Number of data categories.
+    :param n: Length of ngrams.
+    :return: Predictions tensor of shape ``[n_examples]``.
+    """
+    if isinstance(ngram_scores, NgramTable):
+        return ngram_scores.predict(spikes)
+
+    return ngram(spikes, ngram_scores, n_labels, n)
+
+
+def ngram_update(spikes, labels: torch.Tensor, n_labels: int, n: int,
+                 ngram_scores: Union[NgramTable, Dict]) -> Union[NgramTable, Dict]:
+    # language=rst
+    """
+    Updates ngram scores, using the vectorized ``NgramTable`` when given one and
+    ``bindsnet.evaluation.update_ngram_scores`` otherwise.
+
+    :param spikes: Tensor (or ``SpikeRecord``) of shape ``[n_examples, time, n_neurons]``.
+    :param labels: Tensor of shape ``[n_examples]`` of integer data labels.
+    :param n_labels: Number of data categories.
+    :param n: Length of ngrams.
+    :param ngram_scores: ``NgramTable`` or dictionary of ngram scores.
+    :return: Updated ngram scores.
+    """
+    if isinstance(ngram_scores, NgramTable):
+        return ngram_scores.update(spikes, labels)
+
+    return update_ngram_scores(spikes, labels, n_labels, n, ngram_scores)
+
+
 def update_curves(curves: Dict[str, list], labels: torch.Tensor,
                   n_classes: int, **kwargs) -> Tuple[Dict[str, list], Dict[str, torch.Tensor]]:
     # language=rst
@@ -32,19 +296,32 @@ def update_curves(curves: Dict[str, list], labels: torch.Tensor,
     :param curves: Mapping from name of classification scheme to list of accuracy evaluations.
     :param labels: One-dimensional ``torch.Tensor`` of integer data labels.
     :param n_classes: Number of data categories.
-    :param kwargs: Additional keyword arguments for classification scheme evaluation functions.
+    :param kwargs: Additional keyword arguments for classification scheme evaluation functions, or a
+        ``StreamingEvaluator`` as ``evaluator``, whose online predictions for the window are used instead.
     :return: Updated accuracy curves and predictions.
     """
+    if 'evaluator' in kwargs:
+        # Predictions were made online, example by example.
+        predictions = kwargs['evaluator'].window()
+        for scheme in curves:
+            accuracy = torch.sum(labels.long() == predictions[scheme]).float() / len(labels)
+            curves[scheme].append(100 * accuracy)
+
+        for hook in curve_hooks:
+            hook(curves)
+
+        return curves, predictions
+
     predictions = {}
     for scheme in curves:
         # Branch based on name of classification scheme
         if scheme == 'all':
-            spike_record = kwargs['spike_record']
+            spike_record = rates_view(kwargs['spike_record'])
             assignments = kwargs['assignments']
 
             prediction = all_activity(spike_record, assignments, n_classes)
         elif scheme == 'proportion':
-            spike_record = kwargs['spike_record']
+            spike_record = rates_view(kwargs['spike_record'])
             assignments = kwargs['assignments']
             proportions = kwargs['proportions']
 
@@ -54,7 +331,7 @@ def update_curves(curves: Dict[str, list], labels: torch.Tensor,
             ngram_scores = kwargs['ngram_scores']
             n = kwargs['n']
 
-            prediction = ngram(spike_record, ngram_scores, n_classes, n)
+            prediction = ngram_predict(spike_record, ngram_scores, n_classes, n)
         elif scheme == 'logreg':
             full_spike_record = kwargs['full_spike_record']
             logreg = kwargs['logreg']
@@ -69,6 +346,9 @@ def update_curves(curves: Dict[str, list], labels: torch.Tensor,
         accuracy = torch.sum(labels.long() == prediction).float() / len(labels)
         curves[scheme].append(100 * accuracy)
 
+    for hook in curve_hooks:
+        hook(curves)
+
     return curves, predictions
 
 
@@ -84,4 +364,516 @@ def bit_flip(x: torch.Tensor, p: float) -> torch.Tensor:
     i = torch.bernoulli(p * torch.ones_like(x)).byte()
     x = x.byte()
     x[i] = ~x[i]
-    return x.float()
\ No newline at end of file
+    return x.float()
+
+
+class IntensityController:
+    # language=rst
+    """
+    Runs a network on an input, escalating the input intensity part-way through the simulation whenever the output
+    layer is on course to emit fewer than ``min_spikes`` spikes. Replaces re-running the full simulation with doubled
+    intensity: the simulation is split into ``max_retries + 1`` equal segments, and at each segment boundary the spike
+    count so far is extrapolated to the full simulation time. If the extrapolation falls short, the remaining segments
+    are encoded with intensity multiplied by ``factor``. The total simulation time is at most ``time``, and the input
+    data is never modified. With a ``terminate`` criterion, simulation of an example ends as soon as its outcome is
+    decided; the number of time steps saved this way is accumulated in ``saved``.
+
+    Each segment is encoded separately, so spike trains restart at every segment boundary; e.g., with ``poisson``,
+    the first inter-spike interval of each segment is drawn afresh instead of continuing from the previous segment.
+    Weights are normalized once per example, after its last segment, as after a single ``Network.run``.
+    """
+
+    def __init__(self, network: Network, monitor: Monitor, time: int, dt: float = 1.0, layer: str = 'X',
+                 min_spikes: int = 5, max_retries: int = 3, factor: float = 2.0,
+                 encoder: Callable[..., torch.Tensor] = poisson,
+                 terminate: Optional[Callable[[torch.Tensor], bool]] = None, check_interval: int = 10) -> None:
+        # language=rst
+        """
+        Constructor for ``IntensityController``.
+
+        :param network: Network to simulate. State variables must be reset before each call to ``run``.
+        :param monitor: Spike monitor attached to the output layer with recording length ``time``.
+        :param time: Simulation time per example.
+        :param dt: Simulation time step.
+        :param layer: Name of the input layer.
+        :param min_spikes: Minimum number of output spikes expected per example.
+        :param max_retries: Maximum number of intensity escalations per example.
+        :param factor: Multiplicative increase in intensity per escalation.
+        :param encoder: Function encoding input intensities into spike trains; e.g., ``poisson``.
+        :param terminate: Optional early termination criterion (e.g., ``EarlyTermination``), called every
+            ``check_interval`` time steps with the ``[elapsed, n_neurons]`` output spikes of the current example.
+            The simulation of the example ends as soon as it returns ``True``.
+        :param check_interval: No. of time steps between evaluations of ``terminate``.
+        """
+        self.network = network
+        self.monitor = monitor
+        self.dt = dt
+        self.layer = layer
+        self.min_spikes = min_spikes
+        self.factor = factor
+        self.encoder = encoder
+        self.terminate = terminate
+
+        # Segment boundaries (in time steps) at which output activity is inspected.
+        self.timesteps = int(time / dt)
+        self.escalations = [int(self.timesteps * k / (max_retries + 1)) for k in range(1, max_retries + 1)]
+        self.segments = sorted(set([0, self.timesteps] + self.escalations))
+        self.bounds = self.segments
+        if terminate is not None:
+            self.bounds = sorted(set(self.segments + list(range(0, self.timesteps, check_interval))))
+
+        self.retries = 0
+        self.elapsed = 0
+        self.saved = 0
+        self.samples = []
+
+    def _record(self, elapsed: int) -> torch.Tensor:
+        # Output spikes of the current example, of shape ``[elapsed, n_neurons]``.
+        s = self.monitor.get('s')
+        return s.contiguous().view(-1, s.size(-1)).t()[-elapsed:]
+
+    def _quiet(self, count: torch.Tensor, elapsed: int) -> torch.Tensor:
+        # Whether the spike count extrapolated to the full simulation falls short of ``min_spikes``.
+        return count.float() * self.timesteps / elapsed < self.min_spikes
+
+    def run(self, datum: torch.Tensor, **kwargs) -> int:
+        # language=rst
+        """
+        Simulates a single example.
+
+        :param datum: Tensor of input intensities.
+        :param kwargs: Keyword arguments passed on to ``Network.run``; e.g., ``masks``.
+        :return: Number of intensity escalations.
+        """
+        scale = 1.0
+        self.retries = 0
+        self.elapsed = 0
+        self.samples = []
+
+        # ``Network.run`` normalizes weights after every segment; suspend it, and normalize once per example instead.
+        connections = [c for c in self.network.connections.values() if getattr(c, 'norm', None) is not None]
+        norms = [c.norm for c in connections]
+        for c in connections:
+            c.norm = None
+
+        try:
+            for start, stop in zip(self.bounds[:-1], self.bounds[1:]):
+                if start in self.escalations and self._quiet(self._record(start).sum(), start):
+                    self.retries += 1
+                    scale *= self.factor
+
+                if start > 0 and self.terminate is not None and self.terminate(self._record(start)):
+                    break
+
+                sample = self.encoder(datum=datum * scale, time=(stop - start) * self.dt, dt=self.dt)
+                self.network.run(inpts={self.layer: sample}, time=(stop - start) * self.dt, **kwargs)
+                self.samples.append(sample)
+                self.elapsed = stop
+        finally:
+            for c, norm in zip(connections, norms):
+                c.norm = norm
+
+        for c in connections:
+            c.normalize()
+
+        self.saved += self.timesteps - self.elapsed
+        return self.retries
+
+    @property
+    def sample(self) -> torch.Tensor:
+        # language=rst
+        """
+        Input of the last simulated example, of shape ``[elapsed, *datum.shape]``; e.g., for plotting. Lazy inputs
+        (``InputSource``) are materialized, so they should be deterministic (e.g., ``ConstantSource``).
+        """
+        return torch.cat([s.materialize() if hasattr(s, 'materialize') else s for s in self.samples])
+
+
+# Per-worker state of ``ParallelSimulator``: the worker's copy of the controller, images and monitors.
+_simulator = {}
+
+
+def _init_simulator(controller: 'IntensityController', images, monitors: Dict[str, Monitor], threads: int) -> None:
+    # Tensors arrive in shared memory; copy the network state so that workers don't simulate on the same tensors.
+    controller, monitors = deepcopy((controller, monitors), {id(controller.encoder): controller.encoder})
+    torch.set_num_threads(threads)
+    _simulator.update(controller=controller, images=images, monitors=monitors)
+
+
+def _simulate(indices: Sequence[int]) -> List[Tuple[Dict[str, torch.Tensor], int, int]]:
+    # Simulates examples one at a time on this worker's copy of the network, exactly as the serial loop does.
+    controller, images, monitors = _simulator['controller'], _simulator['images'], _simulator['monitors']
+    outputs = []
+    for i in indices:
+        if hasattr(controller.encoder, 'start'):
+            controller.encoder.start(i)
+
+        controller.run(images[i % len(images)].contiguous().view(-1))
+
+        record = {layer: monitors[layer].get('s').t().clone() for layer in monitors}
+        outputs.append((record, controller.elapsed, controller.retries))
+        controller.network.reset_()
+
+    return outputs
+
+
+class ParallelSimulator:
+    # language=rst
+    """
+    Simulates independent examples on a pool of worker processes, each holding its own copy of the network, its
+    ``IntensityController`` and the spike monitors. Only valid when no example depends on another; i.e., with learning
+    disabled (``NoOp`` update rules) and fixed adaptive thresholds (``theta_plus = theta_decay = 0``), as in the test
+    phase. BindsNET simulates one example per network, so examples are sharded across networks instead of batched
+    within one. With an encoder keyed by example index (e.g., ``KeyedPoisson``), every example sees the same input
+    spikes as in a serial run, so the recorded spikes are identical.
+    """
+
+    def __init__(self, controller: 'IntensityController', images, monitors: Dict[str, Monitor], workers: int,
+                 threads: int = 1) -> None:
+        # language=rst
+        """
+        Constructor for ``ParallelSimulator``. Starts the worker processes, which receive copies of ``controller``
+        (with its network and encoder), ``images`` and ``monitors``.
+
+        :param controller: Controller of the network to simulate; its encoder's ``start`` is called per example.
+        :param images: Tensor (or ``ImageView``) of shape ``[n_examples, ...]`` of input intensities.
+        :param monitors: Spike monitors of the network by layer name, whose recordings are returned.
+        :param workers: Number of worker processes.
+        :param threads: Number of torch threads per worker.
+        """
+        import multiprocessing as mp
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(
+            workers, mp_context=mp.get_context('spawn'), initializer=_init_simulator,
+            initargs=(controller, images, monitors, threads)
+        )
+
+    def run(self, indices: Sequence[int]) -> List[Tuple[Dict[str, torch.Tensor], int, int]]:
+        # language=rst
+        """
+        Simulates the examples with the given indices, split into one contiguous shard per worker.
+
+        :param indices: Example indices.
+        :return: Per example, in the order of ``indices``: the ``[time, n_neurons]`` recorded spikes of every monitored
+            layer, the number of simulated time steps and the number of intensity escalations.
+        """
+        indices = list(indices)
+        size = -(-len(indices) // self.workers)
+        shards = [indices[k:k + size] for k in range(0, len(indices), size)]
+        return [output for outputs in self.executor.map(_simulate, shards) for output in outputs]
+
+    def close(self) -> None:
+        # language=rst
+        """
+        Shuts the worker processes down.
+        """
+        self.executor.shutdown()
+
+
+class EarlyTermination:
+    # language=rst
+    """
+    Early termination criterion for inference. Decides whether the predictions of the given classification schemes
+    can no longer change over the remainder of the simulation, by bounding the increase in each class score attainable
+    with the spikes that can still be emitted. With ``one_spike=True``, at most one output neuron spikes per time step,
+    which makes the bounds tight enough to stop most simulations well before ``time``. Predictions made on the
+    truncated spike record are identical to those made on the full record.
+    """
+
+    def __init__(self, time: int, n_classes: int, schemes: Sequence[str] = ('all', 'proportion', 'ngram'),
+                 dt: float = 1.0, one_spike: bool = False, **kwargs) -> None:
+        # language=rst
+        """
+        Constructor for ``EarlyTermination``.
+
+        :param time: Simulation time per example.
+        :param n_classes: Number of data categories.
+        :param schemes: Classification schemes whose predictions must be fixed before terminating.
+        :param dt: Simulation time step.
+        :param one_spike: Whether at most one output neuron may spike per time step.
+        :param kwargs: Classification scheme variables, as passed to ``update_curves``: ``assignments`` (for
+            ``'all'`` and ``'proportion'``), ``proportions`` (for ``'proportion'``), and ``ngram_scores`` and ``n``
+            (for ``'ngram'``).
+        """
+        self.timesteps = int(time / dt)
+        self.n_classes = n_classes
+        self.schemes = schemes
+        self.one_spike = one_spike
+
+        self.assignments = kwargs.get('assignments')
+        self.proportions = kwargs.get('proportions')
+        self.ngram_scores = kwargs.get('ngram_scores', {})
+        self.n = kwargs.get('n', 2)
+
+        if isinstance(self.ngram_scores, NgramTable):
+            self.table = self.ngram_scores
+        else:
+            self.table = None
+
+        if self.assignments is not None:
+            self.n_assigns = torch.stack(
+                [torch.sum(self.assignments == i).float() for i in range(n_classes)]
+            )
+
+        if 'proportion' in schemes:
+            # Largest per-spike contribution of any neuron assigned to each class.
+            self.max_proportion = torch.zeros(n_classes)
+            for i in range(n_classes):
+                if self.n_assigns[i] > 0:
+                    self.max_proportion[i] = self.proportions[self.assignments == i, i].max()
+
+        if 'ngram' in schemes:
+            # Largest contribution of any single ngram to each class.
+            if self.table is not None and len(self.table) > 0:
+                self.max_ngram = self.table.scores.max(0)[0]
+            elif self.table is None and self.ngram_scores:
+                self.max_ngram = torch.stack(list(self.ngram_scores.values())).max(0)[0].float()
+            else:
+                self.max_ngram = torch.zeros(n_classes)
+
+    def _scores(self, scheme: str, spikes: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        # Current class scores and upper bounds on their further increase given the remaining time steps.
+        remaining = self.timesteps - spikes.size(0)
+        budget = remaining if self.one_spike else remaining * spikes.size(1)
+
+        if scheme in ('all', 'proportion'):
+            counts = spikes.sum(0).float()
+            scores = torch.zeros(self.n_classes)
+            bounds = torch.zeros(self.n_classes)
+            for i in range(self.n_classes):
+                if self.n_assigns[i] > 0:
+                    indices = self.assignments == i
+                    budget_i = min(budget, remaining * self.n_assigns[i].item())
+                    if scheme == 'all':
+                        scores[i] = counts[indices].sum() / self.n_assigns[i]
+                        bounds[i] = budget_i / self.n_assigns[i]
+                    else:
+                        scores[i] = (self.proportions[indices, i] * counts[indices]).sum() / self.n_assigns[i]
+                        bounds[i] = budget_i * self.max_proportion[i] / self.n_assigns[i]
+
+        elif scheme == 'ngram' and self.table is not None:
+            scores = self.table.score(spikes.unsqueeze(0))[0]
+
+            # Each further spike completes at most one further ngram.
+            bounds = budget * self.max_ngram
+
+        elif scheme == 'ngram':
+            fire_order = []
+            for step in range(spikes.size(0)):
+                fire_order += torch.nonzero(spikes[step]).view(-1).tolist()
+
+            scores = torch.zeros(self.n_classes)
+            for j in range(len(fire_order) - self.n):
+                key = tuple(fire_order[j:j + self.n])
+                if key in self.ngram_scores:
+                    scores += self.ngram_scores[key]
+
+            # Each further spike completes at most one further ngram.
+            bounds = budget * self.max_ngram
+
+        else:
+            raise NotImplementedError
+
+        return scores, bounds
+
+    def __call__(self, spikes: torch.Tensor) -> bool:
+        # language=rst
+        """
+        Checks whether all predictions are fixed.
+
+        :param spikes: Output spikes recorded so far, of shape ``[elapsed, n_neurons]``.
+        :return: Whether the simulation can be terminated.
+        """
+        for scheme in self.schemes:
+            scores, bounds = self._scores(scheme, spikes)
+            leader = torch.argmax(scores)
+
+            # Every other class must stay strictly behind, even if it gains as much as possible.
+            others = scores + bounds
+            others[leader] = -np.inf
+            if not scores[leader] > others.max():
+                return False
+
+        return True
+
+
+def rss_mb() -> float:
+    # language=rst
+    """
+    Resident set size of this process in megabytes; the peak RSS where the current one isn't available.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+class Telemetry:
+    # language=rst
+    """
+    Append-only throughput metrics of a run. Examples are counted as they are simulated, and every ``emit`` writes one
+    row for the window since the previous ``emit``: examples / second, simulated time steps / second, spikes / second
+    per layer, intensity escalations (retries), resident memory and time spent evaluating. Rows go to a JSON-lines
+    (``.jsonl``) or CSV (``.csv``) file, by extension; each row carries the run name and host, so files of a whole
+    sweep can be aggregated with ``summarize_telemetry``.
+    """
+
+    def __init__(self, path: str, run: str, layers: Sequence[str] = ()) -> None:
+        # language=rst
+        """
+        Constructor for ``Telemetry``.
+
+        :param path: Output file; ``.csv`` for comma-separated rows, JSON lines otherwise.
+        :param run: Name of the run; e.g., the model name built from its hyper-parameters.
+        :param layers: Names of the layers whose spikes are counted.
+        """
+        self.path = path
+        self.run = run
+        self.layers = list(layers)
+        self.host = socket.gethostname()
+        self.csv = path.endswith('.csv')
+
+        if not os.path.isdir(os.path.dirname(path) or '.'):
+            os.makedirs(os.path.dirname(path))
+
+        self.start = self.last = t()
+        self.examples = 0
+        self._window()
+
+    def _window(self) -> None:
+        # Zeros the counters of the current window.
+        self.window_examples = 0
+        self.timesteps = 0
+        self.spikes = {layer: 0 for layer in self.layers}
+        self.retries = 0
+        self.evaluation = 0.0
+
+    def example(self, n: int = 1, timesteps: int = 0, spikes: Optional[Dict[str, int]] = None,
+                retries: int = 0) -> None:
+        # language=rst
+        """
+        Counts simulated examples.
+
+        :param n: Number of examples.
+        :param timesteps: Number of time steps simulated for them.
+        :param spikes: Mapping from layer name to number of spikes emitted.
+        :param retries: Number of intensity escalations.
+        """
+        self.examples += n
+        self.window_examples += n
+        self.timesteps += timesteps
+        self.retries += retries
+        for layer, count in (spikes or {}).items():
+            self.spikes[layer] = self.spikes.get(layer, 0) + int(count)
+
+    @contextmanager
+    def evaluating(self):
+        # language=rst
+        """
+        Context manager adding the time spent in its body to the window's evaluation time.
+        """
+        start = t()
+        try:
+            yield
+        finally:
+            self.evaluation += t() - start
+
+    def emit(self) -> Dict:
+        # language=rst
+        """
+        Writes the metrics of the window since the last ``emit`` and starts a new window.
+
+        :return: The written row.
+        """
+        now = t()
+        elapsed = max(now - self.last, 1e-9)
+        row = {
+            'run': self.run, 'host': self.host, 'examples': self.examples, 'elapsed': now - self.start,
+            'window': elapsed, 'examples_per_sec': self.window_examples / elapsed,
+            'steps_per_sec': self.timesteps / elapsed,
+        }
+        for layer in self.layers:
+            row[f'spikes_per_sec_{layer}'] = self.spikes.get(layer, 0) / elapsed
+
+        row.update(retries=self.retries, rss_mb=rss_mb(), evaluation_sec=self.evaluation)
+
+        if self.csv:
+            new = not os.path.isfile(self.path)
+            with open(self.path, 'a') as f:
+                writer = csv.writer(f, lineterminator='\n')
+                if new:
+                    writer.writerow(list(row))
+
+                writer.writerow(list(row.values()))
+        else:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(row) + '\n')
+
+        self.last = now
+        self._window()
+        return row
+
+
+def _read_telemetry(path: str) -> List[Dict]:
+    # Rows of a telemetry file, with numeric values parsed.
+    with open(path, 'r') as f:
+        if not path.endswith('.csv'):
+            return [json.loads(line) for line in f if line.strip()]
+
+        rows = []
+        for row in csv.DictReader(f):
+            for k, v in row.items():
+                try:
+                    row[k] = float(v)
+                except (TypeError, ValueError):
+                    pass
+
+            rows.append(row)
+
+        return rows
+
+
+def summarize_telemetry(paths: Sequence[str]) -> List[Dict]:
+    # language=rst
+    """
+    Aggregates telemetry files (e.g., of all runs of a sweep) per run: examples and time steps per second over the
+    whole run, mean spikes per second per layer, total retries, peak resident memory and total evaluation time.
+
+    :param paths: Telemetry files, or directories to search for ``.jsonl`` / ``.csv`` telemetry files.
+    :return: One summary per run, fastest first.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files += [os.path.join(root, n) for n in sorted(names) if n.endswith(('.jsonl', '.csv'))]
+        else:
+            files.append(path)
+
+    runs = {}
+    for f in files:
+        for row in _read_telemetry(f):
+            runs.setdefault((row['run'], row['host']), []).append(row)
+
+    summaries = []
+    for (run, host), rows in runs.items():
+        seconds = sum(row['window'] for row in rows)
+        summary = {
+            'run': run, 'host': host, 'windows': len(rows), 'examples': max(row['examples'] for row in rows),
+            'examples_per_sec': sum(row['examples_per_sec'] * row['window'] for row in rows) / seconds,
+            'steps_per_sec': sum(row['steps_per_sec'] * row['window'] for row in rows) / seconds,
+        }
+        for key in rows[0]:
+            if key.startswith('spikes_per_sec_'):
+                summary[key] = sum(row[key] * row['window'] for row in rows) / seconds
+
+        summary.update(
+            retries=sum(row['retries'] for row in rows), max_rss_mb=max(row['rss_mb'] for row in rows),
+            evaluation_sec=sum(row['evaluation_sec'] for row in rows)
+        )
+        summaries.append(summary)
+
+    return sorted(summaries, key=lambda x: -x['examples_per_sec'])